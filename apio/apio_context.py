@@ -7,6 +7,7 @@
 # -- Licence GPLv2
 
 import sys
+import copy
 import json
 import platform
 from enum import Enum
@@ -69,6 +70,9 @@ PROGRAMMERS_JSONC = "programmers.jsonc"
 # -- General config information.
 CONFIG_JSONC = "config.jsonc"
 
+# -- The parsed stock resource files, by file name.
+_STOCK_RESOURCES: Dict[str, dict] = {}
+
 
 class ApioContextScope(Enum):
     """Represents the possible scopes of ApioContext creations."""
@@ -304,9 +308,14 @@ class ApioContext:
                     secho(f"Loading custom '{name}'.")
                     return self._load_resource_file(filepath)
 
-        # -- Load the stock resource file from the APIO package.
-        filepath = util.get_path_in_apio_package(RESOURCES_DIR) / name
-        return self._load_resource_file(filepath)
+        # -- Load the stock resource file from the APIO package. They are
+        # -- parsed once per process, since a process may create multiple
+        # -- apio contexts, e.g. a worker of 'apio batch'. We return a copy
+        # -- since the callers may modify it.
+        if name not in _STOCK_RESOURCES:
+            filepath = util.get_path_in_apio_package(RESOURCES_DIR) / name
+            _STOCK_RESOURCES[name] = self._load_resource_file(filepath)
+        return copy.deepcopy(_STOCK_RESOURCES[name])
 
     @staticmethod
     def _load_resource_file(filepath: Path) -> dict:
@@ -12,6 +12,7 @@ from apio.utils.cmd_util import ApioSubgroup, ApioGroup
 
 # -- Import sub commands.
 from apio.commands import (
+    apio_batch,
     apio_boards,
     apio_build,
     apio_clean,
@@ -21,6 +22,7 @@ from apio.commands import (
     apio_format,
     apio_fpgas,
     apio_graph,
+    apio_inspect,
     apio_lint,
     apio_packages,
     apio_preferences,
@@ -42,6 +44,7 @@ SUBGROUPS = [
             apio_build.cli,
             apio_upload.cli,
             apio_clean.cli,
+            apio_batch.cli,
         ],
     ),
     ApioSubgroup(
@@ -51,6 +54,7 @@ SUBGROUPS = [
             apio_format.cli,
             apio_sim.cli,
             apio_test.cli,
+            apio_inspect.cli,
             apio_report.cli,
             apio_graph.cli,
         ],
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors
+# --  * Jesús Arroyo (2016-2019)
+# --  * Juan Gonzalez (obijuan) (2019-2024)
+# -- Licence GPLv2
+"""Implementation of 'apio batch' command"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+import click
+from click import secho, style
+from apio.managers import installer
+from apio.managers.batch import (
+    BATCH_COMMANDS,
+    ProjectResult,
+    find_projects,
+    run_projects,
+    write_results_file,
+)
+from apio.commands import options
+from apio.utils import cmd_util, pkg_util
+from apio.apio_context import ApioContext, ApioContextScope
+
+
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+root_option = click.option(
+    "root",  # Var name.
+    "-r",
+    "--root",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    metavar="path",
+    help="Search for projects in this directory.",
+    cls=cmd_util.ApioOption,
+)
+
+results_option = click.option(
+    "results",  # Var name.
+    "--results",
+    type=Path,
+    metavar="file",
+    help="Write the results to this json file.",
+    cls=cmd_util.ApioOption,
+)
+
+
+# ---------------------------
+# -- COMMAND
+# ---------------------------
+APIO_BATCH_HELP = """
+The command 'apio batch' runs an apio command, such as 'build' or 'test', in
+each of the apio projects in a directory tree. A project is a directory with
+an apio.ini file.
+
+The projects are processed in parallel by a pool of worker processes. The
+apio packages are checked once, and each worker loads apio once and then
+processes multiple projects. The output of a project is printed only if the
+command failed. A summary is printed at the end and the results are written
+to a json file, by default apio-batch-results.json in the root directory.
+
+\b
+Examples:
+  apio batch build                 # Build all the projects.
+  apio batch test -r examples -j 4 # Test the projects in 'examples'.
+  apio batch lint --results r.json # Lint and write the results to r.json.
+"""
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+@click.command(
+    name="batch",
+    short_help="Run a command in multiple projects.",
+    help=APIO_BATCH_HELP,
+)
+@click.pass_context
+@click.argument("command", type=click.Choice(BATCH_COMMANDS), metavar="cmd")
+@root_option
+@options.jobs_option_gen(help="Process up to n projects in parallel.")
+@results_option
+def cli(
+    _: click.Context,
+    # Arguments
+    command: str,
+    # Options
+    root: Optional[Path],
+    jobs: Optional[int],
+    results: Optional[Path],
+):
+    """Implements the apio batch command."""
+
+    # -- Find the projects.
+    root = (root or Path.cwd()).resolve()
+    projects = find_projects(root)
+    if not projects:
+        secho(f"Error: no apio projects found in {root}", fg="red")
+        sys.exit(1)
+
+    # -- Load the apio resources and check the apio packages once. The
+    # -- env of the packages is inherited by the worker processes.
+    apio_ctx = ApioContext(scope=ApioContextScope.NO_PROJECT)
+    installer.install_missing_packages_on_the_fly(apio_ctx)
+    pkg_util.set_env_for_packages(apio_ctx, quiet=True)
+
+    # -- Run the command in the projects.
+    jobs = jobs or os.cpu_count() or 1
+    secho(
+        f"Running 'apio {command}' in {len(projects)} projects, "
+        f"{jobs} in parallel.",
+        color=True,
+    )
+    start_time = time.time()
+    project_results = run_projects(
+        command, projects, root, jobs, on_result=_print_result
+    )
+    duration = time.time() - start_time
+
+    # -- Write the results file.
+    results = results or root / "apio-batch-results.json"
+    write_results_file(results, command, project_results, duration)
+
+    # -- Print the summary.
+    failed = [r for r in project_results if not r.passed]
+    secho()
+    for result in failed:
+        secho(f"FAILED  {result.project}", fg="red", color=True)
+    if failed:
+        secho(
+            f"Error: {len(failed)} of {len(project_results)} projects "
+            f"failed in {duration:.2f}s.",
+            fg="red",
+            color=True,
+        )
+    else:
+        secho(
+            f"All {len(project_results)} projects passed "
+            f"in {duration:.2f}s.",
+            fg="green",
+            color=True,
+        )
+    secho(f"Results written to {results}", color=True)
+
+    sys.exit(1 if failed else 0)
+
+
+def _print_result(result: ProjectResult) -> None:
+    """Prints the result of a project, as it completes."""
+    if result.passed:
+        status = style("PASSED", fg="green")
+    else:
+        status = style("FAILED", fg="red")
+    secho(f"{status}  {result.duration:>7.2f}s  {result.project}", color=True)
+
+    # -- The output of a failed project, for diagnostic.
+    if not result.passed:
+        for line in result.output.rstrip().splitlines():
+            secho(f"  | {line}", color=True)
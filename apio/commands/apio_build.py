@@ -9,11 +9,48 @@
 
 import sys
 from pathlib import Path
+from typing import Optional
 import click
+from click import secho
 from apio.managers.scons import SCons
+from apio.managers.watcher import watch_scons
 from apio.commands import options
+from apio.utils import cmd_util
 from apio.apio_context import ApioContext, ApioContextScope
-from apio.proto.apio_pb2 import Verbosity
+from apio.proto.apio_pb2 import Verbosity, BuildParams
+
+
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+seeds_option = click.option(
+    "seeds",  # Var name.
+    "--seeds",
+    type=click.IntRange(min=1),
+    default=1,
+    metavar="n",
+    help="Run place-and-route with n seeds, keep the best fmax.",
+    cls=cmd_util.ApioOption,
+)
+
+boards_option = click.option(
+    "boards",  # Var name.
+    "--boards",
+    type=str,
+    metavar="board,...",
+    help="Build for these boards, each in _build/<board>.",
+    cls=cmd_util.ApioOption,
+)
+
+fmax_target_option = click.option(
+    "fmax_target",  # Var name.
+    "--fmax-target",
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="mhz",
+    help="With --seeds, use the lowest seed that achieves this fmax.",
+    cls=cmd_util.ApioOption,
+)
 
 
 # ---------------------------
@@ -28,15 +65,36 @@ The 'apio build' command compiles all .v files (e.g., my_module.v) in the
 project directory, except those whose names end with _tb
 (e.g., my_module_tb.v), as these are assumed to be testbenches.
 
+The timing of the design depends on the random seed of the place-and-route
+tool. With '--seeds n', place-and-route is run with seeds 1 to n, in parallel,
+and the result with the best fmax is used. A table with the fmax and runtime
+of each seed is printed. With '--fmax-target', the result of the lowest
+seed that achieves the given fmax is used and higher seeds are stopped.
+
+With '--boards', the project is built for each of the given boards rather
+than for the board in apio.ini, in parallel, and the files of each board are
+generated in _build/<board>. Board specific constraint files are named after
+the board, e.g. icebreaker.pcf. Boards of the same architecture share the
+synthesis.
+
+With '--watch', the command builds the project and then rebuilds it each time
+a source file, a constraint file or apio.ini is saved, until Ctrl-C is
+pressed. The rebuilds are incremental and skip the startup of apio and scons.
+
 \b
 Examples:
-  apio build       # Build
-  apio build -v    # Build with verbose info
+  apio build                              # Build
+  apio build -v                           # Build with verbose info
+  apio build --seeds 8 -j 4               # Keep the best of 8 pnr seeds
+  apio build --seeds 20 --fmax-target 48  # Stop at 48Mhz
+  apio build --boards alhambra-ii,ulx3s-85f  # Build for two boards
+  apio build --watch                      # Rebuild on each change
 """
 
 
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
 @click.command(
     name="build",
     short_help="Synthesize the bitstream.",
@@ -47,6 +105,11 @@ Examples:
 @options.verbose_option
 @options.verbose_synth_option
 @options.verbose_pnr_option
+@seeds_option
+@options.jobs_option_gen(help="Run up to n boards or seeds in parallel.")
+@fmax_target_option
+@boards_option
+@options.watch_option_gen(help="Rebuild each time a file is changed.")
 def cli(
     _: click.Context,
     # Options
@@ -54,6 +117,11 @@ def cli(
     verbose: bool,
     verbose_synth: bool,
     verbose_pnr: bool,
+    seeds: int,
+    jobs: Optional[int],
+    fmax_target: Optional[float],
+    boards: Optional[str],
+    watch: bool,
 ):
     """Implements the apio build command. It invokes the toolchain
     to syntesize the source files into a bitstream file.
@@ -69,15 +137,43 @@ def cli(
         project_dir_arg=project_dir,
     )
 
-    # -- Create the scons manager.
-    scons = SCons(apio_ctx)
+    # -- Parse the list of boards, if specified. Unknown boards are fatal.
+    board_list = None
+    if boards is not None:
+        board_list = [
+            apio_ctx.lookup_board_name(b.strip())
+            for b in boards.split(",")
+            if b.strip()
+        ]
+        if not board_list:
+            secho("Error: no board specified in --boards.", fg="red")
+            sys.exit(1)
+        # -- Remove duplicates, preserving the order.
+        board_list = list(dict.fromkeys(board_list))
 
     # R0801: Similar lines in 2 files
     # pylint: disable=R0801
-    # -- Build the project with the given parameters
-    exit_code = scons.build(
-        Verbosity(all=verbose, synth=verbose_synth, pnr=verbose_pnr)
+    # -- The build parameters.
+    build_params = BuildParams(
+        seeds=seeds,
+        jobs=jobs or 0,
+        fmax_target=fmax_target or 0,
     )
+    verbosity = Verbosity(all=verbose, synth=verbose_synth, pnr=verbose_pnr)
+
+    # -- Build the project on each change, until Ctrl-C.
+    if watch:
+        watch_scons(
+            apio_ctx,
+            lambda scons: scons.build(build_params, verbosity, board_list),
+        )
+        sys.exit(0)
+
+    # -- Create the scons manager.
+    scons = SCons(apio_ctx)
+
+    # -- Build the project.
+    exit_code = scons.build(build_params, verbosity, board_list)
 
     # -- Done!
     sys.exit(exit_code)
@@ -9,12 +9,38 @@
 
 import sys
 from pathlib import Path
+from typing import Optional
 import click
+from click import secho
 from apio.managers.scons import SCons
+from apio.managers.build_pruner import BUILD_DIR, clean_build_dir
 from apio.commands import options
+from apio.utils import util, cmd_util
 from apio.apio_context import ApioContext, ApioContextScope
 
 
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+waves_only_option = click.option(
+    "waves_only",  # Var name.
+    "--waves-only",
+    is_flag=True,
+    help="Delete only the waveform files.",
+    cls=cmd_util.ApioOption,
+)
+
+older_than_option = click.option(
+    "older_than",  # Var name.
+    "--older-than",
+    type=str,
+    metavar="age",
+    help="Delete only files not used recently, e.g. 7d.",
+    cls=cmd_util.ApioOption,
+)
+
+
 # ---------------------------
 # -- COMMAND
 # ---------------------------
@@ -22,9 +48,16 @@ APIO_CLEAN_HELP = """
 The command 'apio clean' removes temporary files generated in the project
 directory by previous Apio commands.
 
+The options --waves-only and --older-than delete only some of the
+files in the _build directory, e.g. to reclaim disk space while keeping
+the build artifacts that are still in use. A size quota for the _build
+directory can also be set with the apio.ini option 'build-dir-max-size'.
+
 \b
-Example:
-  apio clean
+Examples:
+  apio clean                    # Delete all the generated files.
+  apio clean --waves-only       # Delete the .vcd and .fst files.
+  apio clean --older-than 7d    # Delete files unused for a week.
 
 """
 
@@ -36,10 +69,14 @@ Example:
 )
 @click.pass_context
 @options.project_dir_option
+@waves_only_option
+@older_than_option
 def cli(
     _: click.Context,
     # Options
     project_dir: Path,
+    waves_only: bool,
+    older_than: Optional[str],
 ):
     """Implements the apio clean command. It deletes temporary files generated
     by apio commands.
@@ -51,6 +88,11 @@ def cli(
         project_dir_arg=project_dir,
     )
 
+    # -- Handle a partial clean. We don't need scons for that.
+    if waves_only or older_than:
+        _partial_clean(apio_ctx.project_dir, waves_only, older_than)
+        sys.exit(0)
+
     # -- Create the scons manager.
     scons = SCons(apio_ctx)
 
@@ -59,3 +101,31 @@ def cli(
 
     # -- Done!
     sys.exit(exit_code)
+
+
+def _partial_clean(
+    project_dir: Path, waves_only: bool, older_than: Optional[str]
+) -> None:
+    """Deletes the selected files from the project's build directory."""
+
+    # -- Parse the age. Exit with an error message if invalid.
+    max_age = None
+    if older_than:
+        try:
+            max_age = util.parse_duration(older_than)
+        except ValueError:
+            secho(
+                f"Error: invalid --older-than value [{older_than}].", fg="red"
+            )
+            secho("Expecting a duration such as '12h' or '7d'.", fg="yellow")
+            sys.exit(1)
+
+    result = clean_build_dir(
+        project_dir / BUILD_DIR, waves_only=waves_only, older_than=max_age
+    )
+
+    secho(
+        f"Deleted {util.plurality(result.files, 'file')} "
+        f"({result.size / 2**20:.1f} MB).",
+        fg="green",
+    )
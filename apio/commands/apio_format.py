@@ -9,15 +9,36 @@
 
 import sys
 import os
+import shlex
 from pathlib import Path
 from glob import glob
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import click
 from click import secho
 from apio.apio_context import ApioContext, ApioContextScope
 from apio.commands import options
 from apio.managers import installer
-from apio.utils import util, pkg_util
+from apio.managers.formatter import (
+    FORMAT_CACHE_FILE,
+    FormatCache,
+    FormatResult,
+    FormatStatus,
+    format_files,
+)
+from apio.utils import util, pkg_util, cmd_util
+
+
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+check_option = click.option(
+    "check",  # Var name.
+    "--check",
+    is_flag=True,
+    help="Only check that the files are formatted, don't modify them.",
+    cls=cmd_util.ApioOption,
+)
 
 
 # ---------------------------
@@ -33,6 +54,14 @@ Examples:
   apio format                    # Format all source files.
   apio format -v                 # Same as above but with verbose output.
   apio format main.v main_tb.v   # Format the two tiven files.
+  apio format --check            # Fail if any file is not formatted.
+  apio format -j 4               # Format up to 4 files in parallel.
+
+Files are formatted in parallel, by default one per CPU core. Files that
+were not modified since they were last formatted, with the same formatter
+options, are skipped. Use '--force' to format them anyway. With '--check',
+the files are not modified and the command fails if any of them needs
+formatting, which is useful in CI and pre-commit hooks.
 
 The format command utilizes the format tool from the Verible project, which
 can be configured by setting its flags in the apio.ini project file
@@ -56,6 +85,9 @@ online or use the command 'apio raw -- verible-verilog-format --helpful'.
 """
 
 
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
 @click.command(
     name="format",
     short_help="Format verilog source files.",
@@ -63,12 +95,18 @@ online or use the command 'apio raw -- verible-verilog-format --helpful'.
 )
 @click.pass_context
 @click.argument("files", nargs=-1, required=False)
+@check_option
+@options.jobs_option_gen(help="Format up to n files in parallel.")
+@options.force_option_gen(help="Format also files that didn't change.")
 @options.project_dir_option
 @options.verbose_option
 def cli(
     _cmd_ctx: click.Context,
     # Arguments
     files: Tuple[str],
+    check: bool,
+    jobs: Optional[int],
+    force: bool,
     project_dir: Path,
     verbose: bool,
 ):
@@ -81,10 +119,15 @@ def cli(
         scope=ApioContextScope.PROJECT_REQUIRED, project_dir_arg=project_dir
     )
 
-    # -- Get the optional formatter options from apio.ini
-    cmd_options = apio_ctx.project.get_as_lines_list(
-        "format-verible-options", default=[]
-    )
+    # -- Get the optional formatter options from apio.ini. A line may
+    # -- contain more than one option.
+    cmd_options = [
+        arg
+        for line in apio_ctx.project.get_as_lines_list(
+            "format-verible-options", default=[]
+        )
+        for arg in shlex.split(line)
+    ]
 
     # -- Add verbose option if needed.
     if verbose and "--verbose" not in cmd_options:
@@ -111,15 +154,10 @@ def cli(
     # -- Sort files, case insensitive.
     files = sorted(files, key=str.casefold)
 
-    # -- Iterate the files and format one at a time. We could format
-    # -- all of them at once but this way we can make the output more
-    # -- user friendly.
+    # -- Check the files before formatting any of them.
     for f in files:
-        # -- Convert to a Path object.
-        path = Path(f)
-
         # -- Check the file extension.
-        _, ext = os.path.splitext(path)
+        _, ext = os.path.splitext(f)
         if ext not in [".v", ".sv"]:
             secho(
                 f"Error: '{f}' has an invalid extension, "
@@ -129,28 +167,70 @@ def cli(
             sys.exit(1)
 
         # -- Check that the file exists and is a file.
-        if not path.is_file():
+        if not Path(f).is_file():
             secho(f"Error: '{f}' is not a file.", fg="red")
             sys.exit(1)
 
-        # -- Print file name.
-        styled_f = click.style(f, fg="magenta")
-        secho(f"Formatting {styled_f}")
+    # -- Construct the formatter command. The formatter writes the formatted
+    # -- text to stdout, and we rewrite only the files that changed.
+    command = ["verible-verilog-format", "--nofailsafe_success"] + cmd_options
+    if verbose:
+        secho(" ".join(command))
+
+    # -- The cache of the formatted files. It's keyed by the command and
+    # -- the formatter version such that changing any of them reformats
+    # -- all the files.
+    verible_version = apio_ctx.profile.get_package_installed_version("verible")
+    cache = FormatCache(
+        apio_ctx.project_dir / FORMAT_CACHE_FILE,
+        " ".join(command + [verible_version]),
+    )
+    if force:
+        cache.clear()
+
+    # -- Format the files, in parallel.
+    results = format_files(
+        files,
+        command,
+        jobs=jobs or os.cpu_count() or 1,
+        check=check,
+        cache=cache,
+        on_result=lambda r: _print_result(r, verbose),
+    )
 
-        # -- Construct the formatter command line.
-        command = (
-            "verible-verilog-format --nofailsafe_success --inplace "
-            f' {" ".join(cmd_options)} "{f}"'
-        )
-        if verbose:
-            secho(command)
+    # -- Report errors.
+    failed = [r.file for r in results if r.status == FormatStatus.FAILED]
+    if failed:
+        secho(f"Error: formatting of {', '.join(failed)} failed", fg="red")
+        sys.exit(1)
 
-        # -- Execute the formatter command line.
-        exit_code = os.system(command)
-        if exit_code != 0:
-            secho(f"Error: formatting of '{f}' failed", fg="red")
-            return exit_code
+    needs_format = [
+        r.file for r in results if r.status == FormatStatus.NEEDS_FORMAT
+    ]
+    if needs_format:
+        secho(
+            f"Error: {util.plurality(needs_format, 'file')} "
+            "should be formatted.",
+            fg="red",
+        )
+        sys.exit(1)
 
     # -- All done ok.
-    secho(f"Formatted {util.plurality(files, 'file')}.", fg="green", bold=True)
+    summary = "Checked" if check else "Formatted"
+    secho(f"{summary} {util.plurality(files, 'file')}.", fg="green", bold=True)
     sys.exit(0)
+
+
+def _print_result(result: FormatResult, verbose: bool) -> None:
+    """Prints the result of formatting a single file."""
+    styled_f = click.style(result.file, fg="magenta")
+    if result.status == FormatStatus.FORMATTED:
+        secho(f"Formatted {styled_f}")
+    elif result.status == FormatStatus.NEEDS_FORMAT:
+        secho(f"Needs formatting {styled_f}", fg="yellow")
+    elif result.status == FormatStatus.FAILED:
+        secho(f"Failed {styled_f}", fg="red")
+    elif verbose:
+        secho(f"Unchanged {styled_f} ({result.status.value})")
+    if result.output and (verbose or result.status == FormatStatus.FAILED):
+        secho(result.output, nl=False)
@@ -14,7 +14,6 @@ from apio.managers.scons import SCons
 from apio.utils import cmd_util
 from apio.commands import options
 from apio.apio_context import ApioContext, ApioContextScope
-from apio.utils.util import nameof
 from apio.proto.apio_pb2 import GraphOutputType, GraphParams, Verbosity
 
 
@@ -60,8 +59,13 @@ Examples:
   apio graph --svg         # Generate a svg file.
   apio graph --pdf         # Generate a pdf file.
   apio graph --png         # Generate a png file.
+  apio graph --svg --png   # Generate a svg and a png file.
   apio graph -t my_module  # Graph my_module module.
 
+The graph files are regenerated only if the source files, the top module
+or the output types changed. Multiple output types are rendered in parallel
+from the same graph.
+
 
 [Hint] On Windows, type ‘explorer _build/hardware.svg’ to view the graph,
 and on Mac OS type ‘open _build/hardware.svg’.
@@ -83,7 +87,7 @@ and on Mac OS type ‘open _build/hardware.svg’.
 @options.top_module_option_gen(help="Set the name of the top module to graph.")
 @options.verbose_option
 def cli(
-    cmd_ctx: click.Context,
+    _cmd_ctx: click.Context,
     # Options
     svg: bool,
     png: bool,
@@ -93,8 +97,6 @@ def cli(
     top_module: str,
 ):
     """Implements the apio graph command."""
-    # -- Sanity check the options.
-    cmd_util.check_at_most_one_param(cmd_ctx, nameof(svg, png, pdf))
 
     # -- Create the apio context.
     apio_ctx = ApioContext(
@@ -104,16 +106,19 @@ def cli(
     # -- Create the scons manager.
     scons = SCons(apio_ctx)
 
-    # -- Determine the output type.
-    if pdf:
-        output_type = GraphOutputType.PDF
-    elif png:
-        output_type = GraphOutputType.PNG
-    else:
-        output_type = GraphOutputType.SVG
+    # -- Determine the output types. Scons defaults to svg.
+    output_types = [
+        output_type
+        for flag, output_type in [
+            (svg, GraphOutputType.SVG),
+            (png, GraphOutputType.PNG),
+            (pdf, GraphOutputType.PDF),
+        ]
+        if flag
+    ]
 
     # -- Construct the command info.
-    graph_params = GraphParams(output_type=output_type)
+    graph_params = GraphParams(output_types=output_types)
     if top_module:
         graph_params.top_module = top_module
 
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Implementation of 'apio inspect' command"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Optional
+import click
+from click import secho
+from apio.apio_context import ApioContext, ApioContextScope
+from apio.commands import options
+from apio.managers import installer
+from apio.utils import pkg_util, cmd_util
+from apio.utils.waves import (
+    Assertion,
+    AssertionChecker,
+    AssertionFailure,
+    Change,
+    ToggleCounter,
+    WavesError,
+    open_waves,
+)
+
+
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+signal_option = click.option(
+    "signals",  # Var name.
+    "-s",
+    "--signal",
+    type=str,
+    multiple=True,
+    metavar="pattern",
+    help="Select the signals matching the glob pattern.",
+    cls=cmd_util.ApioOption,
+)
+
+start_option = click.option(
+    "start",  # Var name.
+    "--start",
+    type=click.IntRange(min=0),
+    metavar="time",
+    help="Ignore the changes before this time.",
+    cls=cmd_util.ApioOption,
+)
+
+end_option = click.option(
+    "end",  # Var name.
+    "--end",
+    type=click.IntRange(min=0),
+    metavar="time",
+    help="Ignore the changes after this time.",
+    cls=cmd_util.ApioOption,
+)
+
+toggles_option = click.option(
+    "toggles",  # Var name.
+    "--toggles",
+    is_flag=True,
+    help="Print the toggle counts of the signals.",
+    cls=cmd_util.ApioOption,
+)
+
+assert_option = click.option(
+    "assertions",  # Var name.
+    "-a",
+    "--assert",
+    type=str,
+    multiple=True,
+    metavar="assertion",
+    help="Check an assertion, e.g. 'main_tb.err == 0'.",
+    cls=cmd_util.ApioOption,
+)
+
+
+# ---------------------------
+# -- COMMAND
+# ---------------------------
+
+APIO_INSPECT_HELP = """
+The command ‘apio inspect’ reads the waveform file of a testbench, as
+written by ‘apio sim’ or by ‘apio test --waves’, and prints the value
+changes of selected signals, their toggle counts, or checks simple
+assertions on their values. The file is read in a streaming fashion, such
+that large waveform files can be inspected with a small amount of memory.
+
+\b
+Examples:
+  apio inspect --list                # List the signals of the default file.
+  apio inspect main_tb -s '*.led*'   # Print the changes of the led signals.
+  apio inspect -s '*' --toggles      # Print the toggle counts.
+  apio inspect --start 100 --end 500 # Print the changes in a time window.
+  apio inspect -a 'main_tb.err == 0' # Fail if main_tb.err is ever not 0.
+  apio inspect -a 'main_tb.led == 1 @ 500'  # Check the value at time 500.
+
+The waveform file is given by its path or by the name of its testbench, e.g.
+‘main_tb’ for ‘_build/main_tb.vcd’. If not given, the file of the default
+testbench or the single waveform file in ‘_build’ is used. Both .vcd and
+.fst files are supported. Times are in the timescale units of the file.
+
+Assertion values are decimal, 0x hexadecimal or 0b binary numbers, or x or z
+for values with unknown or high impedance bits. Assertions without a time
+should hold at any time the signal has a value.
+
+The waveforms can also be inspected from python scripts using the module
+apio.utils.waves.
+"""
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
+@click.command(
+    name="inspect",
+    short_help="Inspect the signals of a simulation.",
+    help=APIO_INSPECT_HELP,
+)
+@click.pass_context
+@click.argument("waves_file", nargs=1, required=False)
+@signal_option
+@start_option
+@end_option
+@toggles_option
+@assert_option
+@options.list_option_gen(help="List the signals of the waveform file.")
+@options.project_dir_option
+def cli(
+    _: click.Context,
+    # Arguments
+    waves_file: Optional[str],
+    # Options
+    signals: Tuple[str],
+    start: Optional[int],
+    end: Optional[int],
+    toggles: bool,
+    assertions: Tuple[str],
+    list_: bool,
+    project_dir: Path,
+):
+    """Implements the apio inspect command. It reads a waveform file and
+    prints information about its signals.
+    """
+
+    # -- Create the apio context.
+    apio_ctx = ApioContext(
+        scope=ApioContextScope.PROJECT_REQUIRED,
+        project_dir_arg=project_dir,
+    )
+
+    file_path = _get_waves_file(apio_ctx, waves_file)
+
+    # -- Parse the assertions before reading the file.
+    try:
+        parsed_assertions = [Assertion.parse(x) for x in assertions]
+    except WavesError as e:
+        secho(f"Error: {e}", fg="red")
+        sys.exit(1)
+
+    # -- FST files are read using fst2vcd of the oss-cad-suite package.
+    if file_path.suffix == ".fst":
+        installer.install_missing_packages_on_the_fly(apio_ctx)
+        pkg_util.set_env_for_packages(apio_ctx)
+
+    try:
+        with open_waves(file_path) as reader:
+            # -- Handle the --list option.
+            if list_:
+                for signal in reader.select(list(signals)):
+                    secho(f"{signal.name:<50} {signal.width:>4}")
+                sys.exit(0)
+
+            # -- Check that the assertions signals exist.
+            names = {s.name for s in reader.signals}
+            for assertion in parsed_assertions:
+                if assertion.signal not in names:
+                    secho(
+                        f"Error: no signal '{assertion.signal}' in "
+                        f"{file_path}.",
+                        fg="red",
+                    )
+                    sys.exit(1)
+
+            secho(f"Reading {file_path}, timescale {reader.timescale}.")
+            selected = {s.name for s in reader.select(list(signals))}
+
+            # -- The signals of the assertions are read in addition to the
+            # -- selected signals.
+            counts, failures = _scan(
+                reader.changes(
+                    list(signals) + [x.signal for x in parsed_assertions],
+                    start,
+                    end,
+                ),
+                parsed_assertions,
+                print_changes=not toggles and not parsed_assertions,
+            )
+    except (WavesError, OSError) as e:
+        secho(f"Error: {e}", fg="red")
+        sys.exit(1)
+
+    # -- Print the toggle counts of the selected signals.
+    if toggles:
+        for name, count in sorted(counts.items()):
+            if name in selected:
+                secho(f"{name:<50} {count:>10}")
+
+    # -- Print the assertions results.
+    for failure in failures:
+        secho(
+            f"FAILED '{failure.assertion.text}' at {failure.time}, "
+            f"value is {failure.value}.",
+            fg="red",
+        )
+    if parsed_assertions and not failures:
+        secho(f"All {len(parsed_assertions)} assertions passed.", fg="green")
+
+    sys.exit(1 if failures else 0)
+
+
+def _scan(
+    changes: Iterator[Change],
+    assertions: List[Assertion],
+    print_changes: bool,
+) -> Tuple[Dict[str, int], List[AssertionFailure]]:
+    """Prints the changes if requested, counts the toggles and checks the
+    assertions, in a single pass over the changes. Returns the toggle
+    counts and the assertions failures."""
+    counter = ToggleCounter()
+    checker = AssertionChecker(assertions)
+    for change in changes:
+        if print_changes:
+            secho(f"{change.time:>12}  {change.signal.name}  {change.value}")
+        counter.update(change)
+        checker.update(change)
+    return counter.counts, checker.finish()
+
+
+def _get_waves_file(apio_ctx: ApioContext, waves_file: Optional[str]) -> Path:
+    """Returns the path of the waveform file to inspect, given the optional
+    file or testbench name arg. Exits with an error if not found."""
+
+    build_dir = apio_ctx.project_dir / "_build"
+
+    # -- If not specified, use the default testbench or the only file.
+    if not waves_file:
+        waves_file = apio_ctx.project.get("default-testbench", None)
+    if not waves_file:
+        candidates = sorted(build_dir.glob("*.vcd")) + sorted(
+            build_dir.glob("*.fst")
+        )
+        if len(candidates) != 1:
+            secho(
+                "Error: specify the waveform file, found "
+                f"{len(candidates)} in {build_dir}.",
+                fg="red",
+            )
+            sys.exit(1)
+        return candidates[0]
+
+    # -- A path of an existing .vcd or .fst file.
+    path = Path(waves_file)
+    if path.suffix in [".vcd", ".fst"] and path.is_file():
+        return path
+
+    # -- A testbench name, e.g. 'main_tb' or 'main_tb.v'.
+    for suffix in [".vcd", ".fst"]:
+        path = build_dir / (Path(waves_file).stem + suffix)
+        if path.is_file():
+            return path
+
+    secho(f"Error: no waveform file for '{waves_file}'.", fg="red")
+    sys.exit(1)
@@ -66,6 +66,11 @@ The command ‘apio lint’ scans the project’s Verilog code and reports error
 inconsistencies, and style violations. The command uses the Verilator tool,
 which is included in the standard Apio installation.
 
+The top module and each of the testbenches are linted separately, together
+with the files they depend on. Only the ones whose files changed since the
+previous lint are linted again, and the reports of the others are reused,
+such that the output is always complete.
+
 \b
 Examples:
   apio lint
@@ -8,12 +8,39 @@
 """Implementation of 'apio' report' command"""
 
 import sys
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 import click
+from click import secho, style
 from apio.managers.scons import SCons
 from apio.commands import options
+from apio.utils import cmd_util
+from apio.utils.timings import TIMINGS_FILE, RunTiming, load_runs
 from apio.apio_context import ApioContext, ApioContextScope
-from apio.proto.apio_pb2 import Verbosity
+from apio.proto.apio_pb2 import Verbosity, ReportParams
+
+
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+timings_option = click.option(
+    "timings",  # Var name.
+    "--timings",
+    is_flag=True,
+    help="Show the timings of the recent runs instead.",
+    cls=cmd_util.ApioOption,
+)
+
+json_option = click.option(
+    "json_file",  # Var name.
+    "--json",
+    type=click.Path(dir_okay=False, path_type=Path),
+    metavar="file",
+    help="Write the report to a json file instead.",
+    cls=cmd_util.ApioOption,
+)
 
 
 # ---------------------------
@@ -24,10 +51,23 @@ The command ‘apio report’ provides information on the utilization and timing
 of the design. It is useful for analyzing utilization bottlenecks and
 verifying that the design can operate at the desired clock speed.
 
+With the '--timings' option, the command shows instead the wall time, cpu
+time and peak memory of each of the stages of the most recent run of an
+apio command, such as the synth and pnr of 'apio build' or the testbenches
+of 'apio test', and their trend relative to the previous runs. The timings
+of the recent runs of all the commands are recorded in the file
+_build/timings.json.
+
+With the '--json' option, the utilization and the max clock speeds are
+written to the given file in a machine readable json format that is the
+same for all the architectures, e.g. for feeding dashboards.
+
 \b
 Examples:
   apio report
   epio report --verbose
+  apio report --json report.json
+  apio report --timings
 
 """
 
@@ -43,28 +83,114 @@ Examples:
 @click.pass_context
 @options.project_dir_option
 @options.verbose_option
+@timings_option
+@json_option
 def cli(
     _: click.Context,
     # Options
     project_dir: Path,
     verbose: bool,
+    timings: bool,
+    json_file: Optional[Path],
 ):
     """Analyze the design and report timing."""
 
+    # -- Scons runs in the project dir, so we pass it an absolute path.
+    if json_file:
+        json_file = json_file.resolve()
+
     # -- Create the apio context.
     apio_ctx = ApioContext(
         scope=ApioContextScope.PROJECT_REQUIRED,
         project_dir_arg=project_dir,
     )
 
+    # -- The timings are read from the timings file, no need to run scons.
+    if timings:
+        runs = load_runs(apio_ctx.project_dir / TIMINGS_FILE)
+        if not runs:
+            secho("Error: no timings found, run first 'apio build'.", fg="red")
+            sys.exit(1)
+        _print_timings(runs)
+        sys.exit(0)
+
     # -- Create the scons manager.
     scons = SCons(apio_ctx)
 
-    # -- Create the verbosity params.
+    # -- Create the verbosity and report params.
     verbosity = Verbosity(pnr=verbose)
+    report_params = ReportParams(json_file=str(json_file or ""))
 
     # Run scons
-    exit_code = scons.report(verbosity)
+    exit_code = scons.report(report_params, verbosity)
 
     # -- Done!
     sys.exit(exit_code)
+
+
+def _trend(value: float, history: List[float]) -> str:
+    """Returns the styled change of value relative to the average of the
+    history values, or an empty string if there is no history."""
+    if not history or not sum(history):
+        return ""
+    change = 100 * (value / (sum(history) / len(history)) - 1)
+    # -- Changes of a few percents are typically a noise.
+    color = "red" if change > 5 else "green" if change < -5 else None
+    return style(f"{change:>+7.0f}%", fg=color)
+
+
+def _print_timings(runs: List[RunTiming]) -> None:
+    """Prints the stages of the last run and the totals of the previous
+    runs."""
+    last, previous = runs[-1], runs[:-1]
+
+    def run_title(run: RunTiming) -> str:
+        """The time and the targets of a run."""
+        when = datetime.fromtimestamp(run.timestamp)
+        return f"{when:%Y-%m-%d %H:%M:%S}  {' '.join(run.targets)}"
+
+    # -- The stages of the last run.
+    target_len = max(len(x.target) for x in last.stages) + 2
+    secho(f"Last run: {run_title(last)}")
+    secho("")
+    secho(
+        f"{'STAGE':<16}{'TARGET':<{target_len}}{'WALL':>9}{'USER':>9}"
+        f"{'SYS':>9}{'MAX RSS':>11}{'TREND':>9}",
+        fg="cyan",
+        bold=True,
+    )
+    for stage in last.stages:
+        # -- The wall times of the same stage in the previous runs.
+        history = [
+            x.wall_time
+            for run in previous
+            for x in run.stages
+            if (x.stage, x.target) == (stage.stage, stage.target)
+        ]
+        rss = f"{stage.max_rss_kb / 1024:.1f} MB" if stage.max_rss_kb else "-"
+        secho(
+            f"{stage.stage:<16}{stage.target:<{target_len}}"
+            f"{stage.wall_time:>8.2f}s{stage.user_time:>8.2f}s"
+            f"{stage.sys_time:>8.2f}s{rss:>11} "
+            f"{_trend(stage.wall_time, history)}",
+            color=True,
+        )
+
+    # -- The time that is not in any of the stages, e.g. scons startup and
+    # -- dependency scanning. Stages that ran in parallel may overlap.
+    other = last.total_time - sum(x.wall_time for x in last.stages)
+    if other > 0:
+        secho(f"{'other (scons)':<{16 + target_len}}{other:>8.2f}s")
+    total_trend = _trend(last.total_time, [x.total_time for x in previous])
+    secho(
+        f"{'TOTAL':<{16 + target_len}}{last.total_time:>8.2f}s"
+        f"{'':>29} {total_trend}",
+        color=True,
+    )
+
+    # -- The totals of the previous runs, most recent first.
+    if previous:
+        secho("")
+        secho("Previous runs:")
+        for run in reversed(previous):
+            secho(f"  {run_title(run):<40}{run.total_time:>8.2f}s")
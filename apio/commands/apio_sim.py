@@ -14,7 +14,7 @@ from click import secho
 from apio.managers.scons import SCons
 from apio.commands import options
 from apio.apio_context import ApioContext, ApioContextScope
-from apio.proto.apio_pb2 import SimParams
+from apio.proto.apio_pb2 import SimParams, WavesFormat
 
 
 # ---------------------------
@@ -34,10 +34,15 @@ used as the default testbench.
 Example:
   apio sim                        # Simulate the default testbench file.
   apio sim my_module_tb.v         # Simulate the specified testbench file.
+  apio sim --waves fst            # Write the signals in the FST format.
+
+The signals are written by default to a .vcd file. For long simulations,
+'--waves fst' writes instead a .fst file which is much smaller and faster
+to write and to load in GTKWave.
 
 [Important] Avoid using the Verilog $dumpfile() function in your testbenches,
 as this may override the default name and location Apio sets for the
-generated .vcd file.
+generated .vcd or .fst file.
 
 The sim command defines the INTERACTIVE_SIM macro, which can be used in the
 testbench to distinguish between ‘apio test’ and ‘apio sim’. For example,
@@ -61,6 +66,11 @@ don’t need to repeat it each time you run the simulation.
 @click.argument("testbench", nargs=1, required=False)
 @options.force_option_gen(help="Force simulation.")
 @options.project_dir_option
+@options.waves_option_gen(
+    choices=["vcd", "fst"],
+    default="vcd",
+    help="Set the format of the waveform file.",
+)
 def cli(
     _: click.Context,
     # Arguments
@@ -68,6 +78,7 @@ def cli(
     # Options
     force: bool,
     project_dir: Path,
+    waves: str,
 ):
     """Implements the apio sim command. It simulates a single testbench
     file and shows graphically the signal graphs.
@@ -93,7 +104,11 @@ def cli(
             )
 
     # -- Construct the scons sim params.
-    sim_params = SimParams(testbench=testbench, force_sim=force)
+    sim_params = SimParams(
+        testbench=testbench,
+        force_sim=force,
+        waves_format=WavesFormat.Value(f"WAVES_{waves.upper()}"),
+    )
 
     # -- Simulate the project with the given parameters
     exit_code = scons.sim(sim_params)
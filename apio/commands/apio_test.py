@@ -7,13 +7,62 @@
 # -- Licence GPLv2
 """Implementation of 'apio test' command"""
 
+import os
 import sys
 from pathlib import Path
+from typing import List, Optional, Tuple
 import click
+from click import secho
 from apio.managers.scons import SCons
+from apio.managers.watcher import watch_scons
 from apio.commands import options
 from apio.apio_context import ApioContext, ApioContextScope
-from apio.proto.apio_pb2 import ApioTestParams
+from apio.proto.apio_pb2 import ApioTestParams, SimEngine, WavesFormat
+from apio.utils import cmd_util, util
+from apio.utils.util import nameof
+from apio.utils.sweep import points_from_specs, points_from_file
+from apio.utils.shards import parse_shard_spec
+
+
+# ---------------------------
+# -- COMMAND SPECIFIC OPTIONS
+# ---------------------------
+
+sweep_option = click.option(
+    "sweeps",  # Var name.
+    "--sweep",
+    multiple=True,
+    metavar="spec",
+    help="Run the testbenches over a plusarg sweep, e.g. SEED=1..100.",
+    cls=cmd_util.ApioOption,
+)
+
+sweep_file_option = click.option(
+    "sweep_file",  # Var name.
+    "--sweep-file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    metavar="file",
+    help="Run the testbenches over the sweep points in a file.",
+    cls=cmd_util.ApioOption,
+)
+
+shard_option = click.option(
+    "shard",  # Var name.
+    "--shard",
+    type=str,
+    metavar="K/N",
+    help="Run only the K-th of N shards of the testbenches.",
+    cls=cmd_util.ApioOption,
+)
+
+shard_durations_option = click.option(
+    "shard_durations",  # Var name.
+    "--shard-durations",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    metavar="file",
+    help="Balance the shards by the durations in a json report.",
+    cls=cmd_util.ApioOption,
+)
 
 
 # ---------------------------
@@ -29,10 +78,73 @@ $fatal directive if an error is detected.
 Examples
   apio test                 # Run all *_tb.v testbenches.
   apio test my_module_tb.v  # Run a single testbench
+  apio test -j 8            # Run up to 8 testbenches in parallel.
+  apio test --force         # Rerun also the unchanged testbenches.
+  apio test --watch         # Rerun the affected testbenches on changes.
+  apio test --waves vcd     # Write also the .vcd files of the testbenches.
+  apio test --sweep SEED=1..100            # Run with +SEED=1 to +SEED=100.
+  apio test --sweep SEED=1..8 --sweep MODE=fast,slow   # 16 points.
+  apio test --sweep-file points.txt        # A point per line.
+  apio test --shard 2/4                    # Run the 2nd of 4 shards.
+
+Testbenches whose source files did not change since their previous run are
+not rerun and their previous results are reported as cached.
+
+With '--watch', the command keeps running and each time a source file is
+saved, it reruns only the testbenches that depend on the changed files,
+directly or via the module hierarchy, and updates the results summary in
+place. Press Ctrl-C to exit.
+
+With '--sweep' or '--sweep-file', each testbench is compiled once and then
+simulated at each of the sweep points with the plusargs of the point, which
+the testbench reads with $value$plusargs(). The runs are done in parallel,
+by default one per CPU core, without writing waveform files, and a table
+with the pass/fail status of each testbench at each point is printed at the
+end. The output of failed runs is printed. Multiple '--sweep' options are
+combined into all their combinations, and a sweep file has one point per
+line, with space separated NAME=VALUE plusargs.
+
+The testbenches are simulated with Icarus Verilog by default. For long
+running testbenches, the apio.ini option 'sim-engine = verilator' selects
+Verilator, which compiles each testbench into a much faster executable but
+requires a C++ compiler and doesn't write waveform files. The generated
+C++ files are kept in the _build directory, such that only the changed
+files are recompiled, and ccache is used if installed. The 'apio sim'
+command always uses Icarus Verilog.
+
+The default number of parallel jobs can be set with the apio.ini option
+'test-jobs'. The output of each testbench is printed as a single block
+and a summary of the results is printed at the end.
+
+For CI systems, the results of all the testbenches, including the cached
+ones, are also written to _build/test-results.xml in the JUnit XML format,
+and to _build/test-results.json with the compile time, simulation time,
+exit code and captured output of each testbench. If a testbench fails to
+compile, it's reported as failed and the testbenches that were not run are
+reported as skipped.
+
+With '--shard K/N', only the K-th of N disjoint shards of the testbenches
+is run, such that a large test suite can be split across N CI machines.
+The split is deterministic and depends only on the testbench names, which
+are dealt to the shards round robin. With '--shard-durations', the shards
+are instead balanced by the durations of the testbenches in a json report
+of a previous full run, such that they take a near equal wall time. All
+the machines should use the same report.
+
+A testbench that runs longer than the apio.ini option 'test-timeout', e.g.
+'10m', or that reaches the simulated time of the option 'test-max-sim-time',
+e.g. '2ms', is stopped and reported as a TIMEOUT failure, while the other
+testbenches keep running. Both options accept per testbench overrides, e.g.
+'test-timeout = 10m slow_tb=1h'. The simulated time limit is not supported
+with Verilator, and requires the testbenches to end with $finish.
+
+By default, the testbenches don't write waveform files, which saves their
+write time and disk space. '--waves vcd' or '--waves fst' writes them, e.g.
+to debug a failing testbench.
 
 [Important] Avoid using the Verilog $dumpfile() function in your testbenches,
 as this may override the default name and location Apio sets for the
-generated .vcd file.
+generated .vcd or .fst file.
 
 For a sample testbench compatible with Apio features, see:
 https://github.com/FPGAwars/apio-examples/tree/master/upduino31/testbench
@@ -49,29 +161,221 @@ refer to the ‘apio sim’ command.
 )
 @click.pass_context
 @click.argument("testbench_file", nargs=1, required=False)
+@options.jobs_option_gen(help="Run up to n testbenches in parallel.")
+@options.force_option_gen(help="Rerun also the unchanged testbenches.")
 @options.project_dir_option
+@options.watch_option_gen(help="Rerun the affected testbenches on changes.")
+@sweep_option
+@sweep_file_option
+@shard_option
+@shard_durations_option
+@options.waves_option_gen(
+    choices=["vcd", "fst", "none"],
+    default="none",
+    help="Set the format of the waveform files.",
+)
 # @options.testbench
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
 def cli(
-    _: click.Context,
+    cmd_ctx: click.Context,
     # Arguments
     testbench_file: str,
     # Options
+    jobs: Optional[int],
+    force: bool,
     project_dir: Path,
+    watch: bool,
+    sweeps: Tuple[str],
+    sweep_file: Optional[Path],
+    shard: Optional[str],
+    shard_durations: Optional[Path],
+    waves: str,
 ):
     """Implements the test command."""
 
+    # -- Sanity check the options.
+    cmd_util.check_at_most_one_param(cmd_ctx, nameof(sweeps, sweep_file))
+
     # -- Create the apio context.
     apio_ctx = ApioContext(
         scope=ApioContextScope.PROJECT_REQUIRED, project_dir_arg=project_dir
     )
 
-    # -- Create the scons manager.
-    scons = SCons(apio_ctx)
+    # -- Determine the sweep points, if any.
+    sweep_points = _get_sweep_points(list(sweeps), sweep_file)
 
     # -- Construct the test params
     test_params = ApioTestParams(
-        testbench=testbench_file if testbench_file else None
+        testbench=testbench_file if testbench_file else None,
+        jobs=jobs or _get_default_jobs(apio_ctx, bool(sweep_points)),
+        force_test=force,
+        sweep_points=sweep_points,
+        sim_engine=_get_sim_engine(apio_ctx),
+        waves_format=WavesFormat.Value(f"WAVES_{waves.upper()}"),
     )
+    _check_waves_format(test_params)
+    _set_shard(test_params, shard, shard_durations)
+    _set_test_limits(apio_ctx, test_params)
+
+    # -- Test on each change, until Ctrl-C.
+    if watch:
+
+        def run_tests(scons: SCons) -> None:
+            """Runs the testbenches. Scons reruns only the testbenches whose
+            dependencies changed."""
+            if jobs is None:
+                test_params.jobs = _get_default_jobs(
+                    scons.apio_ctx, bool(sweep_points)
+                )
+            test_params.sim_engine = _get_sim_engine(scons.apio_ctx)
+            _check_waves_format(test_params)
+            _set_test_limits(scons.apio_ctx, test_params)
+            scons.test(test_params)
+            # -- --force applies only to the first run.
+            test_params.force_test = False
+
+        watch_scons(apio_ctx, run_tests, clear_screen=True)
+        sys.exit(0)
+
+    # -- Create the scons manager.
+    scons = SCons(apio_ctx)
 
     exit_code = scons.test(test_params)
     sys.exit(exit_code)
+
+
+def _get_sweep_points(
+    sweeps: List[str], sweep_file: Optional[Path]
+) -> List[str]:
+    """Returns the sweep points of the --sweep or --sweep-file options, or
+    an empty list if none. Exits on an invalid sweep."""
+    try:
+        if sweep_file:
+            return points_from_file(sweep_file)
+        return points_from_specs(sweeps) if sweeps else []
+    except ValueError as e:
+        secho(f"Error: {e}", fg="red")
+        sys.exit(1)
+
+
+def _get_default_jobs(apio_ctx: ApioContext, sweep: bool) -> int:
+    """Returns the number of parallel jobs from the apio.ini option
+    'test-jobs'. If not specified, the default is 1, or the number of CPU
+    cores for a sweep. Exits on an invalid value."""
+    value = apio_ctx.project.get("test-jobs", None)
+    if value is None:
+        return (os.cpu_count() or 1) if sweep else 1
+    if not value.isdigit() or int(value) < 1:
+        secho(
+            f"Error: invalid 'test-jobs' value [{value}] in apio.ini, "
+            "expecting a positive integer.",
+            fg="red",
+        )
+        sys.exit(1)
+    return int(value)
+
+
+def _get_sim_engine(apio_ctx: ApioContext) -> SimEngine:
+    """Returns the simulator from the apio.ini option 'sim-engine', or
+    iverilog if not specified. Exits on an invalid value."""
+    engines = {
+        "iverilog": SimEngine.IVERILOG,
+        "verilator": SimEngine.VERILATOR,
+    }
+    value = apio_ctx.project.get("sim-engine", "iverilog")
+    if value not in engines:
+        secho(
+            f"Error: invalid 'sim-engine' value [{value}] in apio.ini, "
+            f"expecting one of {', '.join(engines)}.",
+            fg="red",
+        )
+        sys.exit(1)
+    return engines[value]
+
+
+def _set_shard(
+    test_params: ApioTestParams,
+    shard: Optional[str],
+    shard_durations: Optional[Path],
+) -> None:
+    """Sets the shard fields of the test params from the --shard and
+    --shard-durations options. Exits on an invalid shard spec."""
+    if not shard:
+        if shard_durations:
+            secho("Error: '--shard-durations' requires '--shard'.", fg="red")
+            sys.exit(1)
+        return
+    try:
+        index, count = parse_shard_spec(shard)
+    except ValueError as e:
+        secho(f"Error: {e}", fg="red")
+        sys.exit(1)
+    test_params.shard_index = index
+    test_params.shard_count = count
+    if shard_durations:
+        # -- Scons runs in the project dir.
+        test_params.shard_durations_file = str(shard_durations.resolve())
+
+
+def _set_test_limits(
+    apio_ctx: ApioContext, test_params: ApioTestParams
+) -> None:
+    """Sets the limits of the test params from the apio.ini options
+    'test-timeout' and 'test-max-sim-time'. Each option has a default value
+    and/or per testbench NAME=VALUE overrides, separated by white space or
+    new lines, e.g. '10m slow_tb=1h'. Exits on an invalid value."""
+    test_params.ClearField("limits")
+    test_params.ClearField("testbench_limits")
+    for option, field, parser, example in [
+        ("test-timeout", "timeout", util.parse_duration, "'90s' or '10m'"),
+        (
+            "test-max-sim-time",
+            "max_sim_time",
+            util.parse_sim_time,
+            "'500us' or '2ms'",
+        ),
+    ]:
+        for line in apio_ctx.project.get_as_lines_list(option, default=[]):
+            for token in line.split():
+                name, sep, value = token.rpartition("=")
+                try:
+                    parsed = parser(value)
+                except ValueError:
+                    secho(
+                        f"Error: invalid '{option}' value [{token}] in "
+                        f"apio.ini, expecting a value such as {example}, "
+                        "optionally prefixed by TESTBENCH=.",
+                        fg="red",
+                    )
+                    sys.exit(1)
+                if sep:
+                    limits = test_params.testbench_limits[name]
+                else:
+                    limits = test_params.limits
+                setattr(limits, field, parsed)
+
+    if test_params.sim_engine == SimEngine.VERILATOR and (
+        test_params.limits.max_sim_time
+        or any(x.max_sim_time for x in test_params.testbench_limits.values())
+    ):
+        secho(
+            "Warning: 'test-max-sim-time' is not supported with "
+            "'sim-engine = verilator' and is ignored.",
+            fg="yellow",
+        )
+
+
+def _check_waves_format(test_params: ApioTestParams) -> None:
+    """Exits with an error if waveform files were requested with the
+    verilator engine, which doesn't write them."""
+    if (
+        test_params.sim_engine == SimEngine.VERILATOR
+        and test_params.waves_format != WavesFormat.WAVES_NONE
+    ):
+        secho(
+            "Error: '--waves' is not supported with 'sim-engine = verilator'.",
+            fg="red",
+        )
+        sys.exit(1)
@@ -11,6 +11,7 @@ import sys
 from pathlib import Path
 import click
 from apio.managers.scons import SCons
+from apio.managers.watcher import watch_scons
 from apio.managers.drivers import Drivers
 from apio.utils import cmd_util
 from apio.commands import options
@@ -66,9 +67,13 @@ APIO_UPLOAD_HELP = """
 The command ‘apio upload’ builds the bitstream file (similar to the apio build
 command) and uploads it to the FPGA board.
 
+With '--watch', the command rebuilds and uploads the design each time a source
+file, a constraint file or apio.ini is saved, until Ctrl-C is pressed.
+
 \b
 Examples:
   apio upload
+  apio upload --watch
 """
 
 
@@ -86,6 +91,7 @@ Examples:
 @sram_option
 @flash_option
 @options.project_dir_option
+@options.watch_option_gen(help="Rebuild and upload on each file change.")
 def cli(
     _: click.Context,
     # Options
@@ -94,6 +100,7 @@ def cli(
     sram: bool,
     flash: bool,
     project_dir: Path,
+    watch: bool,
 ):
     """Implements the upload command."""
 
@@ -102,6 +109,47 @@ def cli(
         scope=ApioContextScope.PROJECT_REQUIRED, project_dir_arg=project_dir
     )
 
+    # -- Rebuild and upload on each change, until Ctrl-C.
+    if watch:
+        watch_scons(
+            apio_ctx,
+            lambda scons: _upload(
+                scons,
+                serial_port=serial_port,
+                ftdi_id=ftdi_id,
+                sram=sram,
+                flash=flash,
+            ),
+        )
+        sys.exit(0)
+
+    # -- Create the scons manager.
+    scons = SCons(apio_ctx)
+
+    # -- Build and upload.
+    exit_code = _upload(
+        scons,
+        serial_port=serial_port,
+        ftdi_id=ftdi_id,
+        sram=sram,
+        flash=flash,
+    )
+
+    # -- Done!
+    sys.exit(exit_code)
+
+
+def _upload(
+    scons: SCons,
+    *,
+    serial_port: str,
+    ftdi_id: str,
+    sram: bool,
+    flash: bool,
+) -> int:
+    """Builds and uploads the design. Returns the exit code."""
+    apio_ctx = scons.apio_ctx
+
     # -- Create the drivers manager.
     drivers = Drivers(apio_ctx)
 
@@ -109,9 +157,6 @@ def cli(
     # -- Operation to do before uploading a design in MAC
     drivers.pre_upload()
 
-    # -- Create the scons manager
-    scons = SCons(apio_ctx)
-
     # -- Get the programmer command.
     programmer_cmd = construct_programmer_cmd(
         apio_ctx,
@@ -131,8 +176,7 @@ def cli(
     # -- Operation to do after uploading a design in MAC
     drivers.post_upload()
 
-    # -- Done!
-    sys.exit(exit_code)
+    return exit_code
 
 
 # Advanced notes: https://github.com/FPGAwars/apio/wiki/Commands#apio-upload
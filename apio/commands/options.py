@@ -8,6 +8,7 @@
 """Common apio command options"""
 
 from pathlib import Path
+from typing import List
 import click
 from apio.utils import cmd_util
 
@@ -72,6 +73,46 @@ def top_module_option_gen(
     )
 
 
+# W0622: Redefining built-in 'help'
+# pylint: disable=W0622
+def jobs_option_gen(*, help: str):
+    """Generate a --jobs option with given help text."""
+    return click.option(
+        "jobs",  # Var name.
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        metavar="n",
+        help=help,
+        cls=cmd_util.ApioOption,
+    )
+
+
+def watch_option_gen(*, help: str):
+    """Generate a --watch option with given help text."""
+    return click.option(
+        "watch",  # Var name.
+        "--watch",
+        is_flag=True,
+        help=help,
+        cls=cmd_util.ApioOption,
+    )
+
+
+def waves_option_gen(*, choices: List[str], default: str, help: str):
+    """Generate a --waves option, with the format of the simulation
+    waveforms file, and the given choices, default and help text."""
+    return click.option(
+        "waves",  # Var name.
+        "--waves",
+        type=click.Choice(choices, case_sensitive=False),
+        default=default,
+        show_default=True,
+        help=help,
+        cls=cmd_util.ApioOption,
+    )
+
+
 def dst_option_gen(*, help: str):
     """Generate a --dst option with given help text."""
     dst_option = click.option(
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Run an apio command in multiple projects"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import importlib
+import traceback
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional
+import click
+from apio.managers.project import APIO_INI
+from apio.utils import env_options
+
+# -- The apio commands that can be run in batch mode.
+BATCH_COMMANDS = ["build", "test", "lint"]
+
+# -- Directories that are not searched for projects.
+_SKIPPED_DIRS = ["_build", "__pycache__", "node_modules"]
+
+
+@dataclass
+class ProjectResult:
+    """The result of running a command in a single project."""
+
+    project: str  # The project dir, relative to the batch root.
+    exit_code: int  # The exit code of the apio command.
+    duration: float  # The run time of the command, in seconds.
+    output: str  # The stdout and stderr of the command.
+
+    @property
+    def passed(self) -> bool:
+        """Returns True if the command succeeded."""
+        return self.exit_code == 0
+
+
+def find_projects(root: Path) -> List[Path]:
+    """Returns the directories under root, inclusive, that contain an
+    apio.ini file, sorted. Hidden directories and build directories are not
+    searched."""
+    result = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        # -- Prune the search, in place.
+        dir_names[:] = [
+            d
+            for d in dir_names
+            if not d.startswith(".") and d not in _SKIPPED_DIRS
+        ]
+        if APIO_INI in file_names:
+            result.append(Path(dir_path))
+    return sorted(result)
+
+
+def _init_worker() -> None:
+    """Initializes a worker process of the pool. The workers run the apio
+    commands and scons within their process, such that the python modules
+    and the apio resources are loaded once per worker rather than once per
+    project."""
+    os.environ[env_options.APIO_SCONS_IN_PROCESS] = "true"
+    _apio_cli()
+
+
+def _apio_cli() -> click.Group:
+    """Returns the top level apio click command. It's imported at run time
+    since the apio commands import this module."""
+    return importlib.import_module("apio.commands.apio").cli
+
+
+def _invoke_apio(args: List[str]) -> int:
+    """Invokes the apio command line with the given args, within this
+    process. Returns the exit code."""
+
+    try:
+        _apio_cli().main(args=args, prog_name="apio", standalone_mode=False)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code)
+        return 1
+    except click.exceptions.Abort:
+        return 1
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except Exception:  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+        return 1
+
+
+def _run_project(command: str, project_dir: str, root: str) -> ProjectResult:
+    """Runs an apio command in the given project, in a worker process, and
+    captures its output. The output is captured at the file descriptor
+    level, to include also the output of the tools that scons runs."""
+
+    start_time = time.time()
+    cwd = os.getcwd()
+    saved_streams = (sys.stdout, sys.stderr)
+    with (
+        tempfile.TemporaryFile() as f,
+        open(
+            f.fileno(), "w", buffering=1, encoding="utf8", closefd=False
+        ) as stream,
+    ):
+        # -- Redirect stdout and stderr to the temp file, at the python and
+        # -- the file descriptor levels.
+        for s in saved_streams:
+            s.flush()
+        saved_fds = [os.dup(1), os.dup(2)]
+        os.dup2(f.fileno(), 1)
+        os.dup2(f.fileno(), 2)
+        sys.stdout = sys.stderr = stream
+        try:
+            exit_code = _invoke_apio([command, "-p", project_dir])
+        finally:
+            # -- Restore stdout, stderr and the current directory.
+            stream.flush()
+            sys.stdout, sys.stderr = saved_streams
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+            os.chdir(cwd)
+
+        f.seek(0)
+        output = f.read().decode("utf8", errors="replace")
+
+    return ProjectResult(
+        project=os.path.relpath(project_dir, root),
+        exit_code=exit_code,
+        duration=time.time() - start_time,
+        output=output,
+    )
+
+
+def run_projects(
+    command: str,
+    projects: List[Path],
+    root: Path,
+    jobs: int,
+    on_result: Optional[Callable[[ProjectResult], None]] = None,
+) -> List[ProjectResult]:
+    """Runs an apio command in each of the given projects, up to 'jobs' at
+    a time, and returns the results in the order of projects. 'on_result'
+    is called with each result as it completes. The caller should install
+    any missing apio packages before calling this function, since the
+    projects are run concurrently."""
+
+    assert command in BATCH_COMMANDS, command
+
+    results = {}
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker
+    ) as executor:
+        futures = {
+            executor.submit(_run_project, command, str(p), str(root)): p
+            for p in projects
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if on_result:
+                on_result(result)
+
+    return [results[p] for p in projects]
+
+
+def write_results_file(
+    file_path: Path,
+    command: str,
+    results: List[ProjectResult],
+    duration: float,
+) -> None:
+    """Writes the results of a batch run in a json file."""
+    data = {
+        "command": command,
+        "duration": duration,
+        "passed": sum(1 for r in results if r.passed),
+        "failed": sum(1 for r in results if not r.passed),
+        "projects": [dict(asdict(r), passed=r.passed) for r in results],
+    }
+    with open(file_path, "w", encoding="utf8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
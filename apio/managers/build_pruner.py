@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Size and age based pruning of the files in the _build directory, for the
+apio.ini option 'build-dir-max-size' and for 'apio clean --waves-only' and
+'apio clean --older-than'."""
+
+import os
+import time
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Optional
+
+# -- The build directory, relative to the project dir.
+BUILD_DIR = Path("_build")
+
+# -- The suffixes of the waveform files, which are evicted first.
+WAVES_SUFFIXES = [".vcd", ".fst"]
+
+# -- Files that are smaller than this are not evicted by the size quota,
+# -- they don't affect it much and some of them are needed by scons to
+# -- avoid unnecessary rebuilds.
+MIN_EVICT_SIZE = 64 * 1024
+
+# -- Bookkeeping files that are never evicted by the size quota or by a
+# -- partial 'apio clean'. They are deleted only by a full 'apio clean'.
+# -- See also _keep_file_names().
+KEEP_FILE_NAMES = ["scons.params", "timings.json", "test-results.json"]
+
+
+@dataclass
+class PruneResult:
+    """The files that were deleted by a pruning operation."""
+
+    files: int = 0  # The number of deleted files.
+    size: int = 0  # Their total size in bytes.
+
+
+@dataclass
+class _FileEntry:
+    """A file in the build directory."""
+
+    path: Path
+    size: int
+    last_used: float  # The last access or modification time.
+
+    @property
+    def is_waves(self) -> bool:
+        """True if the file is a waveform file."""
+        return self.path.suffix in WAVES_SUFFIXES
+
+
+def _keep_file_names() -> List[str]:
+    """Returns KEEP_FILE_NAMES plus the names of the file info caches, whose
+    loss forces a rescan of all the source files."""
+    # -- Imported here to avoid loading scons when it's not needed.
+    # pylint: disable=import-outside-toplevel
+    from apio.managers.formatter import FORMAT_CACHE_FILE
+    from apio.scons.plugin_util import SCANNER_CACHE_FILE
+    from apio.scons.verilog_index import INDEX_CACHE_FILE
+
+    cache_files = [FORMAT_CACHE_FILE, SCANNER_CACHE_FILE, INDEX_CACHE_FILE]
+    return KEEP_FILE_NAMES + [Path(x).name for x in cache_files]
+
+
+def _scan(build_dir: Path) -> List[_FileEntry]:
+    """Returns the files in the build directory and its subdirectories."""
+    entries = []
+    for root, _, files in os.walk(build_dir):
+        for file in files:
+            path = Path(root) / file
+            try:
+                stat = path.stat()
+            except OSError:
+                # -- Deleted by a concurrent process.
+                continue
+            entries.append(
+                _FileEntry(
+                    path, stat.st_size, max(stat.st_atime, stat.st_mtime)
+                )
+            )
+    return entries
+
+
+def _delete(entries: List[_FileEntry]) -> PruneResult:
+    """Deletes the given files and returns the result."""
+    result = PruneResult()
+    for entry in entries:
+        try:
+            entry.path.unlink()
+        except OSError:
+            continue
+        result.files += 1
+        result.size += entry.size
+    return result
+
+
+def prune_build_dir(build_dir: Path, max_size: int) -> PruneResult:
+    """Deletes large files from the build directory until its total size is
+    at most max_size bytes. Waveform files are deleted first, and then the
+    other large artifacts, least recently used first. Scons rebuilds a
+    deleted artifact when it's needed again."""
+
+    entries = _scan(build_dir)
+    total_size = sum(x.size for x in entries)
+    if total_size <= max_size:
+        return PruneResult()
+
+    # -- The candidates, in eviction order.
+    keep_names = _keep_file_names()
+    candidates = sorted(
+        (
+            x
+            for x in entries
+            if x.size >= MIN_EVICT_SIZE and x.path.name not in keep_names
+        ),
+        key=lambda x: (not x.is_waves, x.last_used),
+    )
+
+    evicted = []
+    for entry in candidates:
+        if total_size <= max_size:
+            break
+        evicted.append(entry)
+        total_size -= entry.size
+
+    return _delete(evicted)
+
+
+def clean_build_dir(
+    build_dir: Path,
+    *,
+    waves_only: bool,
+    older_than: Optional[float],
+) -> PruneResult:
+    """Deletes from the build directory the waveform files if 'waves_only'
+    is True, or else all the files, which were not used in the last
+    'older_than' seconds if not None. The bookkeeping and cache files are
+    kept. Empty subdirectories are removed."""
+
+    now = time.time()
+    keep_names = _keep_file_names()
+    selected = [
+        x
+        for x in _scan(build_dir)
+        if x.path.name not in keep_names
+        and (not waves_only or x.is_waves)
+        and (older_than is None or now - x.last_used > older_than)
+    ]
+    result = _delete(selected)
+
+    # -- Remove empty subdirectories, deepest first.
+    for root, dirs, _ in os.walk(build_dir, topdown=False):
+        for name in dirs:
+            try:
+                (Path(root) / name).rmdir()
+            except OSError:
+                pass
+
+    return result
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Formatting of verilog files for the 'apio format' command"""
+
+import os
+import json
+import hashlib
+import subprocess
+from enum import Enum
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# -- The format cache file, relative to the project dir.
+FORMAT_CACHE_FILE = Path("_build") / "format_cache.json"
+
+# -- Change when the format of the cache file changes, to invalidate old
+# -- cache files.
+FORMAT_CACHE_VERSION = 1
+
+
+class FormatStatus(Enum):
+    """The outcome of formatting a single file."""
+
+    UNCHANGED = "unchanged"  # The file was already formatted.
+    CACHED = "cached"  # Skipped, the file didn't change since formatted.
+    FORMATTED = "formatted"  # The file was rewritten.
+    NEEDS_FORMAT = "needs-format"  # Check mode, the file is not formatted.
+    FAILED = "failed"  # The formatter failed.
+
+
+@dataclass
+class FormatResult:
+    """The result of formatting a single file."""
+
+    file: str  # The file name, as given by the user.
+    status: FormatStatus
+    output: str = ""  # The stderr of the formatter, if any.
+
+
+class FormatCache:
+    """Remembers the content hash of each file after it was formatted or
+    found to be formatted, such that the formatter is not run again on a
+    file that didn't change since. The entries are valid only for the
+    formatter command they were created with, which includes the formatter
+    options."""
+
+    def __init__(self, cache_file: Path, command_key: str):
+        self.cache_file = cache_file
+        self.command_key = command_key
+        self._entries: Dict[str, str] = {}
+        # -- We ignore a missing, corrupted or incompatible cache file.
+        try:
+            with open(cache_file, "r", encoding="utf8") as f:
+                data = json.load(f)
+            if (
+                data.get("version") == FORMAT_CACHE_VERSION
+                and data.get("command_key") == command_key
+            ):
+                self._entries = data["entries"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entries = {}
+
+    def clear(self) -> None:
+        """Forgets all the formatted files."""
+        self._entries.clear()
+
+    def is_formatted(self, file: str, digest: str) -> bool:
+        """Returns True if the file with the given content hash is known to
+        be formatted."""
+        return self._entries.get(file) == digest
+
+    def set_formatted(self, file: str, digest: str) -> None:
+        """Records that the file with the given content hash is formatted."""
+        self._entries[file] = digest
+
+    def save(self) -> None:
+        """Writes the cache file. The build directory is created if needed.
+        Entries of files that don't exist anymore are dropped."""
+        entries = {
+            name: digest
+            for name, digest in sorted(self._entries.items())
+            if os.path.isfile(name)
+        }
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, "w", encoding="utf8") as f:
+            json.dump(
+                {
+                    "version": FORMAT_CACHE_VERSION,
+                    "command_key": self.command_key,
+                    "entries": entries,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+
+def _digest(content: bytes) -> str:
+    """Returns the content hash of a file."""
+    return hashlib.md5(content).hexdigest()
+
+
+def format_file(
+    file: str,
+    command: List[str],
+    check: bool,
+    cache: Optional[FormatCache],
+) -> FormatResult:
+    """Formats a single file. The formatter 'command' is invoked directly,
+    without a shell, with the file name as its last arg and should write
+    the formatted text to stdout. The file is rewritten only if its text
+    changed. In 'check' mode the file is never rewritten."""
+
+    content = Path(file).read_bytes()
+    digest = _digest(content)
+    if cache and cache.is_formatted(file, digest):
+        return FormatResult(file, FormatStatus.CACHED)
+
+    proc = subprocess.run(command + [file], capture_output=True, check=False)
+    stderr = proc.stderr.decode("utf8", errors="replace")
+    if proc.returncode != 0:
+        return FormatResult(file, FormatStatus.FAILED, stderr)
+
+    formatted = proc.stdout
+    if formatted == content:
+        status = FormatStatus.UNCHANGED
+    elif check:
+        return FormatResult(file, FormatStatus.NEEDS_FORMAT, stderr)
+    else:
+        Path(file).write_bytes(formatted)
+        status = FormatStatus.FORMATTED
+
+    if cache:
+        cache.set_formatted(file, _digest(formatted))
+    return FormatResult(file, status, stderr)
+
+
+# pylint: disable=too-many-arguments
+def format_files(
+    files: List[str],
+    command: List[str],
+    *,
+    jobs: int,
+    check: bool,
+    cache: Optional[FormatCache],
+    on_result: Callable[[FormatResult], None],
+) -> List[FormatResult]:
+    """Formats the given files, up to 'jobs' files in parallel, and returns
+    their results in the order of 'files'. 'on_result' is called with each
+    result, also in the order of 'files', such that the output is the same
+    with any number of jobs. The cache, if given, is saved at the end."""
+
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for result in executor.map(
+            lambda f: format_file(f, command, check, cache), files
+        ):
+            on_result(result)
+            results.append(result)
+
+    if cache:
+        cache.save()
+    return results
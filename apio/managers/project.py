@@ -44,6 +44,23 @@ OPTIONAL_OPTIONS = {
     "format-verible-options",
     # -- Additional option for the yosys synth command (inside the -p arg).
     "yosys-synth-extra-options",
+    # -- Default number of testbenches that 'apio test' runs in parallel.
+    "test-jobs",
+    # -- The simulator of 'apio test', 'iverilog' (default) or 'verilator'.
+    "sim-engine",
+    # -- Wall clock timeout of each testbench of 'apio test', e.g. '10m',
+    # -- optionally followed by per testbench overrides, e.g. 'slow_tb=1h'.
+    "test-timeout",
+    # -- Simulated time limit of each testbench of 'apio test', e.g. '2ms',
+    # -- optionally followed by per testbench overrides, e.g. 'slow_tb=1s'.
+    "test-max-sim-time",
+    # -- Max size of the shared build artifacts cache, e.g. '2G'. If not
+    # -- specified, the cache is disabled.
+    "artifact-cache-max-size",
+    # -- Max size of the project's _build directory, e.g. '500M'. If
+    # -- exceeded, large artifacts are deleted after each command, waveform
+    # -- files first.
+    "build-dir-max-size",
 }
 
 # -- Set of all options a project may have.
@@ -16,14 +16,16 @@ import time
 from pathlib import Path
 import shutil
 from functools import wraps
+from typing import List, Optional, Tuple
 from datetime import datetime
 import click
 from click import secho
 from google.protobuf import text_format
-from apio.utils import util, pkg_util
+from apio.utils import util, pkg_util, env_options
 from apio.apio_context import ApioContext
 from apio.managers.scons_filter import SconsFilter
 from apio.managers import installer
+from apio.managers.build_pruner import prune_build_dir
 from apio.profile import Profile
 from apio.proto.apio_pb2 import (
     Verbosity,
@@ -41,6 +43,10 @@ from apio.proto.apio_pb2 import (
     SimParams,
     ApioTestParams,
     UploadParams,
+    BuildParams,
+    ReportParams,
+    BoardTarget,
+    ArtifactCacheParams,
 )
 
 # -- Constant for the dictionary PROG, which contains
@@ -50,6 +56,10 @@ FTDI_ID = "ftdi_id"
 SRAM = "sram"
 FLASH = "flash"
 
+# -- The directory of the shared build artifacts cache, relative to the
+# -- apio home dir.
+ARTIFACT_CACHE_DIR = Path("cache") / "artifacts"
+
 
 # W0703: Catching too general exception Exception (broad-except)
 # pylint: disable=W0703
@@ -89,6 +99,10 @@ class SCons:
         # -- Cache the apio context.
         self.apio_ctx = apio_ctx
 
+        # -- True once the apio packages were checked. Relevant when the
+        # -- manager is used for multiple runs, e.g. with --watch.
+        self._packages_checked = False
+
         # -- Change to the project's folder.
         os.chdir(apio_ctx.project_dir)
 
@@ -168,12 +182,28 @@ class SCons:
         )
 
     @on_exception(exit_code=1)
-    def build(self, verbosity: Verbosity) -> int:
-        """Runs a scons subprocess with the 'build' target. Returns process
-        exit code, 0 if ok."""
+    def build(
+        self,
+        build_params: BuildParams,
+        verbosity: Verbosity,
+        boards: Optional[List[str]] = None,
+    ) -> int:
+        """Runs a scons subprocess with the 'build' target. If 'boards' is
+        specified, the project is built for each of these boards rather than
+        for the project's board. Returns process exit code, 0 if ok."""
 
         # -- Construct the scons params object.
-        scons_params = self.construct_scons_params(verbosity=verbosity)
+        scons_params = self.construct_scons_params(
+            target_params=TargetParams(build=build_params),
+            verbosity=verbosity,
+        )
+
+        # -- Add the arch and fpga info of the boards, if any.
+        for board in boards or []:
+            arch, fpga_info = self._construct_fpga_info(board)
+            scons_params.target.build.boards.append(
+                BoardTarget(board_id=board, arch=arch, fpga_info=fpga_info)
+            )
 
         # -- Run the scons process.
         return self._run(
@@ -183,12 +213,15 @@ class SCons:
         )
 
     @on_exception(exit_code=1)
-    def report(self, verbosity: Verbosity) -> int:
+    def report(self, report_params: ReportParams, verbosity: Verbosity) -> int:
         """Runs a scons subprocess with the 'report' target. Returns process
         exit code, 0 if ok."""
 
         # -- Construct the scons params object.
-        scons_params = self.construct_scons_params(verbosity=verbosity)
+        scons_params = self.construct_scons_params(
+            target_params=TargetParams(report=report_params),
+            verbosity=verbosity,
+        )
 
         # -- Run the scons process.
         return self._run(
@@ -244,9 +277,65 @@ class SCons:
         # -- the project, but we sanity check it again just in case.
         board = project["board"]
         assert board is not None, "Scons got a None board."
+
+        # -- Populate the arch and fpga info of the board.
+        result.arch, fpga_info = self._construct_fpga_info(board)
+        result.fpga_info.MergeFrom(fpga_info)
+
+        # -- Populate the optional Verbosity params.
+        if verbosity:
+            result.verbosity.MergeFrom(verbosity)
+            assert result.verbosity.IsInitialized(), result
+
+        # -- Populate the Environment params.
+        assert apio_ctx.platform_id, "Missing platform_id in apio context"
+        oss_vars = apio_ctx.all_packages["oss-cad-suite"]["env"]["vars"]
+
+        result.envrionment.MergeFrom(
+            Envrionment(
+                platform_id=apio_ctx.platform_id,
+                is_debug=util.is_debug(),
+                yosys_path=oss_vars["YOSYS_LIB"],
+                trellis_path=oss_vars["TRELLIS"],
+            )
+        )
+        assert result.envrionment.IsInitialized(), result
+
+        # -- Populate the Project params.
+        result.project.MergeFrom(
+            Project(
+                board_id=project["board"],
+                top_module=project["top-module"],
+                yosys_synth_extra_options=apio_ctx.project.get(
+                    "yosys-synth-extra-options", None
+                ),
+            )
+        )
+        assert result.project.IsInitialized(), result
+
+        # -- Populate the optional artifacts cache params.
+        artifact_cache = self._construct_artifact_cache_params()
+        if artifact_cache:
+            result.artifact_cache.MergeFrom(artifact_cache)
+            assert result.artifact_cache.IsInitialized(), result
+
+        # -- Populate the optinal command specific params.
+        if target_params:
+            result.target.MergeFrom(target_params)
+            assert result.target.IsInitialized(), result
+
+        # -- All done.
+        assert result.IsInitialized(), result
+        return result
+
+    def _construct_fpga_info(self, board: str) -> Tuple[int, FpgaInfo]:
+        """Returns the ApioArch and the FpgaInfo of the given board."""
+
+        # -- Create a shortcut.
+        apio_ctx = self.apio_ctx
         assert board in apio_ctx.boards, f"Unknown board name [{board}]"
 
-        # -- Get the project fpga id from the board info.
+        # -- Get the fpga id from the board info.
         fpga_id = apio_ctx.boards.get(board).get("fpga")
         assert fpga_id, "construct_scons_params(): fpga assertion failed."
         assert (
@@ -256,25 +345,23 @@ class SCons:
         fpga_arch = fpga_config["arch"]
 
         # -- Populate the common values of FpgaInfo.
-        result.fpga_info.MergeFrom(
-            FpgaInfo(
-                fpga_id=fpga_id,
-                part_num=fpga_config["part_num"],
-                size=fpga_config["size"],
-            )
+        result = FpgaInfo(
+            fpga_id=fpga_id,
+            part_num=fpga_config["part_num"],
+            size=fpga_config["size"],
         )
 
-        # - Populate the architecture specific values of result.fpga_info.
+        # - Populate the architecture specific values of the FpgaInfo.
         if fpga_arch == "ice40":
-            result.arch = ApioArch.ICE40
-            result.fpga_info.ice40.MergeFrom(
+            arch = ApioArch.ICE40
+            result.ice40.MergeFrom(
                 Ice40FpgaInfo(
                     type=fpga_config["type"], pack=fpga_config["pack"]
                 )
             )
         elif fpga_arch == "ecp5":
-            result.arch = ApioArch.ECP5
-            result.fpga_info.ecp5.MergeFrom(
+            arch = ApioArch.ECP5
+            result.ecp5.MergeFrom(
                 Ecp5FpgaInfo(
                     type=fpga_config["type"],
                     pack=fpga_config["pack"],
@@ -282,10 +369,8 @@ class SCons:
                 )
             )
         elif fpga_arch == "gowin":
-            result.arch = ApioArch.GOWIN
-            result.fpga_info.gowin.MergeFrom(
-                GowinFpgaInfo(family=fpga_config["type"])
-            )
+            arch = ApioArch.GOWIN
+            result.gowin.MergeFrom(GowinFpgaInfo(family=fpga_config["type"]))
         else:
             secho(
                 f"Internal error: unexpected fpga_arch value {fpga_arch}",
@@ -294,47 +379,72 @@ class SCons:
             sys.exit(1)
 
         # -- We are done populating The FpgaInfo params..
-        assert result.fpga_info.IsInitialized(), result
+        assert result.IsInitialized(), result
+        return arch, result
 
-        # -- Populate the optional Verbosity params.
-        if verbosity:
-            result.verbosity.MergeFrom(verbosity)
-            assert result.verbosity.IsInitialized(), result
+    def _construct_artifact_cache_params(
+        self,
+    ) -> Optional[ArtifactCacheParams]:
+        """Returns the params of the shared artifacts cache or None if the
+        cache is not enabled by the apio.ini 'artifact-cache-max-size'
+        option."""
+
+        # -- Get the max cache size. If not specified the cache is disabled.
+        max_size_str = self.apio_ctx.project.get(
+            "artifact-cache-max-size", None
+        )
+        if not max_size_str:
+            return None
 
-        # -- Populate the Environment params.
-        assert apio_ctx.platform_id, "Missing platform_id in apio context"
-        oss_vars = apio_ctx.all_packages["oss-cad-suite"]["env"]["vars"]
+        # -- Parse the size. Exit with an error message if invalid.
+        try:
+            max_size = util.parse_size(max_size_str)
+        except ValueError:
+            secho(
+                "Error: invalid 'artifact-cache-max-size' value "
+                f"[{max_size_str}] in apio.ini.",
+                fg="red",
+            )
+            secho("Expecting a size such as '500M' or '2G'.", fg="yellow")
+            sys.exit(1)
 
-        result.envrionment.MergeFrom(
-            Envrionment(
-                platform_id=apio_ctx.platform_id,
-                is_debug=util.is_debug(),
-                yosys_path=oss_vars["YOSYS_LIB"],
-                trellis_path=oss_vars["TRELLIS"],
+        # -- A zero size disables the cache.
+        if max_size == 0:
+            return None
+
+        # -- The cached artifacts depend also on the version of the tools
+        # -- that generated them.
+        toolchain_version = (
+            self.apio_ctx.profile.get_package_installed_version(
+                "oss-cad-suite"
             )
         )
-        assert result.envrionment.IsInitialized(), result
 
-        # -- Populate the Project params.
-        result.project.MergeFrom(
-            Project(
-                board_id=project["board"],
-                top_module=project["top-module"],
-                yosys_synth_extra_options=apio_ctx.project.get(
-                    "yosys-synth-extra-options", None
-                ),
-            )
+        return ArtifactCacheParams(
+            cache_dir=str(self.apio_ctx.home_dir / ARTIFACT_CACHE_DIR),
+            max_size=max_size,
+            toolchain_version=toolchain_version,
         )
-        assert result.project.IsInitialized(), result
 
-        # -- Populate the optinal command specific params.
-        if target_params:
-            result.target.MergeFrom(target_params)
-            assert result.target.IsInitialized(), result
+    def _get_build_dir_max_size(self) -> Optional[int]:
+        """Returns the max size of the _build directory in bytes or None if
+        not limited by the apio.ini 'build-dir-max-size' option."""
 
-        # -- All done.
-        assert result.IsInitialized(), result
-        return result
+        max_size_str = self.apio_ctx.project.get("build-dir-max-size", None)
+        if not max_size_str:
+            return None
+
+        # -- Parse the size. Exit with an error message if invalid.
+        try:
+            return util.parse_size(max_size_str)
+        except ValueError:
+            secho(
+                "Error: invalid 'build-dir-max-size' value "
+                f"[{max_size_str}] in apio.ini.",
+                fg="red",
+            )
+            secho("Expecting a size such as '500M' or '2G'.", fg="yellow")
+            sys.exit(1)
 
     # pylint: disable=too-many-locals
     # pylint: disable=too-many-arguments
@@ -358,10 +468,23 @@ class SCons:
         # -- pass via a file. This is for verification purposes only.
         variables += [f"timestamp={scons_params.timestamp}"]
 
+        # -- The size quota of the build directory, if any. Not relevant
+        # -- when cleaning.
+        build_dir_max_size = (
+            None if scond_command == "-c" else self._get_build_dir_max_size()
+        )
+
+        # -- In a multi-board build, a failing board doesn't stop the build
+        # -- of the other boards.
+        boards = [b.board_id for b in scons_params.target.build.boards]
+        if boards:
+            variables += ["-k"]
+
         # -- If the apio packages are required for this command, install them
         # -- if needed.
-        if uses_packages:
+        if uses_packages and not self._packages_checked:
             installer.install_missing_packages_on_the_fly(self.apio_ctx)
+            self._packages_checked = True
 
         # -- We set the env variables also for a command such as 'clean'
         # -- which doesn't use the packages, to satisfy the required env
@@ -388,7 +511,9 @@ class SCons:
 
         # -- Board name string in color
         board_color = click.style(
-            scons_params.project.board_id, fg="cyan", bold=True
+            ", ".join(boards) or scons_params.project.board_id,
+            fg="cyan",
+            bold=True,
         )
 
         # -- Print information on the console
@@ -425,14 +550,35 @@ class SCons:
             f.write(text_format.MessageToString(scons_params))
 
         # -- Execute the scons builder!
-        result = util.exec_command(
-            scons_command,
-            stdout=util.AsyncPipe(scons_filter.on_stdout_line),
-            stderr=util.AsyncPipe(scons_filter.on_stderr_line),
-        )
+        if env_options.is_defined(env_options.APIO_SCONS_IN_PROCESS):
+            # -- Imported here to avoid loading scons when running as a
+            # -- subprocess.
+            # pylint: disable=import-outside-toplevel
+            from apio.scons.in_process import run_scons_in_process
+
+            exit_code = run_scons_in_process(scons_command[1:], scons_params)
+        else:
+            result = util.exec_command(
+                scons_command,
+                stdout=util.AsyncPipe(scons_filter.on_stdout_line),
+                stderr=util.AsyncPipe(scons_filter.on_stderr_line),
+            )
+            exit_code = result.exit_code
+
+        # -- Enforce the size quota of the build directory. We do it also
+        # -- after a failed command since it may have generated large files.
+        if build_dir_max_size is not None:
+            pruned = prune_build_dir(build_dir, build_dir_max_size)
+            if pruned.files:
+                secho(
+                    f"Build dir: pruned {util.plurality(pruned.files, 'file')}"
+                    f" ({pruned.size / 2**20:.1f} MB) to stay within "
+                    "'build-dir-max-size'.",
+                    fg="cyan",
+                )
 
         # -- Is there an error? True/False
-        is_error = result.exit_code != 0
+        is_error = exit_code != 0
 
         # -- Calculate the time it took to execute the command
         duration = time.time() - start_time
@@ -454,4 +600,4 @@ class SCons:
         secho(f"{half_line} [{status}]{summary_text}{half_line}", err=is_error)
 
         # -- Return the exit code
-        return result.exit_code
+        return exit_code
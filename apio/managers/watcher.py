@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Watch mode of commands such as 'apio build --watch'"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import click
+from click import secho, style
+from apio.managers.project import APIO_INI
+from apio.managers.scons import SCons
+from apio.apio_context import ApioContext, ApioContextScope
+from apio.utils import env_options
+
+# -- The suffixes of the watched files, in addition to apio.ini. These are
+# -- the source files, include files and constraint files of all the
+# -- architectures.
+WATCHED_SUFFIXES = [".v", ".sv", ".vh", ".svh", ".pcf", ".lpf", ".cst"]
+
+# -- A file state, (mtime_ns, size).
+FileState = Tuple[int, int]
+
+
+class FileWatcher:
+    """Detects changes in the watched files of a project directory. Like
+    scons, only the files at the top level of the project dir are
+    considered. The files are polled, which is portable and cheap for the
+    few files of a typical project."""
+
+    def __init__(
+        self, project_dir: Path, interval: float = 0.05, debounce: float = 0.2
+    ):
+        self.project_dir = project_dir
+        # -- The polling interval, in seconds.
+        self.interval = interval
+        # -- The quiet time that ends a burst of changes, in seconds.
+        self.debounce = debounce
+        # -- The state of the files when the last change was reported.
+        self._snapshot = self.snapshot()
+
+    def snapshot(self) -> Dict[str, FileState]:
+        """Returns the current state of the watched files."""
+        result = {}
+        with os.scandir(self.project_dir) as entries:
+            for entry in entries:
+                if (
+                    entry.name != APIO_INI
+                    and Path(entry.name).suffix not in WATCHED_SUFFIXES
+                ):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.is_file():
+                    result[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    def wait_for_changes(self) -> List[str]:
+        """Blocks until watched files are created, modified or deleted and
+        no further change was detected for the debounce time. Returns the
+        sorted names of the changed files."""
+
+        # -- Wait for the first change.
+        current = self.snapshot()
+        while current == self._snapshot:
+            time.sleep(self.interval)
+            current = self.snapshot()
+
+        # -- Wait for the end of the burst, e.g. an editor that saves
+        # -- several files.
+        quiet_since = time.time()
+        while time.time() - quiet_since < self.debounce:
+            time.sleep(self.interval)
+            latest = self.snapshot()
+            if latest != current:
+                current = latest
+                quiet_since = time.time()
+
+        changed = sorted(
+            name
+            for name in set(current) | set(self._snapshot)
+            if current.get(name) != self._snapshot.get(name)
+        )
+        self._snapshot = current
+        return changed
+
+
+def watch(
+    project_dir: Path,
+    run: Callable[[List[str]], None],
+    clear_screen: bool = False,
+) -> None:
+    """Calls 'run' with an empty list and then, each time the watched
+    files of the project change, with the list of changed files. Returns
+    only on Ctrl-C. 'run' should keep any state that is expensive to create,
+    such as the apio context, between calls. Scons is run within this
+    process, to save its startup time on each run. If 'clear_screen' is
+    True, the screen is cleared before each run, such that the output of
+    the last run is updated in place."""
+
+    os.environ[env_options.APIO_SCONS_IN_PROCESS] = "true"
+
+    # -- The watcher takes the snapshot before the run, so changes that are
+    # -- saved during a run trigger another run.
+    watcher = FileWatcher(project_dir)
+    changed = []
+    try:
+        while True:
+            if clear_screen:
+                click.clear()
+            if changed:
+                secho(
+                    f"Changed: {style(', '.join(changed), fg='yellow')}",
+                    color=True,
+                )
+            try:
+                run(changed)
+            except SystemExit:
+                # -- The error was reported, e.g. a bad apio.ini. Keep
+                # -- watching, the user may fix it.
+                pass
+            secho(
+                "Watching for changes, press Ctrl-C to exit.",
+                fg="cyan",
+                color=True,
+            )
+            changed = watcher.wait_for_changes()
+            secho()
+    except KeyboardInterrupt:
+        secho()
+        secho("Stopped watching.", color=True)
+
+
+def watch_scons(
+    apio_ctx: ApioContext,
+    run: Callable[[SCons], None],
+    clear_screen: bool = False,
+) -> None:
+    """Like watch() but calls 'run' with a scons manager of the project.
+    The apio context and the scons manager are kept between runs and are
+    recreated only if apio.ini was changed."""
+
+    # -- The scons manager changes the current directory to the project
+    # -- dir, so we resolve it first.
+    project_path = apio_ctx.project_dir.resolve()
+    scons = SCons(apio_ctx)
+
+    def run_scons(changed: List[str]) -> None:
+        nonlocal scons
+        if APIO_INI in changed:
+            scons = SCons(
+                ApioContext(
+                    scope=ApioContextScope.PROJECT_REQUIRED,
+                    project_dir_arg=project_path,
+                )
+            )
+        run(scons)
+
+    watch(project_path, run_scons, clear_screen)
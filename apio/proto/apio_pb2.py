@@ -30,17 +30,23 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\napio.proto\x12\napio.proto\"+\n\rIce40FpgaInfo\x12\x0c\n\x04type\x18\x01 \x02(\t\x12\x0c\n\x04pack\x18\x02 \x02(\t\"9\n\x0c\x45\x63p5FpgaInfo\x12\x0c\n\x04type\x18\x04 \x02(\t\x12\x0c\n\x04pack\x18\x05 \x02(\t\x12\r\n\x05speed\x18\x06 \x02(\t\"\x1f\n\rGowinFpgaInfo\x12\x0e\n\x06\x66\x61mily\x18\x04 \x02(\t\"\xc5\x01\n\x08\x46pgaInfo\x12\x0f\n\x07\x66pga_id\x18\x01 \x02(\t\x12\x10\n\x08part_num\x18\x02 \x02(\t\x12\x0c\n\x04size\x18\x03 \x02(\t\x12*\n\x05ice40\x18\n \x01(\x0b\x32\x19.apio.proto.Ice40FpgaInfoH\x00\x12(\n\x04\x65\x63p5\x18\x0b \x01(\x0b\x32\x18.apio.proto.Ecp5FpgaInfoH\x00\x12*\n\x05gowin\x18\x0c \x01(\x0b\x32\x19.apio.proto.GowinFpgaInfoH\x00\x42\x06\n\x04\x61rch\"I\n\tVerbosity\x12\x12\n\x03\x61ll\x18\x01 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x05synth\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x12\n\x03pnr\x18\x03 \x01(\x08:\x05\x66\x61lse\"e\n\x0b\x45nvrionment\x12\x13\n\x0bplatform_id\x18\x01 \x02(\t\x12\x17\n\x08is_debug\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x12\n\nyosys_path\x18\x03 \x02(\t\x12\x14\n\x0ctrellis_path\x18\x04 \x02(\t\"T\n\x07Project\x12\x10\n\x08\x62oard_id\x18\x01 \x02(\t\x12\x12\n\ntop_module\x18\x02 \x02(\t\x12#\n\x19yosys_synth_extra_options\x18\x03 \x01(\t:\x00\"\x98\x01\n\nLintParams\x12\x14\n\ntop_module\x18\x01 \x01(\t:\x00\x12\x1c\n\rverilator_all\x18\x02 \x01(\x08:\x05\x66\x61lse\x12!\n\x12verilator_no_style\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x1a\n\x12verilator_no_warns\x18\x04 \x03(\t\x12\x17\n\x0fverilator_warns\x18\x05 \x03(\t\"S\n\x0bGraphParams\x12\x30\n\x0boutput_type\x18\x01 \x02(\x0e\x32\x1b.apio.proto.GraphOutputType\x12\x12\n\ntop_module\x18\x02 \x01(\t\"3\n\tSimParams\x12\x13\n\ttestbench\x18\x01 \x01(\t:\x00\x12\x11\n\tforce_sim\x18\x02 \x02(\x08\"%\n\x0e\x41pioTestParams\x12\x13\n\ttestbench\x18\x01 \x01(\t:\x00\"&\n\x0cUploadParams\x12\x16\n\x0eprogrammer_cmd\x18\x01 \x01(\t\"\xe8\x01\n\x0cTargetParams\x12&\n\x04lint\x18\n \x01(\x0b\x32\x16.apio.proto.LintParamsH\x00\x12(\n\x05graph\x18\x0b \x01(\x0b\x32\x17.apio.proto.GraphParamsH\x00\x12$\n\x03sim\x18\x0c \x01(\x0b\x32\x15.apio.proto.SimParamsH\x00\x12*\n\x04test\x18\r \x01(\x0b\x32\x1a.apio.proto.ApioTestParamsH\x00\x12*\n\x06upload\x18\x0e \x01(\x0b\x32\x18.apio.proto.UploadParamsH\x00\x42\x08\n\x06target\"\x95\x02\n\x0bSconsParams\x12\x11\n\ttimestamp\x18\x01 \x02(\t\x12\"\n\x04\x61rch\x18\x02 \x02(\x0e\x32\x14.apio.proto.ApioArch\x12\'\n\tfpga_info\x18\x03 \x02(\x0b\x32\x14.apio.proto.FpgaInfo\x12(\n\tverbosity\x18\x04 \x01(\x0b\x32\x15.apio.proto.Verbosity\x12,\n\x0b\x65nvrionment\x18\x05 \x02(\x0b\x32\x17.apio.proto.Envrionment\x12$\n\x07project\x18\x06 \x02(\x0b\x32\x13.apio.proto.Project\x12(\n\x06target\x18\x07 \x01(\x0b\x32\x18.apio.proto.TargetParams*@\n\x08\x41pioArch\x12\x14\n\x10\x41RCH_UNSPECIFIED\x10\x00\x12\t\n\x05ICE40\x10\x01\x12\x08\n\x04\x45\x43P5\x10\x02\x12\t\n\x05GOWIN\x10\x03*B\n\x0fGraphOutputType\x12\x14\n\x10TYPE_UNSPECIFIED\x10\x00\x12\x07\n\x03SVG\x10\x01\x12\x07\n\x03PNG\x10\x02\x12\x07\n\x03PDF\x10\x03')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\napio.proto\x12\napio.proto\"+\n\rIce40FpgaInfo\x12\x0c\n\x04type\x18\x01 \x02(\t\x12\x0c\n\x04pack\x18\x02 \x02(\t\"9\n\x0c\x45\x63p5FpgaInfo\x12\x0c\n\x04type\x18\x04 \x02(\t\x12\x0c\n\x04pack\x18\x05 \x02(\t\x12\r\n\x05speed\x18\x06 \x02(\t\"\x1f\n\rGowinFpgaInfo\x12\x0e\n\x06\x66\x61mily\x18\x04 \x02(\t\"\xc5\x01\n\x08\x46pgaInfo\x12\x0f\n\x07\x66pga_id\x18\x01 \x02(\t\x12\x10\n\x08part_num\x18\x02 \x02(\t\x12\x0c\n\x04size\x18\x03 \x02(\t\x12*\n\x05ice40\x18\n \x01(\x0b\x32\x19.apio.proto.Ice40FpgaInfoH\x00\x12(\n\x04\x65\x63p5\x18\x0b \x01(\x0b\x32\x18.apio.proto.Ecp5FpgaInfoH\x00\x12*\n\x05gowin\x18\x0c \x01(\x0b\x32\x19.apio.proto.GowinFpgaInfoH\x00\x42\x06\n\x04\x61rch\"I\n\tVerbosity\x12\x12\n\x03\x61ll\x18\x01 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x05synth\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x12\n\x03pnr\x18\x03 \x01(\x08:\x05\x66\x61lse\"e\n\x0b\x45nvrionment\x12\x13\n\x0bplatform_id\x18\x01 \x02(\t\x12\x17\n\x08is_debug\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x12\n\nyosys_path\x18\x03 \x02(\t\x12\x14\n\x0ctrellis_path\x18\x04 \x02(\t\"T\n\x07Project\x12\x10\n\x08\x62oard_id\x18\x01 \x02(\t\x12\x12\n\ntop_module\x18\x02 \x02(\t\x12#\n\x19yosys_synth_extra_options\x18\x03 \x01(\t:\x00\"\x98\x01\n\nLintParams\x12\x14\n\ntop_module\x18\x01 \x01(\t:\x00\x12\x1c\n\rverilator_all\x18\x02 \x01(\x08:\x05\x66\x61lse\x12!\n\x12verilator_no_style\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x1a\n\x12verilator_no_warns\x18\x04 \x03(\t\x12\x17\n\x0fverilator_warns\x18\x05 \x03(\t\"Z\n\x0bGraphParams\x12\x31\n\x0coutput_types\x18\x03 \x03(\x0e\x32\x1b.apio.proto.GraphOutputType\x12\x12\n\ntop_module\x18\x02 \x01(\tJ\x04\x08\x01\x10\x02\"m\n\tSimParams\x12\x13\n\ttestbench\x18\x01 \x01(\t:\x00\x12\x11\n\tforce_sim\x18\x02 \x02(\x08\x12\x38\n\x0cwaves_format\x18\x03 \x01(\x0e\x32\x17.apio.proto.WavesFormat:\tWAVES_VCD\"=\n\x0e\x41pioTestLimits\x12\x12\n\x07timeout\x18\x01 \x01(\x02:\x01\x30\x12\x17\n\x0cmax_sim_time\x18\x02 \x01(\x04:\x01\x30\"\xf2\x03\n\x0e\x41pioTestParams\x12\x13\n\ttestbench\x18\x01 \x01(\t:\x00\x12\x0f\n\x04jobs\x18\x02 \x01(\r:\x01\x31\x12\x19\n\nforce_test\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x0csweep_points\x18\x04 \x03(\t\x12\x33\n\nsim_engine\x18\x05 \x01(\x0e\x32\x15.apio.proto.SimEngine:\x08IVERILOG\x12\x39\n\x0cwaves_format\x18\x06 \x01(\x0e\x32\x17.apio.proto.WavesFormat:\nWAVES_NONE\x12\x16\n\x0bshard_index\x18\x07 \x01(\r:\x01\x30\x12\x16\n\x0bshard_count\x18\x08 \x01(\r:\x01\x30\x12\x1e\n\x14shard_durations_file\x18\t \x01(\t:\x00\x12*\n\x06limits\x18\n \x01(\x0b\x32\x1a.apio.proto.ApioTestLimits\x12I\n\x10testbench_limits\x18\x0b \x03(\x0b\x32/.apio.proto.ApioTestParams.TestbenchLimitsEntry\x1aR\n\x14TestbenchLimitsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12)\n\x05value\x18\x02 \x01(\x0b\x32\x1a.apio.proto.ApioTestLimits:\x02\x38\x01\"&\n\x0cUploadParams\x12\x16\n\x0eprogrammer_cmd\x18\x01 \x01(\t\"l\n\x0b\x42oardTarget\x12\x10\n\x08\x62oard_id\x18\x01 \x02(\t\x12\"\n\x04\x61rch\x18\x02 \x02(\x0e\x32\x14.apio.proto.ApioArch\x12\'\n\tfpga_info\x18\x03 \x02(\x0b\x32\x14.apio.proto.FpgaInfo\"q\n\x0b\x42uildParams\x12\x10\n\x05seeds\x18\x01 \x01(\r:\x01\x31\x12\x0f\n\x04jobs\x18\x02 \x01(\r:\x01\x30\x12\x16\n\x0b\x66max_target\x18\x03 \x01(\x02:\x01\x30\x12\'\n\x06\x62oards\x18\x04 \x03(\x0b\x32\x17.apio.proto.BoardTarget\"#\n\x0cReportParams\x12\x13\n\tjson_file\x18\x01 \x01(\t:\x00\"\xbe\x02\n\x0cTargetParams\x12&\n\x04lint\x18\n \x01(\x0b\x32\x16.apio.proto.LintParamsH\x00\x12(\n\x05graph\x18\x0b \x01(\x0b\x32\x17.apio.proto.GraphParamsH\x00\x12$\n\x03sim\x18\x0c \x01(\x0b\x32\x15.apio.proto.SimParamsH\x00\x12*\n\x04test\x18\r \x01(\x0b\x32\x1a.apio.proto.ApioTestParamsH\x00\x12*\n\x06upload\x18\x0e \x01(\x0b\x32\x18.apio.proto.UploadParamsH\x00\x12(\n\x05\x62uild\x18\x0f \x01(\x0b\x32\x17.apio.proto.BuildParamsH\x00\x12*\n\x06report\x18\x10 \x01(\x0b\x32\x18.apio.proto.ReportParamsH\x00\x42\x08\n\x06target\"U\n\x13\x41rtifactCacheParams\x12\x11\n\tcache_dir\x18\x01 \x02(\t\x12\x10\n\x08max_size\x18\x02 \x02(\x04\x12\x19\n\x11toolchain_version\x18\x03 \x02(\t\"\xce\x02\n\x0bSconsParams\x12\x11\n\ttimestamp\x18\x01 \x02(\t\x12\"\n\x04\x61rch\x18\x02 \x02(\x0e\x32\x14.apio.proto.ApioArch\x12\'\n\tfpga_info\x18\x03 \x02(\x0b\x32\x14.apio.proto.FpgaInfo\x12(\n\tverbosity\x18\x04 \x01(\x0b\x32\x15.apio.proto.Verbosity\x12,\n\x0b\x65nvrionment\x18\x05 \x02(\x0b\x32\x17.apio.proto.Envrionment\x12$\n\x07project\x18\x06 \x02(\x0b\x32\x13.apio.proto.Project\x12(\n\x06target\x18\x07 \x01(\x0b\x32\x18.apio.proto.TargetParams\x12\x37\n\x0e\x61rtifact_cache\x18\x08 \x01(\x0b\x32\x1f.apio.proto.ArtifactCacheParams*@\n\x08\x41pioArch\x12\x14\n\x10\x41RCH_UNSPECIFIED\x10\x00\x12\t\n\x05ICE40\x10\x01\x12\x08\n\x04\x45\x43P5\x10\x02\x12\t\n\x05GOWIN\x10\x03*B\n\x0fGraphOutputType\x12\x14\n\x10TYPE_UNSPECIFIED\x10\x00\x12\x07\n\x03SVG\x10\x01\x12\x07\n\x03PNG\x10\x02\x12\x07\n\x03PDF\x10\x03*Y\n\x0bWavesFormat\x12\x1c\n\x18WAVES_FORMAT_UNSPECIFIED\x10\x00\x12\r\n\tWAVES_VCD\x10\x01\x12\r\n\tWAVES_FST\x10\x02\x12\x0e\n\nWAVES_NONE\x10\x03*D\n\tSimEngine\x12\x1a\n\x16SIM_ENGINE_UNSPECIFIED\x10\x00\x12\x0c\n\x08IVERILOG\x10\x01\x12\r\n\tVERILATOR\x10\x02')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'apio_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_APIOARCH']._serialized_start=1514
-  _globals['_APIOARCH']._serialized_end=1578
-  _globals['_GRAPHOUTPUTTYPE']._serialized_start=1580
-  _globals['_GRAPHOUTPUTTYPE']._serialized_end=1646
+  _globals['_APIOTESTPARAMS_TESTBENCHLIMITSENTRY']._loaded_options = None
+  _globals['_APIOTESTPARAMS_TESTBENCHLIMITSENTRY']._serialized_options = b'8\001'
+  _globals['_APIOARCH']._serialized_start=2596
+  _globals['_APIOARCH']._serialized_end=2660
+  _globals['_GRAPHOUTPUTTYPE']._serialized_start=2662
+  _globals['_GRAPHOUTPUTTYPE']._serialized_end=2728
+  _globals['_WAVESFORMAT']._serialized_start=2730
+  _globals['_WAVESFORMAT']._serialized_end=2819
+  _globals['_SIMENGINE']._serialized_start=2821
+  _globals['_SIMENGINE']._serialized_end=2889
   _globals['_ICE40FPGAINFO']._serialized_start=26
   _globals['_ICE40FPGAINFO']._serialized_end=69
   _globals['_ECP5FPGAINFO']._serialized_start=71
@@ -58,15 +64,27 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_LINTPARAMS']._serialized_start=628
   _globals['_LINTPARAMS']._serialized_end=780
   _globals['_GRAPHPARAMS']._serialized_start=782
-  _globals['_GRAPHPARAMS']._serialized_end=865
-  _globals['_SIMPARAMS']._serialized_start=867
-  _globals['_SIMPARAMS']._serialized_end=918
-  _globals['_APIOTESTPARAMS']._serialized_start=920
-  _globals['_APIOTESTPARAMS']._serialized_end=957
-  _globals['_UPLOADPARAMS']._serialized_start=959
-  _globals['_UPLOADPARAMS']._serialized_end=997
-  _globals['_TARGETPARAMS']._serialized_start=1000
-  _globals['_TARGETPARAMS']._serialized_end=1232
-  _globals['_SCONSPARAMS']._serialized_start=1235
-  _globals['_SCONSPARAMS']._serialized_end=1512
+  _globals['_GRAPHPARAMS']._serialized_end=872
+  _globals['_SIMPARAMS']._serialized_start=874
+  _globals['_SIMPARAMS']._serialized_end=983
+  _globals['_APIOTESTLIMITS']._serialized_start=985
+  _globals['_APIOTESTLIMITS']._serialized_end=1046
+  _globals['_APIOTESTPARAMS']._serialized_start=1049
+  _globals['_APIOTESTPARAMS']._serialized_end=1547
+  _globals['_APIOTESTPARAMS_TESTBENCHLIMITSENTRY']._serialized_start=1465
+  _globals['_APIOTESTPARAMS_TESTBENCHLIMITSENTRY']._serialized_end=1547
+  _globals['_UPLOADPARAMS']._serialized_start=1549
+  _globals['_UPLOADPARAMS']._serialized_end=1587
+  _globals['_BOARDTARGET']._serialized_start=1589
+  _globals['_BOARDTARGET']._serialized_end=1697
+  _globals['_BUILDPARAMS']._serialized_start=1699
+  _globals['_BUILDPARAMS']._serialized_end=1812
+  _globals['_REPORTPARAMS']._serialized_start=1814
+  _globals['_REPORTPARAMS']._serialized_end=1849
+  _globals['_TARGETPARAMS']._serialized_start=1852
+  _globals['_TARGETPARAMS']._serialized_end=2170
+  _globals['_ARTIFACTCACHEPARAMS']._serialized_start=2172
+  _globals['_ARTIFACTCACHEPARAMS']._serialized_end=2257
+  _globals['_SCONSPARAMS']._serialized_start=2260
+  _globals['_SCONSPARAMS']._serialized_end=2594
 # @@protoc_insertion_point(module_scope)
@@ -25,6 +25,19 @@ class GraphOutputType(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
     SVG: _ClassVar[GraphOutputType]
     PNG: _ClassVar[GraphOutputType]
     PDF: _ClassVar[GraphOutputType]
+
+class WavesFormat(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    WAVES_FORMAT_UNSPECIFIED: _ClassVar[WavesFormat]
+    WAVES_VCD: _ClassVar[WavesFormat]
+    WAVES_FST: _ClassVar[WavesFormat]
+    WAVES_NONE: _ClassVar[WavesFormat]
+
+class SimEngine(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    SIM_ENGINE_UNSPECIFIED: _ClassVar[SimEngine]
+    IVERILOG: _ClassVar[SimEngine]
+    VERILATOR: _ClassVar[SimEngine]
 ARCH_UNSPECIFIED: ApioArch
 ICE40: ApioArch
 ECP5: ApioArch
@@ -33,6 +46,13 @@ TYPE_UNSPECIFIED: GraphOutputType
 SVG: GraphOutputType
 PNG: GraphOutputType
 PDF: GraphOutputType
+WAVES_FORMAT_UNSPECIFIED: WavesFormat
+WAVES_VCD: WavesFormat
+WAVES_FST: WavesFormat
+WAVES_NONE: WavesFormat
+SIM_ENGINE_UNSPECIFIED: SimEngine
+IVERILOG: SimEngine
+VERILATOR: SimEngine
 
 class Ice40FpgaInfo(_message.Message):
     __slots__ = ("type", "pack")
@@ -121,26 +141,63 @@ class LintParams(_message.Message):
     def __init__(self, top_module: _Optional[str] = ..., verilator_all: bool = ..., verilator_no_style: bool = ..., verilator_no_warns: _Optional[_Iterable[str]] = ..., verilator_warns: _Optional[_Iterable[str]] = ...) -> None: ...
 
 class GraphParams(_message.Message):
-    __slots__ = ("output_type", "top_module")
-    OUTPUT_TYPE_FIELD_NUMBER: _ClassVar[int]
+    __slots__ = ("output_types", "top_module")
+    OUTPUT_TYPES_FIELD_NUMBER: _ClassVar[int]
     TOP_MODULE_FIELD_NUMBER: _ClassVar[int]
-    output_type: GraphOutputType
+    output_types: _containers.RepeatedScalarFieldContainer[GraphOutputType]
     top_module: str
-    def __init__(self, output_type: _Optional[_Union[GraphOutputType, str]] = ..., top_module: _Optional[str] = ...) -> None: ...
+    def __init__(self, output_types: _Optional[_Iterable[_Union[GraphOutputType, str]]] = ..., top_module: _Optional[str] = ...) -> None: ...
 
 class SimParams(_message.Message):
-    __slots__ = ("testbench", "force_sim")
+    __slots__ = ("testbench", "force_sim", "waves_format")
     TESTBENCH_FIELD_NUMBER: _ClassVar[int]
     FORCE_SIM_FIELD_NUMBER: _ClassVar[int]
+    WAVES_FORMAT_FIELD_NUMBER: _ClassVar[int]
     testbench: str
     force_sim: bool
-    def __init__(self, testbench: _Optional[str] = ..., force_sim: bool = ...) -> None: ...
+    waves_format: WavesFormat
+    def __init__(self, testbench: _Optional[str] = ..., force_sim: bool = ..., waves_format: _Optional[_Union[WavesFormat, str]] = ...) -> None: ...
+
+class ApioTestLimits(_message.Message):
+    __slots__ = ("timeout", "max_sim_time")
+    TIMEOUT_FIELD_NUMBER: _ClassVar[int]
+    MAX_SIM_TIME_FIELD_NUMBER: _ClassVar[int]
+    timeout: float
+    max_sim_time: int
+    def __init__(self, timeout: _Optional[float] = ..., max_sim_time: _Optional[int] = ...) -> None: ...
 
 class ApioTestParams(_message.Message):
-    __slots__ = ("testbench",)
+    __slots__ = ("testbench", "jobs", "force_test", "sweep_points", "sim_engine", "waves_format", "shard_index", "shard_count", "shard_durations_file", "limits", "testbench_limits")
+    class TestbenchLimitsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: ApioTestLimits
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[_Union[ApioTestLimits, _Mapping]] = ...) -> None: ...
     TESTBENCH_FIELD_NUMBER: _ClassVar[int]
+    JOBS_FIELD_NUMBER: _ClassVar[int]
+    FORCE_TEST_FIELD_NUMBER: _ClassVar[int]
+    SWEEP_POINTS_FIELD_NUMBER: _ClassVar[int]
+    SIM_ENGINE_FIELD_NUMBER: _ClassVar[int]
+    WAVES_FORMAT_FIELD_NUMBER: _ClassVar[int]
+    SHARD_INDEX_FIELD_NUMBER: _ClassVar[int]
+    SHARD_COUNT_FIELD_NUMBER: _ClassVar[int]
+    SHARD_DURATIONS_FILE_FIELD_NUMBER: _ClassVar[int]
+    LIMITS_FIELD_NUMBER: _ClassVar[int]
+    TESTBENCH_LIMITS_FIELD_NUMBER: _ClassVar[int]
     testbench: str
-    def __init__(self, testbench: _Optional[str] = ...) -> None: ...
+    jobs: int
+    force_test: bool
+    sweep_points: _containers.RepeatedScalarFieldContainer[str]
+    sim_engine: SimEngine
+    waves_format: WavesFormat
+    shard_index: int
+    shard_count: int
+    shard_durations_file: str
+    limits: ApioTestLimits
+    testbench_limits: _containers.MessageMap[str, ApioTestLimits]
+    def __init__(self, testbench: _Optional[str] = ..., jobs: _Optional[int] = ..., force_test: bool = ..., sweep_points: _Optional[_Iterable[str]] = ..., sim_engine: _Optional[_Union[SimEngine, str]] = ..., waves_format: _Optional[_Union[WavesFormat, str]] = ..., shard_index: _Optional[int] = ..., shard_count: _Optional[int] = ..., shard_durations_file: _Optional[str] = ..., limits: _Optional[_Union[ApioTestLimits, _Mapping]] = ..., testbench_limits: _Optional[_Mapping[str, ApioTestLimits]] = ...) -> None: ...
 
 class UploadParams(_message.Message):
     __slots__ = ("programmer_cmd",)
@@ -148,22 +205,64 @@ class UploadParams(_message.Message):
     programmer_cmd: str
     def __init__(self, programmer_cmd: _Optional[str] = ...) -> None: ...
 
+class BoardTarget(_message.Message):
+    __slots__ = ("board_id", "arch", "fpga_info")
+    BOARD_ID_FIELD_NUMBER: _ClassVar[int]
+    ARCH_FIELD_NUMBER: _ClassVar[int]
+    FPGA_INFO_FIELD_NUMBER: _ClassVar[int]
+    board_id: str
+    arch: ApioArch
+    fpga_info: FpgaInfo
+    def __init__(self, board_id: _Optional[str] = ..., arch: _Optional[_Union[ApioArch, str]] = ..., fpga_info: _Optional[_Union[FpgaInfo, _Mapping]] = ...) -> None: ...
+
+class BuildParams(_message.Message):
+    __slots__ = ("seeds", "jobs", "fmax_target", "boards")
+    SEEDS_FIELD_NUMBER: _ClassVar[int]
+    JOBS_FIELD_NUMBER: _ClassVar[int]
+    FMAX_TARGET_FIELD_NUMBER: _ClassVar[int]
+    BOARDS_FIELD_NUMBER: _ClassVar[int]
+    seeds: int
+    jobs: int
+    fmax_target: float
+    boards: _containers.RepeatedCompositeFieldContainer[BoardTarget]
+    def __init__(self, seeds: _Optional[int] = ..., jobs: _Optional[int] = ..., fmax_target: _Optional[float] = ..., boards: _Optional[_Iterable[_Union[BoardTarget, _Mapping]]] = ...) -> None: ...
+
+class ReportParams(_message.Message):
+    __slots__ = ("json_file",)
+    JSON_FILE_FIELD_NUMBER: _ClassVar[int]
+    json_file: str
+    def __init__(self, json_file: _Optional[str] = ...) -> None: ...
+
 class TargetParams(_message.Message):
-    __slots__ = ("lint", "graph", "sim", "test", "upload")
+    __slots__ = ("lint", "graph", "sim", "test", "upload", "build", "report")
     LINT_FIELD_NUMBER: _ClassVar[int]
     GRAPH_FIELD_NUMBER: _ClassVar[int]
     SIM_FIELD_NUMBER: _ClassVar[int]
     TEST_FIELD_NUMBER: _ClassVar[int]
     UPLOAD_FIELD_NUMBER: _ClassVar[int]
+    BUILD_FIELD_NUMBER: _ClassVar[int]
+    REPORT_FIELD_NUMBER: _ClassVar[int]
     lint: LintParams
     graph: GraphParams
     sim: SimParams
     test: ApioTestParams
     upload: UploadParams
-    def __init__(self, lint: _Optional[_Union[LintParams, _Mapping]] = ..., graph: _Optional[_Union[GraphParams, _Mapping]] = ..., sim: _Optional[_Union[SimParams, _Mapping]] = ..., test: _Optional[_Union[ApioTestParams, _Mapping]] = ..., upload: _Optional[_Union[UploadParams, _Mapping]] = ...) -> None: ...
+    build: BuildParams
+    report: ReportParams
+    def __init__(self, lint: _Optional[_Union[LintParams, _Mapping]] = ..., graph: _Optional[_Union[GraphParams, _Mapping]] = ..., sim: _Optional[_Union[SimParams, _Mapping]] = ..., test: _Optional[_Union[ApioTestParams, _Mapping]] = ..., upload: _Optional[_Union[UploadParams, _Mapping]] = ..., build: _Optional[_Union[BuildParams, _Mapping]] = ..., report: _Optional[_Union[ReportParams, _Mapping]] = ...) -> None: ...
+
+class ArtifactCacheParams(_message.Message):
+    __slots__ = ("cache_dir", "max_size", "toolchain_version")
+    CACHE_DIR_FIELD_NUMBER: _ClassVar[int]
+    MAX_SIZE_FIELD_NUMBER: _ClassVar[int]
+    TOOLCHAIN_VERSION_FIELD_NUMBER: _ClassVar[int]
+    cache_dir: str
+    max_size: int
+    toolchain_version: str
+    def __init__(self, cache_dir: _Optional[str] = ..., max_size: _Optional[int] = ..., toolchain_version: _Optional[str] = ...) -> None: ...
 
 class SconsParams(_message.Message):
-    __slots__ = ("timestamp", "arch", "fpga_info", "verbosity", "envrionment", "project", "target")
+    __slots__ = ("timestamp", "arch", "fpga_info", "verbosity", "envrionment", "project", "target", "artifact_cache")
     TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
     ARCH_FIELD_NUMBER: _ClassVar[int]
     FPGA_INFO_FIELD_NUMBER: _ClassVar[int]
@@ -171,6 +270,7 @@ class SconsParams(_message.Message):
     ENVRIONMENT_FIELD_NUMBER: _ClassVar[int]
     PROJECT_FIELD_NUMBER: _ClassVar[int]
     TARGET_FIELD_NUMBER: _ClassVar[int]
+    ARTIFACT_CACHE_FIELD_NUMBER: _ClassVar[int]
     timestamp: str
     arch: ApioArch
     fpga_info: FpgaInfo
@@ -178,4 +278,5 @@ class SconsParams(_message.Message):
     envrionment: Envrionment
     project: Project
     target: TargetParams
-    def __init__(self, timestamp: _Optional[str] = ..., arch: _Optional[_Union[ApioArch, str]] = ..., fpga_info: _Optional[_Union[FpgaInfo, _Mapping]] = ..., verbosity: _Optional[_Union[Verbosity, _Mapping]] = ..., envrionment: _Optional[_Union[Envrionment, _Mapping]] = ..., project: _Optional[_Union[Project, _Mapping]] = ..., target: _Optional[_Union[TargetParams, _Mapping]] = ...) -> None: ...
+    artifact_cache: ArtifactCacheParams
+    def __init__(self, timestamp: _Optional[str] = ..., arch: _Optional[_Union[ApioArch, str]] = ..., fpga_info: _Optional[_Union[FpgaInfo, _Mapping]] = ..., verbosity: _Optional[_Union[Verbosity, _Mapping]] = ..., envrionment: _Optional[_Union[Envrionment, _Mapping]] = ..., project: _Optional[_Union[Project, _Mapping]] = ..., target: _Optional[_Union[TargetParams, _Mapping]] = ..., artifact_cache: _Optional[_Union[ArtifactCacheParams, _Mapping]] = ...) -> None: ...
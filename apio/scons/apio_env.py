@@ -17,7 +17,7 @@
 # pylint: disable=W0613
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from click import secho
 from SCons.Script.SConscript import SConsEnvironment
 from SCons.Environment import BuilderWrapper
@@ -25,6 +25,12 @@ import SCons.Defaults
 
 # from apio.scons.apio_args import ApioArgs
 from apio.proto.apio_pb2 import SconsParams
+from apio.scons.stage_timer import (
+    HAS_WAIT4,
+    TimedAction,
+    timed_spawn,
+    stage_name,
+)
 
 
 # -- All the build files and other artifcats are created in this this
@@ -46,11 +52,18 @@ class ApioEnv:
         self,
         command_line_targets: List[str],
         scons_params: SconsParams,
+        build_dir: str = BUILD_DIR,
     ):
         # -- Save the arguments.
         self.command_line_targets = command_line_targets
         self.params = scons_params
 
+        # -- The directory of the synth, pnr and bitstream artifacts and
+        # -- their base file name. Multi-board builds use a subdirectory
+        # -- of BUILD_DIR per board.
+        self.build_dir = build_dir
+        self.target = os.path.join(build_dir, "hardware")
+
         # -- Create the underlying scons env.
         self.scons_env = SConsEnvironment(ENV=os.environ, tools=[])
 
@@ -64,6 +77,17 @@ class ApioEnv:
         ), "DefaultEnvironment already exists"
         # pylint: enable=protected-access
 
+        # -- Explicitly set the decider and disable the scons cache dir.
+        # -- Otherwise, scons uses the ones of the default environment and
+        # -- creates it lazily, which is not thread safe when running with
+        # -- parallel jobs. 'content' is the default decider of scons.
+        self.scons_env.Decider("content")
+        self.scons_env.CacheDir(None)
+
+        # -- Measure the resources used by the commands, see stage_timer.py.
+        if HAS_WAIT4:
+            self.scons_env["SPAWN"] = timed_spawn
+
         # -- Determine if we run on windows. Platform id is a required arg.
         self.is_windows = (
             "windows" in self.params.envrionment.platform_id.lower()
@@ -89,7 +113,9 @@ class ApioEnv:
     def builder(self, builder_id: str, builder):
         """Append to the scons env a builder with given id. The env
         adds it to the BUILDERS dict and also adds to itself an attribute with
-        that name that contains a wrapper to that builder."""
+        that name that contains a wrapper to that builder. The builder's
+        action is wrapped such that its resources are measured."""
+        builder.action = TimedAction(builder.action, stage_name(builder_id))
         self.scons_env.Append(BUILDERS={builder_id: builder})
 
     # pylint: disable=too-many-arguments
@@ -101,12 +127,15 @@ class ApioEnv:
         sources: List,
         extra_dependecies: Optional[List] = None,
         always_build: bool = False,
+        overrides: Optional[Dict[str, str]] = None,
     ):
-        """Creates an return a target that uses the builder with given id."""
+        """Creates an return a target that uses the builder with given id.
+        'overrides' are scons variables that are set only for this
+        target."""
         # -- Scons wraps the builder with a wrapper. We use it to create the
         # -- new target.
         builder_wrapper: BuilderWrapper = getattr(self.scons_env, builder_id)
-        target = builder_wrapper(target, sources)
+        target = builder_wrapper(target, sources, **(overrides or {}))
         # -- Mark as 'always build' if requested.
         if always_build:
             self.scons_env.AlwaysBuild(target)
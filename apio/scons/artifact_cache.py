@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""A persistent cache of the synth, pnr and bitstream artifacts that is
+shared by all the projects of the user.
+
+The cache is based on the scons CacheDir, which is content addressed by the
+build signature of each target. The signature covers the content of the
+source files and their scanned dependencies, the constraint file and the
+command line of the tools, which includes the fpga info, top module and
+yosys synth options. We add to it the version of the oss-cad-suite such that
+a toolchain upgrade invalidates the cached artifacts.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import List, Tuple
+from click import secho
+from SCons.CacheDir import CacheDir
+from apio.scons.apio_env import ApioEnv
+from apio.scons import exit_hooks
+
+# -- A file in the cache dir with the accumulated hit/miss counters.
+STATS_FILE = "apio-stats.json"
+
+# -- Files in the cache dir that are not cached artifacts. 'config' is
+# -- created by scons.
+NON_ARTIFACT_FILES = ["config", STATS_FILE]
+
+
+def enable_artifact_cache(apio_env: ApioEnv, targets: List) -> None:
+    """Enables the artifact cache for the given targets. Should be called
+    only if the scons params contain the artifact cache params."""
+
+    # -- Keep short references.
+    params = apio_env.params
+    scons_env = apio_env.scons_env
+
+    # -- Sanity check.
+    assert params.HasField("artifact_cache"), params
+    cache_params = params.artifact_cache
+
+    # -- Tell scons to use the cache directory.
+    scons_env.CacheDir(cache_params.cache_dir)
+
+    # -- Make the toolchain version a part of the targets signatures.
+    version_node = scons_env.Value(
+        f"oss-cad-suite={cache_params.toolchain_version}"
+    )
+    for target in targets:
+        scons_env.Depends(target, version_node)
+
+    # -- Once scons completes, report the hits and evict old entries.
+    exit_hooks.register(
+        _on_scons_exit,
+        scons_env.get_CacheDir(),
+        Path(cache_params.cache_dir),
+        cache_params.max_size,
+    )
+
+
+def _on_scons_exit(
+    cache_dir: CacheDir, cache_path: Path, max_size: int
+) -> None:
+    """Called when scons exists. Reports the cache hits/misses, updates the
+    accumulated counters and evict old entries if needed."""
+
+    # -- If there were no cache lookups, everything was up to date.
+    if cache_dir.requests == 0:
+        return
+
+    secho(
+        f"Artifact cache: {cache_dir.hits} hits, {cache_dir.misses} misses.",
+        fg="cyan",
+        color=True,
+    )
+
+    # -- Update the accumulated counters.
+    update_stats(cache_path, cache_dir.hits, cache_dir.misses)
+
+    # -- Evict least recently used artifacts, if needed.
+    evicted = prune_cache(cache_path, max_size)
+    if evicted:
+        secho(
+            f"Artifact cache: evicted {evicted} old files.",
+            fg="cyan",
+            color=True,
+        )
+
+
+def read_stats(cache_path: Path) -> Tuple[int, int]:
+    """Returns the accumulated (hits, misses) counters of the cache."""
+    try:
+        with open(cache_path / STATS_FILE, "r", encoding="utf8") as f:
+            data = json.load(f)
+        return (data.get("hits", 0), data.get("misses", 0))
+    except (OSError, ValueError):
+        return (0, 0)
+
+
+def update_stats(cache_path: Path, hits: int, misses: int) -> None:
+    """Adds the given counts to the accumulated counters of the cache."""
+
+    # -- Add to the current values.
+    old_hits, old_misses = read_stats(cache_path)
+    data = {"hits": old_hits + hits, "misses": old_misses + misses}
+
+    # -- Write the new values. We write to a temp file and then rename it to
+    # -- avoid partial writes by concurrent apio processes.
+    os.makedirs(cache_path, exist_ok=True)
+    tmp_file = cache_path / f"{STATS_FILE}.{os.getpid()}"
+    with open(tmp_file, "w", encoding="utf8") as f:
+        json.dump(data, f)
+    os.replace(tmp_file, cache_path / STATS_FILE)
+
+
+def prune_cache(cache_path: Path, max_size: int) -> int:
+    """Deletes least recently used files from the cache dir until its
+    total size is at most max_size bytes. Scons updates the modification
+    time of a cached file each time it's retrieved. Returns the number of
+    deleted files."""
+
+    # -- Collect the (mtime, size, path) of the cached files.
+    entries = []
+    total_size = 0
+    for root, _, files in os.walk(cache_path):
+        for file in files:
+            path = Path(root) / file
+            if path.parent == cache_path and file in NON_ARTIFACT_FILES:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                # -- Deleted by a concurrent apio process.
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+    # -- Delete the oldest files until the size is within the limit.
+    entries.sort()
+    evicted = 0
+    for _, size, path in entries:
+        if total_size <= max_size:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total_size -= size
+        evicted += 1
+
+    return evicted
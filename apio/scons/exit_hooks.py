@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Functions to call when scons completes. When scons runs as a subprocess
+they are called when the process exits, and when it runs within the apio
+process they are called when run_scons_in_process() returns.
+"""
+
+import atexit
+from typing import Callable, List, Tuple
+
+# -- The pending hooks, in the order they were registered.
+_hooks: List[Tuple[Callable, tuple]] = []
+
+
+def register(func: Callable, *args) -> None:
+    """Registers a function to call with the given args when scons
+    completes."""
+    _hooks.append((func, args))
+
+
+def run_hooks() -> None:
+    """Calls and clears the pending hooks."""
+    while _hooks:
+        func, args = _hooks.pop(0)
+        func(*args)
+
+
+atexit.register(run_hooks)
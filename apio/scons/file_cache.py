@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""A persistent cache of information that is extracted from the text of
+source files, e.g. by the dependency scanner. The cached information of a
+file is reused as long as the file size and modification time did not
+change, without reading the file. If they did change but the content hash
+is the same, the file is read but the information is not extracted again.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+# pylint: disable=too-many-instance-attributes
+class FileInfoCache:
+    """A cache of per file information, persisted in a json file."""
+
+    def __init__(self, cache_file: str, version: int):
+        """Loads the cache from the cache file, if exists. 'version'
+        should be changed when the format or the semantic of the cached
+        information change, to invalidate old cache files."""
+        # -- The file names are relative to the current directory, which
+        # -- may change before save() is called, e.g. in tests.
+        self.cache_file = os.path.abspath(cache_file)
+        self._base_dir = os.getcwd()
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._changed = False
+        self._lock = threading.Lock()
+
+        # -- Read the cached entries, if any. We ignore a missing, corrupted
+        # -- or incompatible cache file.
+        self._entries: Dict[str, Dict] = {}
+        try:
+            with open(cache_file, "r", encoding="utf8") as f:
+                data = json.load(f)
+            if data.get("version") == version:
+                self._entries = data["entries"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entries = {}
+
+    def get(
+        self, file_name: str, extract: Callable[[str], Dict]
+    ) -> Optional[Dict]:
+        """Returns the information of the given file. If not cached, it's
+        extracted from the file's text using the 'extract' function and
+        added to the cache. Returns None if the file doesn't exist."""
+
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(file_name)
+
+            # -- Fast path, the file was not touched.
+            if (
+                entry
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                self.hits += 1
+                return entry["info"]
+
+            # -- The file was touched. If the content didn't change, we
+            # -- don't need to extract the information again.
+            content = Path(file_name).read_bytes()
+            digest = hashlib.md5(content).hexdigest()
+            if entry and entry["digest"] == digest:
+                self.hits += 1
+                info = entry["info"]
+            else:
+                self.misses += 1
+                info = extract(content.decode("utf8", errors="replace"))
+
+            self._entries[file_name] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "digest": digest,
+                "info": info,
+            }
+            self._changed = True
+            return info
+
+    def save(self) -> None:
+        """Writes the cache file, if it changed. Entries of files that don't
+        exist anymore are dropped. The directory of the cache file, typically
+        the build directory, is not created if it doesn't exist."""
+
+        cache_dir = os.path.dirname(self.cache_file)
+        with self._lock:
+            if not self._changed or not os.path.isdir(cache_dir):
+                return
+
+            entries = {
+                name: entry
+                for name, entry in self._entries.items()
+                if os.path.exists(os.path.join(self._base_dir, name))
+            }
+            data = {"version": self.version, "entries": entries}
+
+            # -- We write to a temp file and then rename it to avoid partial
+            # -- writes.
+            tmp_file = f"{self.cache_file}.{os.getpid()}"
+            with open(tmp_file, "w", encoding="utf8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+            self._changed = False
+
+    def hit_rate_str(self) -> str:
+        """Returns a user friendly string with the hits statistics."""
+        total = self.hits + self.misses
+        percents = 100 * self.hits / total if total else 0
+        return f"{self.hits} hits, {self.misses} misses ({percents:.0f}%)"
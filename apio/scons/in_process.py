@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Execution of the apio scons handler within the apio process, rather than
+in a scons subprocess. This saves the startup time of the scons subprocess,
+which is significant for short commands such as 'apio lint' and 'apio test'.
+
+Scons keeps its state in a few global variables which assume a single scons
+session per process, so we reset them before each run. This is outside of
+the official scons API and may need to be adapted to future versions of
+scons.
+"""
+
+import os
+import sys
+from typing import List
+import SCons.Action
+import SCons.Node
+import SCons.Script
+import SCons.Script.Main
+import SCons.Script.SConsOptions
+import SCons.Node.FS
+import SCons.Node.Alias
+import SCons.Node.Python
+import SCons.Environment
+import SCons.Defaults
+import SCons.SConsign
+from apio.proto.apio_pb2 import SconsParams
+from apio.scons import scons_handler, exit_hooks
+
+
+def reset_scons_state() -> None:
+    """Reset the relevant SCons global variables to their initial state,
+    such that a new scons session can run in this process."""
+
+    # -- The Cons.Script.Main.OptionsParser variables contains the command
+    # -- line options of scons. We reset them here and tests can access
+    # -- them using SetOption() and GetOption().
+    parser = SCons.Script.SConsOptions.Parser("apio_in_process")
+    values = SCons.Script.SConsOptions.SConsValues(parser.get_default_values())
+    parser.parse_args(args=[], values=values)
+    SCons.Script.Main.OptionsParser = parser
+
+    # -- Reset the status of the previous session, if any.
+    SCons.Script.Main.exit_status = 0
+    SCons.Script.Main.this_build_status = 0
+
+    # -- Undo the effect of a previous dry run ('-n').
+    SCons.Action.execute_actions = True
+    SCons.Node.do_store_info = True
+
+    # -- Reset the file system, alias and value nodes and the signatures
+    # -- database.
+    SCons.Node.FS.default_fs = None
+    SCons.Node.Alias.default_ans.clear()
+    # pylint: disable-next=protected-access
+    SCons.Node.Python._memo_lookup_map.clear()
+    SCons.SConsign.Reset()
+
+    # -- Reset the default env. Apio doesn't use it. Once the default env is
+    # -- created, scons replaces the DefaultEnvironment() function with a
+    # -- fast getter so we restore the original function as well.
+    # pylint: disable=protected-access
+    SCons.Defaults._default_env = None
+    SCons.Defaults.DefaultEnvironment = SCons.Script.DefaultEnvironment
+
+    # -- Clear the SCons targets
+    SCons.Environment.CleanTargets = {}
+
+    # -- Clear the command line arguments and targets. Other modules hold
+    # -- references to these objects so we clear them in place.
+    SCons.Script.ARGUMENTS.clear()
+    SCons.Script.ARGLIST.clear()
+    SCons.Script.COMMAND_LINE_TARGETS.clear()
+    SCons.Script.DEFAULT_TARGETS.clear()
+    for target_list in [
+        SCons.Script.BUILD_TARGETS,
+        SCons.Script._build_plus_default,
+    ]:
+        del target_list[:]
+        for attr in ["_add_Default", "_clear"]:
+            if attr in vars(target_list):
+                delattr(target_list, attr)
+    SCons.Script._Get_Default_Targets = (
+        SCons.Script._Set_Default_Targets_Has_Not_Been_Called
+    )
+    # pylint: enable=protected-access
+
+
+def run_scons_in_process(args: List[str], scons_params: SconsParams) -> int:
+    """Runs scons with the given command line args within this process
+    and returns its exit code. The scons params are passed directly to the
+    scons handler rather than via the scons params file."""
+
+    # -- Bring scons to a starting state.
+    reset_scons_state()
+
+    # -- Scons reads its command line from sys.argv and may change the
+    # -- current directory, so we save them and restore when done. Scons
+    # -- also resets sys.stdout and sys.stderr to the process streams when
+    # -- done, which would bypass a redirection by the caller, e.g. by a
+    # -- test, on the next runs.
+    saved_argv = sys.argv
+    saved_cwd = os.getcwd()
+    saved_streams = (sys.stdout, sys.stderr)
+    sys.argv = ["scons"] + args
+    scons_handler.set_in_process_params(scons_params)
+
+    try:
+        # -- Scons always exits with SystemExit, also on success.
+        SCons.Script.Main.main()
+        exit_code = 0
+    except SystemExit as e:
+        # -- The code can be None, int or an error message.
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    finally:
+        # -- Run the exit hooks before restoring the current directory since
+        # -- they may use paths relative to the project dir.
+        exit_hooks.run_hooks()
+        scons_handler.set_in_process_params(None)
+        sys.argv = saved_argv
+        sys.stdout, sys.stderr = saved_streams
+        os.chdir(saved_cwd)
+
+    return exit_code
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Incremental linting of the 'apio lint' command. The project is linted
+per compilation unit, that is a top module and the files it depends on.
+The units are the top module of the project and each of the testbenches.
+The diagnostics of each unit are captured in a result file, such that
+scons relints only the units whose files changed, and the diagnostics of
+all the units are printed from the result files, whether cached or not.
+"""
+
+import os
+import re
+import json
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+from click import secho
+from SCons.Action import FunctionAction, Action
+from SCons.Node import executed
+from SCons.Node.FS import File
+from SCons.Node.Alias import Alias
+from SCons.Script.SConscript import SConsEnvironment
+from apio.scons.verilog_index import VerilogIndex
+from apio.scons.stage_timer import run_process
+
+# -- The suffix of the lint result files. E.g. _build/main.lint.
+LINT_RESULT_SUFFIX = ".lint"
+
+# -- The start of a verilator diagnostic, e.g. '%Warning-WIDTH: ...'.
+_DIAGNOSTIC_RE = re.compile(r"^%(Warning|Error)", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class LintUnit:
+    """A compilation unit that is linted independently."""
+
+    name: str  # The unit name, e.g. 'main' or 'main_tb'.
+    top_module: str  # The top module of the unit.
+    srcs: List[str]  # The files of the unit.
+
+    @property
+    def result_file(self) -> str:
+        """The result file of the unit, in the build directory."""
+        return os.path.join("_build", self.name + LINT_RESULT_SUFFIX)
+
+
+@dataclass
+class LintResult:
+    """The result of linting a single unit."""
+
+    unit: str  # The unit name.
+    exit_code: int  # The exit code of verilator.
+    output: str  # The captured stdout and stderr of verilator.
+
+    def write(self, file_path: str) -> None:
+        """Writes the result to a json file."""
+        with open(file_path, "w", encoding="utf8") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @staticmethod
+    def read(file_path: str) -> "LintResult":
+        """Reads a result that was written with write()."""
+        with open(file_path, "r", encoding="utf8") as f:
+            return LintResult(**json.load(f))
+
+
+def get_lint_units(
+    top_module: str,
+    explicit_top: bool,
+    synth_srcs: List[str],
+    test_srcs: List[str],
+    verilog_index: VerilogIndex,
+) -> List[LintUnit]:
+    """Returns the lint units of the project. If 'explicit_top' is True,
+    the user asked to lint only 'top_module' and its dependencies. If the
+    file of the top module can't be found, a single unit with all the files
+    is returned, as in a non incremental lint."""
+
+    all_srcs = synth_srcs + test_srcs
+    top_files = verilog_index.module_files(top_module)
+    if not top_files:
+        return [LintUnit(top_module, top_module, all_srcs)]
+
+    # -- The unit of the top module.
+    units = [
+        LintUnit(
+            top_module,
+            top_module,
+            top_files + verilog_index.dependencies(top_files, all_srcs),
+        )
+    ]
+
+    # -- A unit for each testbench, unless linting a specific module.
+    if not explicit_top:
+        for tb in sorted(test_srcs):
+            name, _ = os.path.splitext(tb)
+            units.append(
+                LintUnit(
+                    name,
+                    _testbench_module(tb, name, verilog_index),
+                    verilog_index.dependencies([tb], synth_srcs) + [tb],
+                )
+            )
+
+    return units
+
+
+def _testbench_module(tb: str, name: str, verilog_index: VerilogIndex) -> str:
+    """Returns the top module of a testbench file. By convention, it has
+    the name of the file."""
+    entry = verilog_index.entries.get(tb)
+    if entry and entry.modules and name not in entry.modules:
+        return entry.modules[0]
+    return name
+
+
+def lint_unit_action(lint_cmd: str) -> FunctionAction:
+    """Returns a scons action that runs the given verilator command and
+    captures its result. The command uses $SOURCES and $LINT_TOP_MODULE,
+    which is set per target. The target is the result file. Failures are
+    recorded in the result file rather than failing the action, such that
+    the rest of the units keep linting."""
+
+    def lint_unit(
+        source: List[File],
+        target: List[File],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+        command = env.subst(lint_cmd, target=target, source=source)
+        exit_code, output = run_process(command, env=env["ENV"], capture=True)
+        LintResult(
+            unit=env["LINT_UNIT"], exit_code=exit_code, output=output
+        ).write(str(target[0]))
+        return 0
+
+    return Action(
+        lint_unit,
+        "Linting $LINT_UNIT",
+        varlist=["LINT_TOP_MODULE", "LINT_UNIT"],
+    )
+
+
+def lint_summary_action(units: List[LintUnit]) -> FunctionAction:
+    """Returns a scons action that prints the diagnostics of the given
+    units, including the cached results of the units that scons found to
+    be up to date. Diagnostics that are reported by more than one unit,
+    e.g. in a module that is used by multiple testbenches, are printed
+    once. The action fails if verilator failed for any of the units."""
+
+    def print_summary(
+        source: List[Alias],
+        target: List[Alias],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+        _ = (source, target)  # Unused
+
+        printed = set()
+        failed = []
+        cached = 0
+        for unit in units:
+            result = LintResult.read(unit.result_file)
+            if env.File(unit.result_file).get_state() != executed:
+                cached += 1
+            if result.exit_code != 0:
+                failed.append(unit.name)
+            for diagnostic in _split_diagnostics(result.output):
+                if diagnostic not in printed:
+                    printed.add(diagnostic)
+                    secho(diagnostic, nl=False)
+
+        cached_note = f" ({cached} cached)" if cached else ""
+        if failed:
+            secho(
+                f"Error: lint failed for {', '.join(failed)}{cached_note}.",
+                fg="red",
+                color=True,
+            )
+            return 1
+
+        secho(f"Linted {len(units)} units{cached_note}.", color=True)
+        return 0
+
+    return Action(print_summary, "Summarizing lint results.")
+
+
+def _split_diagnostics(output: Optional[str]) -> List[str]:
+    """Splits verilator output into diagnostics, each with its context
+    lines. Text before the first diagnostic is returned as is."""
+    if not output:
+        return []
+    starts = [m.start() for m in _DIAGNOSTIC_RE.finditer(output)]
+    bounds = sorted(set([0] + starts + [len(output)]))
+    return [output[a:b] for a, b in zip(bounds, bounds[1:])]
@@ -11,17 +11,23 @@
 """Apio scons related utilities.."""
 
 from dataclasses import dataclass
-from click import secho
 from SCons.Builder import BuilderBase
-from SCons.Action import Action
 from SCons.Script import Builder
-from apio.scons.apio_env import ApioEnv, TARGET, BUILD_DIR_SEP
-from apio.proto.apio_pb2 import GraphOutputType
+from apio.scons.apio_env import ApioEnv, BUILD_DIR_SEP
 from apio.scons.plugin_util import (
     SRC_SUFFIXES,
     verilog_src_scanner,
     get_constraint_file,
+    basename,
+    is_verilator_sim,
+    waves_suffix,
 )
+from apio.scons.testbench_runner import (
+    RESULT_SUFFIX,
+    testbench_run_action,
+    sweep_point_action,
+)
+from apio.scons.pnr_seeds import pnr_seeds_action
 
 
 # -- Supported apio graph types.
@@ -69,14 +75,75 @@ class PluginBase:
             )
         return self._constrain_file
 
+    def elaborate_builder(self, top_module: str) -> BuilderBase:
+        """Creates and returns the elaborate builder. It parses the verilog
+        sources and elaborates the hierarchy of the given top module into
+        an RTLIL checkpoint file. The checkpoint doesn't depend on the
+        architecture or the synth options, so the synth and the graph
+        builders start from it rather than from the sources."""
+        params = self.apio_env.params
+
+        # -- We don't use 'hierarchy -check' since the architecture's cells
+        # -- library, e.g. for PLL primitives, is loaded only by the synth.
+        return Builder(
+            action=(
+                'yosys -p "hierarchy -top {0}; write_rtlil $TARGET" {1} '
+                "$SOURCES"
+            ).format(
+                top_module,
+                "" if params.verbosity.all or params.verbosity.synth else "-q",
+            ),
+            suffix=".il",
+            src_suffix=SRC_SUFFIXES,
+            source_scanner=self.verilog_src_scanner,
+        )
+
     def synth_builder(self) -> BuilderBase:
-        """Creates and returns the synth builder."""
+        """Creates and returns the synth builder. Its source is the RTLIL
+        checkpoint of the elaborate builder."""
         raise NotImplementedError("Implement in subclass.")
 
     def pnr_builder(self) -> BuilderBase:
         """Creates and returns the pnr builder."""
         raise NotImplementedError("Implement in subclass.")
 
+    def make_pnr_builder(
+        self, pnr_cmd: str, suffix: str, src_suffix: str
+    ) -> BuilderBase:
+        """A helper for the subclasses to create the pnr builder from the
+        nextpnr command. The command should use $SOURCE for the synth
+        output, $TARGET for the pnr output and ${TARGETS[1]} for the pnr
+        report. With 'apio build --seeds', the command is run with multiple
+        seeds and the best result is used."""
+
+        # -- We use an emmiter to add to the builder a second output file.
+        report_file = self.apio_env.target + ".pnr"
+
+        def emitter(target, source, env):
+            _ = env  # Unused
+            target.append(report_file)
+            return target, source
+
+        # -- The multi seed parameters, if any. Only 'apio build' has them.
+        params = self.apio_env.params
+        if params.target.HasField("build") and params.target.build.seeds > 1:
+            build_params = params.target.build
+            action = pnr_seeds_action(
+                pnr_cmd,
+                seeds=build_params.seeds,
+                jobs=build_params.jobs or build_params.seeds,
+                fmax_target=build_params.fmax_target,
+            )
+        else:
+            action = pnr_cmd
+
+        return Builder(
+            action=action,
+            suffix=suffix,
+            src_suffix=src_suffix,
+            emitter=emitter,
+        )
+
     def bitstream_builder(self) -> BuilderBase:
         """Creates and returns the bitstream builder."""
         raise NotImplementedError("Implement in subclass.")
@@ -86,7 +153,8 @@ class PluginBase:
         raise NotImplementedError("Implement in subclass.")
 
     def testbench_run_builder(self) -> BuilderBase:
-        """Creates and returns the testbench run builder."""
+        """Creates and returns the testbench run builder. The waveforms
+        target has the suffix of the selected waves format."""
 
         # -- Sanity checks
         assert self.apio_env.targeting("sim", "test")
@@ -94,9 +162,54 @@ class PluginBase:
             "sim"
         ) or self.apio_env.params.target.HasField("test")
 
+        suffix = waves_suffix(self.apio_env)
+
+        # -- For 'apio sim' we write the waveforms for gtkwave.
+        if self.apio_env.targeting("sim"):
+            return Builder(
+                action="vvp $SOURCE {0} -dumpfile=$TARGET".format(
+                    "-fst" if suffix == ".fst" else ""
+                ),
+                suffix=suffix,
+                src_suffix=".out",
+            )
+
+        # -- For 'apio test' we capture the output and the result of each
+        # -- testbench. If no waveforms are written, e.g. with verilator,
+        # -- the result file is the only target.
+        verilator = is_verilator_sim(self.apio_env)
+        if not suffix:
+            return Builder(
+                action=testbench_run_action(verilator=verilator, waves=False),
+                suffix=RESULT_SUFFIX,
+                src_suffix=".out",
+            )
+
+        # -- Otherwise we use an emitter to add the result file as a
+        # -- second target.
+        def emitter(target, source, env):
+            _ = env  # Unused
+            target.append(basename(str(target[0])) + RESULT_SUFFIX)
+            return target, source
+
+        return Builder(
+            action=testbench_run_action(verilator=verilator, waves=True),
+            suffix=suffix,
+            src_suffix=".out",
+            emitter=emitter,
+        )
+
+    def testbench_sweep_builder(self) -> BuilderBase:
+        """Creates and returns the builder that runs a compiled testbench
+        at a sweep point of 'apio test --sweep'. The target is the result
+        file of the point."""
+
+        # -- Sanity checks
+        assert self.apio_env.targeting("test")
+        assert self.apio_env.params.target.test.sweep_points
+
         return Builder(
-            action="vvp $SOURCE -dumpfile=$TARGET",
-            suffix=".vcd",
+            action=sweep_point_action(is_verilator_sim(self.apio_env)),
             src_suffix=".out",
         )
 
@@ -121,66 +234,36 @@ class PluginBase:
             else params.project.top_module
         )
 
+        # -- The source is the RTLIL checkpoint of the elaborate builder.
         return Builder(
             action=(
-                'yosys -f verilog -p "show -format dot -colors 1 '
-                '-prefix {0}hardware {1}" {2} $SOURCES'
+                'yosys -p "show -format dot -colors 1 '
+                '-prefix {0}hardware {1}" {2} $SOURCE'
             ).format(
                 BUILD_DIR_SEP,
                 top_module,
                 "" if params.verbosity.all else "-q",
             ),
             suffix=".dot",
-            src_suffix=SRC_SUFFIXES,
-            source_scanner=self.verilog_src_scanner,
+            src_suffix=".il",
         )
 
     def graphviz_renderer_builder(self) -> BuilderBase:
         """Creates and returns the graphviz renderer builder. Should
-        be called only when serving the graph command."""
+        be called only when serving the graph command. The output type,
+        e.g. 'svg', is set per target by the GRAPH_TYPE variable such that
+        multiple types can be rendered from the same .dot file."""
 
         # -- Sanity checks.
         assert self.apio_env.targeting("graph")
         assert self.apio_env.params.target.HasField("graph")
 
-        # -- Shortcuts.
-        apio_env = self.apio_env
-        params = apio_env.params
-        graph_params = params.target.graph
-
-        # -- Determine the output type string.
-        type_map = {
-            GraphOutputType.PDF: "pdf",
-            GraphOutputType.PNG: "png",
-            GraphOutputType.SVG: "svg",
-        }
-        type_str = type_map[graph_params.output_type]
-        assert type_str, f"Unexpected graph type {graph_params.output_type}"
-
-        def completion_action(source, target, env):  # noqa
-            """Action function that prints a completion message."""
-            _ = (source, target, env)  # Unused
-            secho(
-                f"Generated {TARGET}.{type_str}",
-                fg="green",
-                bold=True,
-                color=True,
-            )
-
-        actions = [
-            f"dot -T{type_str} $SOURCES -o $TARGET",
-            Action(completion_action, "completion_action"),
-        ]
-
-        graphviz_builder = Builder(
+        return Builder(
             # Expecting graphviz dot to be installed and in the path.
-            action=actions,
-            suffix=f".{type_str}",
+            action="dot -T$GRAPH_TYPE $SOURCES -o $TARGET",
             src_suffix=".dot",
         )
 
-        return graphviz_builder
-
     def lint_config_builder(self) -> BuilderBase:
         """Creates and returns the lint config builder."""
         raise NotImplementedError("Implement in subclass.")
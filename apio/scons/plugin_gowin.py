@@ -16,7 +16,7 @@
 from pathlib import Path
 from SCons.Script import Builder
 from SCons.Builder import BuilderBase
-from apio.scons.apio_env import ApioEnv, TARGET
+from apio.scons.apio_env import ApioEnv
 from apio.scons.plugin_base import PluginBase, ArchPluginInfo
 from apio.scons.plugin_util import (
     SRC_SUFFIXES,
@@ -24,6 +24,8 @@ from apio.scons.plugin_util import (
     has_testbench_name,
     source_file_issue_action,
     iverilog_action,
+    verilator_sim_action,
+    is_verilator_sim,
     basename,
     make_verilator_config_builder,
 )
@@ -61,15 +63,14 @@ class PluginGowin(PluginBase):
         return Builder(
             action=(
                 'yosys -p "synth_gowin -top {0} {1} -json $TARGET" {2} '
-                "$SOURCES"
+                "$SOURCE"
             ).format(
                 params.project.top_module,
                 params.project.yosys_synth_extra_options,
                 "" if params.verbosity.all or params.verbosity.synth else "-q",
             ),
             suffix=".json",
-            src_suffix=SRC_SUFFIXES,
-            source_scanner=self.verilog_src_scanner,
+            src_suffix=".il",
         )
 
     # @overrides
@@ -79,28 +80,20 @@ class PluginGowin(PluginBase):
         apio_env = self.apio_env
         params = apio_env.params
 
-        # -- We use an emmiter to add to the builder a second output file.
-        def emitter(target, source, env):
-            _ = env  # Unused
-            target.append(TARGET + ".pnr")
-            return target, source
-
         # -- Create the builder.
-        return Builder(
-            action=(
+        return self.make_pnr_builder(
+            (
                 "nextpnr-himbaechel --device {0} --json $SOURCE "
-                "--write $TARGET --report {1} --vopt family={2} "
-                "--vopt cst={3} {4}"
+                "--write $TARGET --report ${{TARGETS[1]}} "
+                "--vopt family={1} --vopt cst={2} {3}"
             ).format(
                 params.fpga_info.part_num,
-                TARGET + ".pnr",
                 params.fpga_info.gowin.family,
                 self.constrain_file(),
                 "" if params.verbosity.all or params.verbosity.pnr else "-q",
             ),
             suffix=".pnr.json",
             src_suffix=".json",
-            emitter=emitter,
         )
 
     # @overrides
@@ -127,7 +120,8 @@ class PluginGowin(PluginBase):
         assert params.target.HasField("sim") or params.target.HasField("test")
 
         # -- We use a generator because we need a different action
-        # -- string for sim and test.
+        # -- string for sim and test, and for the iverilog and verilator
+        # -- simulators.
         def action_generator(source, target, env, for_signature):
             _ = (source, env, for_signature)  # Unused
             # Extract testbench name from target file name.
@@ -140,12 +134,22 @@ class PluginGowin(PluginBase):
                 # -- Scan source files for issues.
                 source_file_issue_action(),
                 # -- Perform the actual test or sim compilation.
-                iverilog_action(
-                    verbose=params.verbosity.all,
-                    vcd_output_name=testbench_name,
-                    is_interactive=apio_env.targeting("sim"),
-                    lib_dirs=[self.yosys_lib_dir],
-                    lib_files=[self.yosys_lib_file],
+                (
+                    verilator_sim_action(
+                        apio_env,
+                        verbose=params.verbosity.all,
+                        testbench_name=testbench_name,
+                        lib_dirs=[self.yosys_lib_dir],
+                        lib_files=[self.yosys_lib_file],
+                    )
+                    if is_verilator_sim(apio_env)
+                    else iverilog_action(
+                        verbose=params.verbosity.all,
+                        vcd_output_name=testbench_name,
+                        is_interactive=apio_env.targeting("sim"),
+                        lib_dirs=[self.yosys_lib_dir],
+                        lib_files=[self.yosys_lib_file],
+                    )
                 ),
             ]
             return action
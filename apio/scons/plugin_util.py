@@ -14,12 +14,12 @@
 
 import sys
 import os
+import shutil
 import re
-import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Tuple, Dict, Optional, Union
-from click import secho, style
+from click import secho
 from SCons import Scanner
 from SCons.Builder import Builder
 from SCons.Action import FunctionAction, Action
@@ -29,12 +29,40 @@ from SCons.Node import NodeList
 from SCons.Node.Alias import Alias
 import debugpy
 from apio.scons.apio_env import ApioEnv, TARGET, BUILD_DIR_SEP
+from apio.scons.verilog_index import VerilogIndex
+from apio.scons.file_cache import FileInfoCache
+from apio.scons import exit_hooks
+from apio.scons.lint_runner import lint_unit_action
+from apio.proto.apio_pb2 import (
+    GraphOutputType,
+    GraphParams,
+    SimEngine,
+    WavesFormat,
+)
 
 # -- A list with the file extensions of the verilog source files.
 SRC_SUFFIXES = [".v", ".sv"]
 
 TESTBENCH_HINT = "Testbench file names must end with '_tb.v' or '_tb.sv."
 
+# -- The file with the cached results of the verilog dependency scanner.
+SCANNER_CACHE_FILE = BUILD_DIR_SEP + "scanner_cache.json"
+
+# -- Change when the scanner regexes change, to invalidate old cache files.
+SCANNER_CACHE_VERSION = 2
+
+# -- List of required and optional files that may require a rebuild if
+# -- changed.
+CORE_DEPENDENCIES = [
+    "apio.ini",
+    "boards.jsonc",
+    "fpgas.jsonc",
+    "programmers.jsonc",
+]
+
+# -- The suffixes of verilog include files.
+INCLUDE_SUFFIXES = [".vh", ".svh"]
+
 
 def secho_lines(colors: List[str], lines: List[str]) -> None:
     """Secho list of lines with matching colors. If running out of colors,
@@ -111,6 +139,12 @@ def get_constraint_file(
 
     Returns the file name if found or a default name otherwise otherwise.
     """
+    # A board specific file, e.g. 'icebreaker.pcf', has precedence. This
+    # allows to build a project for multiple boards.
+    board_file = f"{apio_env.params.project.board_id}{file_ext}"
+    if os.path.isfile(board_file):
+        return board_file
+
     # Files in alphabetical order.
     files = apio_env.scons_env.Glob(f"*{file_ext}")
     n = len(files)
@@ -155,22 +189,33 @@ def verilog_src_scanner(apio_env: ApioEnv) -> Scanner.Base:
         r'`\s*include\s+["]([a-zA-Z_./]+)["]', re.M
     )
 
-    # A regex for inclusion via $readmemh()
+    # A regex for inclusion via $readmemh() or $readmemb()
     # Example
     #   Test:      '$readmemh("my_data.hex", State_buff);'
     #   Capture:   'my_data.hex'
     readmemh_reference_re = re.compile(
-        r"\$readmemh\([\'\"]([^\'\"]+)[\'\"]", re.M
+        r"\$readmem[hb]\([\'\"]([^\'\"]+)[\'\"]", re.M
     )
 
-    # -- List of required and optional files that may require a rebuild if
-    # -- changed.
-    core_dependencies = [
-        "apio.ini",
-        "boards.jsonc",
-        "fpgas.jsonc",
-        "programmers.jsonc",
-    ]
+    def extract_candidates(file_content: str) -> Dict[str, List[str]]:
+        """Returns the file references in a verilog file text."""
+        candidates_set = set()
+
+        # Get verilog includes references.
+        candidates_set.update(verilog_include_re.findall(file_content))
+
+        # Get $readmemh() and $readmemb() function references.
+        candidates_set.update(readmemh_reference_re.findall(file_content))
+
+        # Get IceStudio references.
+        candidates_set.update(icestudio_list_re.findall(file_content))
+
+        return {"candidates": sorted(candidates_set)}
+
+    # -- The file references of each source file are cached across runs,
+    # -- such that unchanged files are not read and scanned again.
+    scanner_cache = FileInfoCache(SCANNER_CACHE_FILE, SCANNER_CACHE_VERSION)
+    exit_hooks.register(_on_scanner_exit, scanner_cache, apio_env.is_debug)
 
     def verilog_src_scanner_func(
         file_node: File, env: SConsEnvironment, ignored_path
@@ -194,19 +239,13 @@ def verilog_src_scanner(apio_env: ApioEnv) -> Scanner.Base:
 
         # Create the initial set with the core dependencies.
         candidates_set = set()
-        candidates_set.update(core_dependencies)
-
-        # Read the file. This returns [] if the file doesn't exist.
-        file_content = file_node.get_text_contents()
-
-        # Get verilog includes references.
-        candidates_set.update(verilog_include_re.findall(file_content))
-
-        # Get $readmemh() function references.
-        candidates_set.update(readmemh_reference_re.findall(file_content))
+        candidates_set.update(CORE_DEPENDENCIES)
 
-        # Get IceStudio references.
-        candidates_set.update(icestudio_list_re.findall(file_content))
+        # Get the file references, possibly from the cache. This returns
+        # None if the file doesn't exist.
+        info = scanner_cache.get(str(file_node), extract_candidates)
+        if info:
+            candidates_set.update(info["candidates"])
 
         # Filter out candidates that don't have a matching files to prevert
         # breakign the build. This handle for example the case where the
@@ -237,6 +276,37 @@ def verilog_src_scanner(apio_env: ApioEnv) -> Scanner.Base:
     return apio_env.scons_env.Scanner(function=verilog_src_scanner_func)
 
 
+def testbench_data_deps(
+    apio_env: ApioEnv, scanner: Scanner.Base, srcs: List[str]
+) -> List[File]:
+    """Returns the files that the given testbench sources depend on and that
+    are read by the simulation rather than by the compiler, e.g. the data
+    files of $readmemh(). A change of these files doesn't change the
+    compiled testbench, so the testbench runs should depend on them."""
+    scons_env = apio_env.scons_env
+    result = set()
+    for src in srcs:
+        for node in scanner(scons_env.File(src), scons_env):
+            if node.name in CORE_DEPENDENCIES:
+                continue
+            if Path(node.name).suffix in SRC_SUFFIXES + INCLUDE_SUFFIXES:
+                continue
+            result.add(node)
+    return sorted(result, key=str)
+
+
+def _on_scanner_exit(scanner_cache: FileInfoCache, is_debug: bool) -> None:
+    """Called when scons exits. Saves the scanner cache and reports its
+    hit rate in debug mode."""
+    scanner_cache.save()
+    if is_debug and (scanner_cache.hits or scanner_cache.misses):
+        secho(
+            f"Scanner cache: {scanner_cache.hit_rate_str()}.",
+            fg="blue",
+            color=True,
+        )
+
+
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-positional-arguments
 def verilator_lint_action(
@@ -260,14 +330,8 @@ def verilator_lint_action(
     params = apio_env.params
     lint_params = params.target.lint
 
-    # -- Determine top module.
-    top_module = (
-        lint_params.top_module
-        if lint_params.top_module
-        else params.project.top_module
-    )
-
-    # -- Construct the action
+    # -- Construct the action. The top module is set per lint unit, see
+    # -- lint_runner.py.
     action = (
         "verilator_bin --lint-only --quiet --bbox-unsup --timing "
         "-Wno-TIMESCALEMOD -Wno-MULTITOP "
@@ -277,14 +341,14 @@ def verilator_lint_action(
         "-Wno-style" if lint_params.verilator_no_style else "",
         map_params(lint_params.verilator_no_warns, "-Wno-{}"),
         map_params(lint_params.verilator_warns, "-Wwarn-{}"),
-        f"--top-module {top_module}",
+        "--top-module $LINT_TOP_MODULE",
         map_params(extra_params, "{}"),
         map_params(lib_dirs, '-I"{}"'),
         TARGET + ".vlt",
         map_params(lib_files, '"{}"'),
     )
 
-    return [source_file_issue_action(), action]
+    return [source_file_issue_action(), lint_unit_action(action)]
 
 
 @dataclass(frozen=True)
@@ -299,13 +363,13 @@ class SimulationConfig:
 def waves_target(
     api_env: ApioEnv,
     name: str,
-    vcd_file_target: NodeList,
+    waves_file_target: NodeList,
     sim_config: SimulationConfig,
     allways_build: bool = False,
 ) -> List[Alias]:
     """Construct a target to launch the QTWave signal viwer.
-    vcd_file_target is the simulator target that generated the vcd file
-    with the signals. Returns the new targets.
+    waves_file_target is the simulator target that generated the .vcd or
+    .fst file with the signals. Returns the new targets.
     """
 
     # -- Construct the commands list.
@@ -324,14 +388,14 @@ def waves_target(
     commands.append(
         "gtkwave {0} {1} {2}.gtkw".format(
             '--rcvar "splash_disable on" --rcvar "do_initial_zoom_fit 1"',
-            vcd_file_target[0],
+            waves_file_target[0],
             sim_config.testbench_name,
         )
     )
 
     target = api_env.alias(
         name,
-        source=vcd_file_target,
+        source=waves_file_target,
         action=commands,
         allways_build=allways_build,
     )
@@ -357,11 +421,13 @@ def get_sim_config(
     testbench: str,
     synth_srcs: List[str],
     test_srcs: List[str],
+    verilog_index: VerilogIndex,
 ) -> SimulationConfig:
     """Returns a SimulationConfig for a sim command. 'testbench' is
     an optional testbench file name. 'synth_srcs' and 'test_srcs' are the
     all the project's synth and testbench files found in the project as
-    returne by source_files()."""
+    returne by source_files(). 'verilog_index' is used to select the synth
+    files that the testbench needs."""
 
     # -- Handle the testbench file selection. The end result is a single
     # -- testbench file name in testbench that we simulate, or a fatal error.
@@ -404,11 +470,11 @@ def get_sim_config(
     # -- This should not happen. If it does, it's a programming error.
     assert testbench, "get_sim_config(): Missing testbench file name"
 
-    # -- Construct a SimulationParams with all the synth files + the
-    # -- testbench file.
+    # -- Construct a SimulationParams with the synth files the testbench
+    # -- needs + the testbench file.
     testbench_name = basename(testbench)
     build_testbench_name = BUILD_DIR_SEP + testbench_name
-    srcs = synth_srcs + [testbench]
+    srcs = verilog_index.dependencies([testbench], synth_srcs) + [testbench]
     return SimulationConfig(testbench_name, build_testbench_name, srcs)
 
 
@@ -416,12 +482,15 @@ def get_tests_configs(
     testbench: str,
     synth_srcs: List[str],
     test_srcs: list[str],
+    verilog_index: VerilogIndex,
 ) -> List[SimulationConfig]:
     """Return a list of SimulationConfigs for each of the testbenches that
     need to be run for a 'apio test' command. If testbench is empty,
     all the testbenches in test_srcs will be tested. Otherwise, only the
     testbench in testbench will be tested. synth_srcs and test_srcs are
-    source and test file lists as returned by source_files()."""
+    source and test file lists as returned by source_files(). Each
+    testbench is compiled only with the synth files it needs, as determined
+    by 'verilog_index'."""
     # List of testbenches to be tested.
 
     # -- Handle the testbench files selection. The end result is a list of one
@@ -455,7 +524,7 @@ def get_tests_configs(
     for tb in testbenches:
         testbench_name = basename(tb)
         build_testbench_name = BUILD_DIR_SEP + testbench_name
-        srcs = synth_srcs + [tb]
+        srcs = verilog_index.dependencies([tb], synth_srcs) + [tb]
         configs.append(
             SimulationConfig(testbench_name, build_testbench_name, srcs)
         )
@@ -549,80 +618,39 @@ def source_files(apio_env: ApioEnv) -> Tuple[List[str], List[str]]:
     return (synth_srcs, test_srcs)
 
 
-# pylint: disable=too-many-locals
-def _print_pnr_report(
-    json_txt: str,
-    clk_name_index: int,
-    verbose: bool,
-) -> None:
-    """Accepts the text of the pnr json report and prints it in
-    a user friendly way. Used by the 'apio report' command."""
-    # -- Json text to tree of Dicts.
-    report: Dict[str, any] = json.loads(json_txt)
-
-    # --- Report utilization
-    secho("")
-    secho("UTILIZATION:", fg="cyan", bold=True, color=True)
-    utilization = report["utilization"]
-    for resource, vals in utilization.items():
-        available = vals["available"]
-        used = vals["used"]
-        percents = int(100 * used / available)
-        fg = "magenta" if used > 0 else None
-        secho(
-            f"{resource:>20}: {used:5} {available:5} {percents:5}%",
-            fg=fg,
-            color=True,
-        )
-
-    # -- Report max clock speeds.
-    # --
-    # -- NOTE: As of Oct 2024, some projects do not generate timing
-    # -- information and this is being investigated.
-    # -- See https://github.com/FPGAwars/icestudio/issues/774 for details.
-    secho("")
-    secho("CLOCKS:", fg="cyan", bold=True, color=True)
-    clocks = report["fmax"]
-    if len(clocks) > 0:
-        for clk_net, vals in clocks.items():
-            # -- Extract clock name from the net name.
-            clk_signal = clk_net.split("$")[clk_name_index]
-
-            # -- Report speed.
-            max_mhz = vals["achieved"]
-            styled_max_mhz = style(f"{max_mhz:7.2f}", fg="magenta")
-            secho(f"{clk_signal:>20}: {styled_max_mhz} Mhz max")
-
-    # -- For now we ignore the critical path report in the pnr report and
-    # -- refer the user to the pnr verbose output.
-    secho("")
-    if not verbose:
-        secho(
-            "Use 'apio report --verbose' for more details.",
-            fg="yellow",
-            color=True,
-        )
-
-
-def report_action(clk_name_index: int, verbose: bool) -> FunctionAction:
-    """Returns a SCons action to format and print the PNR reort from the
-    PNR json report file. Used by the 'apio report' command.
-    'script_id' identifies the calling SConstruct script and 'verbose'
-    indicates if the --verbose flag was invoked."""
-
-    def print_pnr_report(
+def get_graph_types(graph_params: GraphParams) -> List[str]:
+    """Returns the graph output types to render, e.g. ['svg', 'png'],
+    without duplicates. The default is svg."""
+    type_map = {
+        GraphOutputType.PDF: "pdf",
+        GraphOutputType.PNG: "png",
+        GraphOutputType.SVG: "svg",
+    }
+    result = []
+    for output_type in graph_params.output_types:
+        type_str = type_map.get(output_type)
+        assert type_str, f"Unexpected graph type {output_type}"
+        if type_str not in result:
+            result.append(type_str)
+    return result or ["svg"]
+
+
+def graph_completion_action() -> FunctionAction:
+    """Returns a SCons action that prints the rendered graph files, which
+    are the sources of the 'graph' alias. Since the alias is always built,
+    the message is printed also if the files were up to date."""
+
+    def print_completion(
         source: List[File],
         target: List[Alias],
         env: SConsEnvironment,
     ):
-        """Action function. Loads the pnr json report and print in a user
-        friendly way."""
+        """Action function."""
         _ = (target, env)  # Unused
-        json_file: File = source[0]
-        json_txt: str = json_file.get_text_contents()
-        _print_pnr_report(json_txt, clk_name_index, verbose)
+        for file in source:
+            secho(f"Generated {file}", fg="green", bold=True, color=True)
 
-    return Action(print_pnr_report, "Formatting pnr report.")
+    return Action(print_completion, "completion_action")
 
 
 def get_programmer_cmd(apio_env: ApioEnv) -> str:
@@ -694,6 +722,79 @@ def iverilog_action(
     return action
 
 
+def is_verilator_sim(apio_env: ApioEnv) -> bool:
+    """Returns True if the testbenches are compiled and run with verilator
+    rather than with iverilog. Only 'apio test' supports verilator, 'apio
+    sim' always uses iverilog."""
+    params = apio_env.params
+    return (
+        apio_env.targeting("test")
+        and params.target.test.sim_engine == SimEngine.VERILATOR
+    )
+
+
+def waves_suffix(apio_env: ApioEnv) -> Optional[str]:
+    """Returns the suffix of the waveforms files of the 'sim' or 'test'
+    target, '.vcd' or '.fst', or None if the waveforms are not written,
+    e.g. by default with 'apio test' and always with verilator."""
+    params = apio_env.params
+    if apio_env.targeting("sim"):
+        waves_format = params.target.sim.waves_format
+    elif is_verilator_sim(apio_env):
+        return None
+    else:
+        waves_format = params.target.test.waves_format
+    return {WavesFormat.WAVES_VCD: ".vcd", WavesFormat.WAVES_FST: ".fst"}.get(
+        waves_format
+    )
+
+
+def verilator_sim_action(
+    apio_env: ApioEnv,
+    *,
+    verbose: bool,
+    testbench_name: str,
+    extra_params: List[str] = None,
+    lib_dirs: List[Path] = None,
+    lib_files: List[Path] = None,
+) -> str:
+    """Construct a verilator scons action string that compiles a testbench
+    into an executable. The target is the executable, and the generated C++
+    and object files are kept in a per testbench directory next to it, such
+    that unchanged files are not recompiled on the next build. If ccache is
+    available, verilator uses it also for the object files.
+    * testbench_name: The testbench name, e.g. '_build/main_tb'. The top
+      module is the base name, e.g. 'main_tb', and the macro VCD_OUTPUT is
+      set as with iverilog.
+    * extra_params: Optional additional arguments.
+    * libs_dirs: Optional directories for include search.
+    * lib_files: Optional additional files to compile, e.g. cells_sim.v.
+    """
+
+    # -- Verilator's generated makefile picks ccache from this env var.
+    if "OBJCACHE" not in apio_env.scons_env["ENV"] and shutil.which("ccache"):
+        apio_env.scons_env["ENV"]["OBJCACHE"] = "ccache"
+
+    # Escaping for windows. '\' -> '\\'
+    escaped_vcd_output_name = testbench_name.replace("\\", "\\\\")
+
+    action = (
+        "verilator_bin --binary --timing -Wno-fatal -Wno-lint -Wno-style "
+        "-Wno-TIMESCALEMOD -Wno-MULTITOP {0} --top-module {1} {2} {3} {4} "
+        '--Mdir "{5}.vdir" -o "${{TARGET.abspath}}" {6} $SOURCES'
+    ).format(
+        "" if verbose else "--quiet",
+        os.path.basename(testbench_name),
+        f"-DVCD_OUTPUT={escaped_vcd_output_name}",
+        map_params(extra_params, "{}"),
+        map_params(lib_dirs, '-I"{}"'),
+        testbench_name,
+        map_params(lib_files, '"{}"'),
+    )
+
+    return action
+
+
 def basename(file_name: str) -> str:
     """Given a file name, returns it with the extension removed."""
     result, _ = os.path.splitext(file_name)
@@ -742,6 +843,50 @@ def make_verilator_config_builder(lib_path: Path):
     )
 
 
+# -- The plusarg that sets the simulated time limit of a testbench, in ns,
+# -- and the message that the watchdog prints when the limit is reached.
+SIM_TIME_LIMIT_PLUSARG = "APIO_MAX_SIM_TIME"
+SIM_TIME_LIMIT_MARKER = "APIO: simulated time limit reached"
+
+# -- The watchdog module that enforces the simulated time limit. It's
+# -- compiled with the testbenches as an additional top module and does
+# -- nothing if the plusarg is not given. The `resetall prevents its
+# -- timescale from applying to files that are compiled after it.
+WATCHDOG_TEXT = f"""// Generated by apio, don't edit.
+`timescale 1ns / 1ps
+module apio_watchdog;
+  reg [63:0] limit;
+  initial begin
+    if ($value$plusargs("{SIM_TIME_LIMIT_PLUSARG}=%d", limit)) begin
+      #(limit);
+      $display("{SIM_TIME_LIMIT_MARKER} (%0d ns).", limit);
+      $fatal(1);
+    end
+  end
+endmodule
+`resetall
+"""
+
+
+def make_watchdog_builder():
+    """Create a scons Builder that writes the verilog file of the watchdog
+    module that enforces the simulated time limits of 'apio test'. The
+    source of the target should be env.Value(WATCHDOG_TEXT), such that the
+    file is rewritten if the text changes."""
+
+    def watchdog_func(target, source, env):
+        """Creates the watchdog .v file."""
+        _ = env  # Unused
+        with open(target[0].get_path(), "w", encoding="utf-8") as f:
+            f.write(source[0].get_contents().decode("utf-8"))
+        return 0
+
+    return Builder(
+        action=Action(watchdog_func, "Creating simulation watchdog file."),
+        suffix=".v",
+    )
+
+
 def configure_cleanup(apio_env: ApioEnv) -> None:
     """Should be called only when the "clean" target is specified.
     Configures in scons env do delete all the files in the build directory.
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Incremental reading, normalization and printing of the json reports of
+nextpnr, for the 'apio report' command. The reports of large designs may
+contain large critical path and net timing sections, so they are read in
+chunks and only the sections we need are decoded."""
+
+import re
+import json
+from typing import Any, Collection, Dict, List, Optional, TextIO
+from click import secho, style
+from SCons.Action import FunctionAction, Action
+from SCons.Node.FS import File
+from SCons.Node.Alias import Alias
+from SCons.Script.SConscript import SConsEnvironment
+
+# -- The version of the normalized report format. Increment when making
+# -- incompatible changes.
+REPORT_VERSION = 1
+
+# -- The report sections that are used by 'apio report'.
+REPORT_SECTIONS = ["utilization", "fmax"]
+
+# -- The chunk size in chars of the incremental reading.
+CHUNK_SIZE = 64 * 1024
+
+# -- Outside of a string, the chars that affect the structure.
+_TOKEN_REGEX = re.compile(r'[\[\]{}",]')
+
+# -- Inside a string, an escape sequence or the closing quote.
+_STRING_REGEX = re.compile(r'\\.|"', re.DOTALL)
+
+
+class PnrReportError(Exception):
+    """Raised when a pnr report can't be parsed."""
+
+
+class _JsonStream:
+    """A buffered reader of json text that can skip values without
+    decoding them."""
+
+    def __init__(self, stream: TextIO, chunk_size: int):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        # -- While reading a value, its start position in the buffer and,
+        # -- if captured, its text that was dropped from the buffer.
+        self._mark = 0
+        self._captured: Optional[List[str]] = None
+
+    def _fill(self) -> bool:
+        """Drops the consumed text and reads the next chunk. Returns False
+        at the end of the stream."""
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            return False
+        mark, pos = self._mark, self._pos
+        if self._captured is not None:
+            self._captured.append(self._buf[mark:pos])
+        self._buf = self._buf[pos:] + chunk
+        self._pos = 0
+        self._mark = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips white space and returns the next char, or an empty string
+        at the end of the stream."""
+        while True:
+            while self._pos < len(self._buf):
+                if not self._buf[self._pos].isspace():
+                    return self._buf[self._pos]
+                self._pos += 1
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consumes the next char, which should be one of the given chars,
+        and returns it."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise PnrReportError(
+                f"Expecting one of [{chars}], found [{char or 'EOF'}]."
+            )
+        self._pos += 1
+        return char
+
+    def _search(self, in_string: bool) -> re.Match:
+        """Returns the next structural match inside or outside of a string,
+        reading more text as needed."""
+        regex = _STRING_REGEX if in_string else _TOKEN_REGEX
+        while True:
+            match = regex.search(self._buf, self._pos)
+            if match:
+                return match
+            # -- Need more text. A trailing backslash is kept since it
+            # -- starts an escape sequence.
+            end = len(self._buf)
+            if in_string and end > self._pos and self._buf[-1] == "\\":
+                end -= 1
+            self._pos = end
+            if not self._fill():
+                raise PnrReportError("Unexpected end of report.")
+
+    def read_value(self, capture: bool) -> Optional[str]:
+        """Reads the json value that starts at the current position. Returns
+        its text if 'capture' is True, or else skips it and returns None."""
+        self.peek()
+        self._mark = self._pos
+        self._captured = [] if capture else None
+        depth = 0
+        in_string = False
+        while True:
+            match = self._search(in_string)
+            char = match.group()
+            self._pos = match.end()
+            if in_string:
+                # -- The end of a string, or an escape sequence to ignore.
+                if char == '"':
+                    in_string = False
+                    if depth == 0:
+                        break
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            elif char in "]}" and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    break
+            elif depth == 0:
+                # -- A separator that ends a number, true, false or null.
+                self._pos = match.start()
+                break
+
+        captured, self._captured = self._captured, None
+        if captured is None:
+            return None
+        mark, pos = self._mark, self._pos
+        captured.append(self._buf[mark:pos])
+        return "".join(captured)
+
+
+def read_pnr_report(
+    stream: TextIO,
+    sections: Collection[str] = tuple(REPORT_SECTIONS),
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Reads incrementally the given text stream of a nextpnr json report
+    and returns a dict with the given top level sections. Other sections
+    are skipped without decoding them and the reading stops once all the
+    sections were found. Raises PnrReportError if the report is invalid."""
+
+    reader = _JsonStream(stream, chunk_size)
+    result = {}
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return result
+
+    while True:
+        # -- The section name.
+        if reader.peek() != '"':
+            raise PnrReportError("Expecting a section name.")
+        name = json.loads(reader.read_value(capture=True))
+        reader.expect(":")
+
+        # -- The section value.
+        text = reader.read_value(capture=name in sections)
+        if text is not None:
+            try:
+                result[name] = json.loads(text)
+            except ValueError as e:
+                raise PnrReportError(f"Invalid section [{name}]: {e}") from e
+            if all(x in result for x in sections):
+                return result
+
+        if reader.expect(",}") == "}":
+            return result
+
+
+def normalize_pnr_report(
+    report: Dict[str, Any], *, clk_name_index: int, arch: str, board: str
+) -> Dict[str, Any]:
+    """Converts the sections of a nextpnr json report to the architecture
+    independent format of 'apio report --json'. 'clk_name_index' is the
+    index of the clock signal name in the '$' separated clock net names of
+    the architecture."""
+
+    utilization = {}
+    for resource, vals in report.get("utilization", {}).items():
+        used, available = vals["used"], vals["available"]
+        utilization[resource] = {
+            "used": used,
+            "available": available,
+            "percent": round(100 * used / available, 2) if available else 0,
+        }
+
+    clocks = {}
+    for clk_net, vals in report.get("fmax", {}).items():
+        clk_signal = clk_net.split("$")[clk_name_index]
+        clocks[clk_signal] = {
+            "net": clk_net,
+            "fmax_mhz": vals["achieved"],
+            "constraint_mhz": vals.get("constraint"),
+        }
+
+    return {
+        "version": REPORT_VERSION,
+        "arch": arch,
+        "board": board,
+        "utilization": utilization,
+        "clocks": clocks,
+    }
+
+
+def _print_pnr_report(report: Dict[str, Any], verbose: bool) -> None:
+    """Accepts a normalized pnr report and prints it in a user friendly
+    way."""
+
+    # --- Report utilization
+    secho("")
+    secho("UTILIZATION:", fg="cyan", bold=True, color=True)
+    for resource, vals in report["utilization"].items():
+        used = vals["used"]
+        fg = "magenta" if used > 0 else None
+        secho(
+            f"{resource:>20}: {used:5} {vals['available']:5} "
+            f"{int(vals['percent']):5}%",
+            fg=fg,
+            color=True,
+        )
+
+    # -- Report max clock speeds.
+    # --
+    # -- NOTE: As of Oct 2024, some projects do not generate timing
+    # -- information and this is being investigated.
+    # -- See https://github.com/FPGAwars/icestudio/issues/774 for details.
+    secho("")
+    secho("CLOCKS:", fg="cyan", bold=True, color=True)
+    for clk_signal, vals in report["clocks"].items():
+        # -- Report speed.
+        max_mhz = vals["fmax_mhz"]
+        styled_max_mhz = style(f"{max_mhz:7.2f}", fg="magenta")
+        secho(f"{clk_signal:>20}: {styled_max_mhz} Mhz max")
+
+    # -- For now we ignore the critical path report in the pnr report and
+    # -- refer the user to the pnr verbose output.
+    secho("")
+    if not verbose:
+        secho(
+            "Use 'apio report --verbose' for more details.",
+            fg="yellow",
+            color=True,
+        )
+
+
+def report_action(
+    clk_name_index: int,
+    verbose: bool,
+    *,
+    json_file: str = "",
+    arch: str = "",
+    board: str = "",
+) -> FunctionAction:
+    """Returns a SCons action to format and print the PNR reort from the
+    PNR json report file. Used by the 'apio report' command.
+    'clk_name_index' is the index of the clock name in the clock net names
+    of the architecture and 'verbose' indicates if the --verbose flag was
+    invoked. If 'json_file' is not empty, the normalized report, with the
+    given 'arch' and 'board' names, is written to that file instead."""
+
+    def print_pnr_report(
+        source: List[File],
+        target: List[Alias],
+        env: SConsEnvironment,
+    ) -> int:
+        """Action function. Loads the pnr json report and print in a user
+        friendly way."""
+        _ = (target, env)  # Unused
+        json_report: File = source[0]
+
+        # -- Read only the sections we need, the report may be large.
+        try:
+            with open(json_report.get_abspath(), "r", encoding="utf8") as f:
+                sections = read_pnr_report(f)
+        except PnrReportError as e:
+            secho(f"Error: invalid pnr report {json_report}: {e}", fg="red")
+            return 1
+
+        report = normalize_pnr_report(
+            sections, clk_name_index=clk_name_index, arch=arch, board=board
+        )
+        if not json_file:
+            _print_pnr_report(report, verbose)
+            return 0
+
+        with open(json_file, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        secho(f"Wrote the json report to {json_file}.", fg="green")
+        return 0
+
+    return Action(print_pnr_report, "Formatting pnr report.")
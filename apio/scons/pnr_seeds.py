@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Place-and-route with multiple nextpnr seeds. The timing results of
+nextpnr depend on its random seed, so we run it with several seeds in
+parallel, each in its own subdirectory of the build directory, and keep the
+result with the best fmax.
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import subprocess
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from click import secho, style
+from SCons.Action import FunctionAction, Action
+from SCons.Node.FS import File
+from SCons.Script.SConscript import SConsEnvironment
+from apio.scons.testbench_runner import print_job_output
+from apio.scons.stage_timer import (
+    current_stage,
+    kill_process_group,
+    wait_process,
+)
+
+
+@dataclass
+class SeedResult:
+    """The result of a single pnr run."""
+
+    seed: int  # The nextpnr seed.
+    exit_code: int  # The nextpnr exit code.
+    fmax: Optional[float]  # The lowest achieved clock fmax, in Mhz.
+    run_time: float  # The wall time of the pnr run, in seconds.
+
+
+def seed_dir(build_dir: str, seed: int) -> str:
+    """Returns the directory of the files of a given seed."""
+    return os.path.join(build_dir, f"seed-{seed}")
+
+
+def lowest_fmax(json_txt: str) -> Optional[float]:
+    """Returns the lowest achieved fmax of the clocks in the given text of
+    a nextpnr json report, or None if it has no clocks."""
+    report = json.loads(json_txt)
+    values = [vals["achieved"] for vals in report.get("fmax", {}).values()]
+    return min(values) if values else None
+
+
+# pylint: disable=too-many-locals
+def pnr_seeds_action(
+    pnr_cmd: str, seeds: int, jobs: int, fmax_target: float
+) -> FunctionAction:
+    """Returns a scons action that runs the given nextpnr command with
+    seeds 1 to 'seeds', up to 'jobs' at a time. The command uses $SOURCE
+    for the synth output, $TARGET for the pnr output and ${TARGETS[1]}
+    for the pnr report. The result with the best fmax is copied to the
+    targets. If 'fmax_target' is not zero, the result of the lowest seed
+    that achieves it is used instead and the runs of higher seeds stop."""
+
+    def run_seeds(
+        source: List[File],
+        target: List[File],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+
+        # -- Sanity check.
+        assert len(target) == 2, target
+
+        # -- The seed directories are created in the build directory of the
+        # -- targets.
+        build_dir = os.path.dirname(str(target[0]))
+
+        # -- The lowest seed that achieved the fmax target, if any, and the
+        # -- running processes by seed. Both are guarded by the lock.
+        met_seed: List[int] = []
+        lock = threading.Lock()
+        procs: Dict[int, subprocess.Popen] = {}
+
+        def stopped(seed: int) -> bool:
+            """True if a lower seed already achieved the fmax target."""
+            with lock:
+                return bool(met_seed) and met_seed[0] < seed
+
+        # -- The seeds run in worker threads so we pass them the stage of
+        # -- this action explicitly.
+        stage = current_stage()
+
+        def run_seed(seed: int) -> Optional[SeedResult]:
+            """Runs nextpnr with the given seed, in a worker thread."""
+            if stopped(seed):
+                return None
+
+            # -- The pnr output and report of this seed.
+            os.makedirs(seed_dir(build_dir, seed), exist_ok=True)
+            seed_targets = [
+                env.File(os.path.join(seed_dir(build_dir, seed), t.name))
+                for t in target
+            ]
+            command = env.subst(pnr_cmd, target=seed_targets, source=source)
+            command += f" --seed {seed}"
+
+            # -- Run nextpnr, in its own session such that it can be stopped
+            # -- along with the shell. Checked again under the lock, such
+            # -- that a seed doesn't start after a lower seed stopped the
+            # -- running ones.
+            start_time = time.time()
+            with lock:
+                if met_seed and met_seed[0] < seed:
+                    return None
+                # pylint: disable=consider-using-with
+                proc = subprocess.Popen(
+                    command,
+                    shell=True,
+                    env=env["ENV"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    start_new_session=True,
+                )
+                procs[seed] = proc
+            output = wait_process(proc, stage)
+            run_time = time.time() - start_time
+
+            # -- Runs that were stopped are ignored.
+            if stopped(seed) and proc.returncode != 0:
+                return None
+
+            # -- A failed run. We print its output for diagnostic.
+            if proc.returncode != 0:
+                print_job_output(output, "")
+                return SeedResult(seed, proc.returncode, None, run_time)
+
+            with open(str(seed_targets[1]), "r", encoding="utf8") as f:
+                fmax = lowest_fmax(f.read())
+            if fmax_target and fmax and fmax >= fmax_target:
+                with lock:
+                    if not met_seed or seed < met_seed[0]:
+                        met_seed[:] = [seed]
+                    for s, p in procs.items():
+                        if s > met_seed[0]:
+                            kill_process_group(p)
+
+            return SeedResult(seed, 0, fmax, run_time)
+
+        # -- Run the seeds.
+        secho(
+            f"Running place-and-route with {seeds} seeds, "
+            f"{jobs} in parallel.",
+            color=True,
+        )
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(run_seed, range(1, seeds + 1)))
+        results = [x for x in results if x]
+
+        # -- Select the best result. If the target was met, the lowest seed
+        # -- that met it, regardless of the order in which the seeds ended.
+        passed = [x for x in results if x.exit_code == 0]
+        if met_seed:
+            best = next(x for x in passed if x.seed == met_seed[0])
+        else:
+            best = max(passed, key=lambda x: x.fmax or 0, default=None)
+
+        _print_seeds_table(results, best)
+
+        if best is None:
+            secho("Error: place-and-route failed for all the seeds.", fg="red")
+            return 1
+
+        # -- Copy the best result to the targets.
+        for t in target:
+            shutil.copyfile(
+                os.path.join(seed_dir(build_dir, best.seed), t.name), str(t)
+            )
+
+        if fmax_target and not met_seed:
+            secho(
+                f"Warning: no seed achieved the target fmax of "
+                f"{fmax_target:.2f} Mhz.",
+                fg="yellow",
+                color=True,
+            )
+        return 0
+
+    return Action(run_seeds, "nextpnr with multiple seeds.")
+
+
+def _print_seeds_table(
+    results: List[SeedResult], best: Optional[SeedResult]
+) -> None:
+    """Prints a table with the results of the seeds."""
+    secho("")
+    secho(f"{'SEED':<8}{'FMAX':>12}{'TIME':>10}", fg="cyan", bold=True)
+    for result in results:
+        if result.exit_code != 0:
+            fmax_str = style(f"{'FAILED':>12}", fg="red")
+        elif result.fmax is None:
+            fmax_str = f"{'-':>12}"
+        else:
+            fmax_str = f"{result.fmax:>8.2f} Mhz"
+        note = style("  (best)", fg="green") if result is best else ""
+        secho(
+            f"{result.seed:<8}{fmax_str}{result.run_time:>9.2f}s{note}",
+            color=True,
+        )
+    secho("")
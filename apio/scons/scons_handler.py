@@ -10,37 +10,89 @@
 
 """Apio scons related utilities.."""
 
+import os
 import sys
+from pathlib import Path
+from typing import List, Optional
 from click import secho
 from SCons.Script import ARGUMENTS, COMMAND_LINE_TARGETS
 from google.protobuf import text_format
 from apio.scons.plugin_ice40 import PluginIce40
 from apio.scons.plugin_ecp5 import PluginEcp5
 from apio.scons.plugin_gowin import PluginGowin
-from apio.proto.apio_pb2 import SconsParams, ICE40, ECP5, GOWIN
-from apio.scons.apio_env import ApioEnv, TARGET
+from apio.proto.apio_pb2 import SconsParams, ApioArch, ICE40, ECP5, GOWIN
+from apio.utils.shards import select_shard
+from apio.scons.apio_env import ApioEnv, BUILD_DIR, BUILD_DIR_SEP
 from apio.scons.plugin_base import PluginBase
+from apio.scons.artifact_cache import enable_artifact_cache
+from apio.scons.verilog_index import VerilogIndex
+from apio.scons.stage_timer import start_run
+from apio.scons.testbench_reports import load_durations, write_reports
+from apio.scons.pnr_report import report_action
+from apio.scons.lint_runner import get_lint_units, lint_summary_action
+from apio.scons.testbench_runner import (
+    buffered_spawn,
+    get_testbench_limits,
+    limits_overrides,
+    results_summary_action,
+    start_reports,
+    sweep_result_file_name,
+    sweep_summary_action,
+)
 from apio.scons.plugin_util import (
     get_sim_config,
     get_tests_configs,
     waves_target,
     source_files,
-    report_action,
+    get_graph_types,
+    graph_completion_action,
     get_programmer_cmd,
     configure_cleanup,
+    is_verilator_sim,
+    make_watchdog_builder,
+    testbench_data_deps,
+    SimulationConfig,
+    WATCHDOG_TEXT,
 )
 
 # -- Scons builders ids.
+ELABORATE_BUILDER = "ELABORATE_BUILDER"
 SYNTH_BUILDER = "SYNTH_BUILDER"
 PNR_BUILDER = "PNR_BUILDER"
 BITSTREAM_BUILDER = "BITSTREAM_BUILDER"
 TESTBENCH_COMPILE_BUILDER = "TESTBENCH_COMPILE_BUILDER"
 TESTBENCH_RUN_BUILDER = "TESTBENCH_RUN_BUILDER"
+TESTBENCH_SWEEP_BUILDER = "TESTBENCH_SWEEP_BUILDER"
+WATCHDOG_BUILDER = "WATCHDOG_BUILDER"
 YOSYS_DOT_BUILDER = "YOSYS_DOT_BUILDER"
 GRAPHVIZ_RENDERER_BUILDER = "GRAPHVIZ_RENDERER_BUILDER"
 LINT_CONFIG_BUILDER = "LINT_CONFIG_BUILDER"
 LINT_BUILDER = "LINT_BUILDER"
 
+# -- The scons params when scons runs within the apio process. None when
+# -- scons runs as a subprocess and the params are passed via a file.
+_in_process_params: Optional[SconsParams] = None
+
+
+def set_in_process_params(params: Optional[SconsParams]) -> None:
+    """Sets the scons params to use when scons runs within the apio
+    process. Should be reset to None when scons completes."""
+    global _in_process_params  # pylint: disable=global-statement
+    _in_process_params = params
+
+
+def _make_plugin(apio_env: ApioEnv) -> PluginBase:
+    """Creates the arch plugin for the arch of the given apio env."""
+    arch = apio_env.params.arch
+    if arch == ICE40:
+        return PluginIce40(apio_env)
+    if arch == ECP5:
+        return PluginEcp5(apio_env)
+    if arch == GOWIN:
+        return PluginGowin(apio_env)
+    print(f"Apio SConstruct dispatch error: unknown arch [{arch}]")
+    sys.exit(1)
+
 
 class SconsHandler:
     """Base apio scons handler"""
@@ -55,42 +107,58 @@ class SconsHandler:
         """This static method is called from SConstruct to create and
         execute an SconsHandler."""
 
-        # -- Read the text of the scons params file.
-        with open("_build/scons.params", "r", encoding="utf8") as f:
-            proto_text = f.read()
+        if _in_process_params is not None:
+            # -- Running within the apio process, use the params as is.
+            params = _in_process_params
+        else:
+            # -- Read the text of the scons params file.
+            with open("_build/scons.params", "r", encoding="utf8") as f:
+                proto_text = f.read()
 
-        # -- Parse the text into SconsParams object.
-        params: SconsParams = text_format.Parse(proto_text, SconsParams())
+            # -- Parse the text into SconsParams object.
+            params = text_format.Parse(proto_text, SconsParams())
 
         # -- Compare the params timestamp to the timestamp in the command.
         timestamp = ARGUMENTS["timestamp"]
         assert params.timestamp == timestamp
 
+        # -- Record the resources of the stages that this run executes.
+        start_run(COMMAND_LINE_TARGETS)
+
         # -- Create the apio environment.
         apio_env = ApioEnv(COMMAND_LINE_TARGETS, params)
 
-        # -- Select the plugin.
-        if params.arch == ICE40:
-            plugin = PluginIce40(apio_env)
-        elif params.arch == ECP5:
-            plugin = PluginEcp5(apio_env)
-        elif params.arch == GOWIN:
-            plugin = PluginGowin(apio_env)
-        else:
-            print(
-                f"Apio SConstruct dispatch error: unknown arch [{params.arch}]"
-            )
-            sys.exit(1)
-
         # -- Create the handler.
-        scons_handler = SconsHandler(apio_env, plugin)
+        scons_handler = SconsHandler(apio_env, _make_plugin(apio_env))
 
         # -- Invoke the handler. This services the scons request.
         scons_handler.execute()
 
-    def _register_common_targets(self, synth_srcs):
+    def _register_elaborate_target(self, srcs, top_module: str):
+        """Registers the target of the RTLIL checkpoint of the given top
+        module and returns it. The checkpoint is rebuilt only if the
+        sources or the top module changed."""
+        apio_env = self.apio_env
+        params = apio_env.params
+
+        apio_env.builder(
+            ELABORATE_BUILDER, self.arch_plugin.elaborate_builder(top_module)
+        )
+        return apio_env.builder_target(
+            builder_id=ELABORATE_BUILDER,
+            target=apio_env.target,
+            sources=[srcs],
+            always_build=(params.verbosity.all or params.verbosity.synth),
+        )
+
+    def _register_common_targets(
+        self, synth_srcs, synth_target=None, elaborate_target=None
+    ):
         """Register the common synth, pnr, and bitstream operations which
-        are used by a few top level targets.
+        are used by a few top level targets. If 'synth_target' is given,
+        it's used instead of creating a synth target, and if
+        'elaborate_target' is given, it's used instead of creating an
+        elaborate target. Returns the synth target.
         """
 
         apio_env = self.apio_env
@@ -100,22 +168,33 @@ class SconsHandler:
         # -- Sanity check
         assert apio_env.targeting("build", "upload", "report")
 
-        # -- Synth builder and target.
-        apio_env.builder(SYNTH_BUILDER, plugin.synth_builder())
-
-        synth_target = apio_env.builder_target(
-            builder_id=SYNTH_BUILDER,
-            target=TARGET,
-            sources=[synth_srcs],
-            always_build=(params.verbosity.all or params.verbosity.synth),
-        )
+        # -- Elaborate and synth builders and targets. The synth starts from
+        # -- the elaborated checkpoint, so changing only the synth options
+        # -- doesn't parse the sources again.
+        cached_targets = []
+        if synth_target is None:
+            if elaborate_target is None:
+                elaborate_target = self._register_elaborate_target(
+                    synth_srcs, params.project.top_module
+                )
+                cached_targets.append(elaborate_target)
+
+            apio_env.builder(SYNTH_BUILDER, plugin.synth_builder())
+
+            synth_target = apio_env.builder_target(
+                builder_id=SYNTH_BUILDER,
+                target=apio_env.target,
+                sources=elaborate_target,
+                always_build=(params.verbosity.all or params.verbosity.synth),
+            )
+            cached_targets.append(synth_target)
 
         # -- Place-and -oute builder and target
         apio_env.builder(PNR_BUILDER, plugin.pnr_builder())
 
         pnr_target = apio_env.builder_target(
             builder_id=PNR_BUILDER,
-            target=TARGET,
+            target=apio_env.target,
             sources=[synth_target, self.arch_plugin.constrain_file()],
             always_build=(params.verbosity.all or params.verbosity.pnr),
         )
@@ -123,11 +202,25 @@ class SconsHandler:
         # -- Bitstream builder builder and target
         apio_env.builder(BITSTREAM_BUILDER, plugin.bitstream_builder())
 
-        apio_env.builder_target(
+        bitstream_target = apio_env.builder_target(
             builder_id=BITSTREAM_BUILDER,
-            target=TARGET,
+            target=apio_env.target,
             sources=pnr_target,
         )
+        cached_targets += [pnr_target, bitstream_target]
+
+        # -- If enabled, restore the artifacts from the shared cache rather
+        # -- than invoking the tools. We skip it in verbose mode since the
+        # -- user wants to see the output of the tools.
+        is_verbose = (
+            params.verbosity.all
+            or params.verbosity.synth
+            or params.verbosity.pnr
+        )
+        if params.HasField("artifact_cache") and not is_verbose:
+            enable_artifact_cache(apio_env, cached_targets)
+
+        return synth_target
 
     def _register_build_target(self, synth_srcs):
         """Register the 'build' target which creates the binary bitstream."""
@@ -138,13 +231,20 @@ class SconsHandler:
         # -- Sanity check
         assert apio_env.targeting("build")
 
-        # -- Register the common targets for synth, pnr, and bitstream.
-        self._register_common_targets(synth_srcs)
+        # -- Register the common targets for synth, pnr, and bitstream, for
+        # -- the project's board or for each of the requested boards.
+        if params.target.build.boards:
+            bitstreams = self._register_boards_targets(synth_srcs)
+        else:
+            self._register_common_targets(synth_srcs)
+            bitstreams = [
+                apio_env.target + plugin.plugin_info().bin_file_suffix
+            ]
 
         # -- Top level "build" target.
         apio_env.alias(
             "build",
-            source=TARGET + plugin.plugin_info().bin_file_suffix,
+            source=bitstreams,
             allways_build=(
                 params.verbosity.all
                 or params.verbosity.synth
@@ -152,6 +252,57 @@ class SconsHandler:
             ),
         )
 
+    def _register_boards_targets(self, synth_srcs) -> List[str]:
+        """Register the synth, pnr, and bitstream targets of a multi-board
+        build. Each board has its own apio env, plugin and build directory.
+        The boards of the same architecture share the synth target since
+        the synth doesn't depend on the board, and all the boards share the
+        elaborate target. Returns the names of the bitstream files."""
+        apio_env = self.apio_env
+        build_params = apio_env.params.target.build
+
+        # -- Build the boards in parallel. We buffer the output of the
+        # -- commands to avoid interleaving.
+        apio_env.scons_env.SetOption(
+            "num_jobs", build_params.jobs or len(build_params.boards)
+        )
+
+        # -- The elaborated checkpoint doesn't depend on the architecture.
+        elaborate_target = self._register_elaborate_target(
+            synth_srcs, apio_env.params.project.top_module
+        )
+
+        synth_targets = {}
+        bitstreams = []
+        for board in build_params.boards:
+            # -- The params of the board.
+            board_params = SconsParams()
+            board_params.CopyFrom(apio_env.params)
+            board_params.arch = board.arch
+            board_params.fpga_info.CopyFrom(board.fpga_info)
+            board_params.project.board_id = board.board_id
+
+            # -- The apio env and handler of the board.
+            board_env = ApioEnv(
+                apio_env.command_line_targets,
+                board_params,
+                build_dir=os.path.join(BUILD_DIR, board.board_id),
+            )
+            board_env.scons_env["SPAWN"] = buffered_spawn
+            board_handler = SconsHandler(board_env, _make_plugin(board_env))
+
+            # -- Register the targets of the board.
+            # pylint: disable-next=protected-access
+            synth_targets[board.arch] = board_handler._register_common_targets(
+                synth_srcs, synth_targets.get(board.arch), elaborate_target
+            )
+            bitstreams.append(
+                board_env.target
+                + board_handler.arch_plugin.plugin_info().bin_file_suffix
+            )
+
+        return bitstreams
+
     def _register_upload_target(self, synth_srcs):
         """Register the 'upload' target which upload the binary file
         generated by the bitstream generator."""
@@ -168,7 +319,7 @@ class SconsHandler:
         # -- Create the top level 'upload' target.
         apio_env.alias(
             "upload",
-            source=TARGET + plugin_info.bin_file_suffix,
+            source=apio_env.target + plugin_info.bin_file_suffix,
             action=get_programmer_cmd(apio_env),
             allways_build=True,
         )
@@ -189,9 +340,13 @@ class SconsHandler:
         # -- Register the top level 'report' target.
         apio_env.alias(
             "report",
-            source=TARGET + ".pnr",
+            source=apio_env.target + ".pnr",
             action=report_action(
-                plugin_info.clk_name_index, params.verbosity.pnr
+                plugin_info.clk_name_index,
+                params.verbosity.pnr,
+                json_file=params.target.report.json_file,
+                arch=ApioArch.Name(params.arch).lower(),
+                board=params.project.board_id,
             ),
             allways_build=True,
         )
@@ -210,31 +365,62 @@ class SconsHandler:
         assert apio_env.targeting("graph")
         assert params.target.HasField("graph")
 
-        # -- Create the .dot generation builder and target.
+        # -- Determine the files to graph. If we can find the file of the top
+        # -- module, we pass to yosys only the files in its hierarchy.
+        top_module = (
+            params.target.graph.top_module or params.project.top_module
+        )
+        verilog_index = VerilogIndex.load(synth_srcs)
+        top_files = verilog_index.module_files(top_module)
+        if top_files:
+            graph_srcs = top_files + verilog_index.dependencies(
+                top_files, synth_srcs
+            )
+        else:
+            graph_srcs = synth_srcs
+
+        # -- The graph starts from the elaborated checkpoint of its top
+        # -- module. It's shared with the build if the top module and the
+        # -- sources are the same.
+        elaborate_target = self._register_elaborate_target(
+            graph_srcs, top_module
+        )
+
+        # -- Create the .dot generation builder and target. It's rebuilt
+        # -- only if the checkpoint or the top module changed.
         apio_env.builder(YOSYS_DOT_BUILDER, plugin.yosys_dot_builder())
 
         dot_target = apio_env.builder_target(
             builder_id=YOSYS_DOT_BUILDER,
-            target=TARGET,
-            sources=synth_srcs,
-            always_build=True,
+            target=apio_env.target,
+            sources=elaborate_target,
         )
 
-        # -- Create the rendering builder and target.
+        # -- Create the rendering builder and a target for each of the
+        # -- output types. They are rendered in parallel from the same .dot
+        # -- file, and each is rebuilt only if the .dot file changed.
         apio_env.builder(
             GRAPHVIZ_RENDERER_BUILDER, plugin.graphviz_renderer_builder()
         )
-        graphviz_target = apio_env.builder_target(
-            builder_id=GRAPHVIZ_RENDERER_BUILDER,
-            target=TARGET,
-            sources=dot_target,
-            always_build=True,
+        graph_types = get_graph_types(params.target.graph)
+        apio_env.scons_env.SetOption(
+            "num_jobs", min(len(graph_types), os.cpu_count() or 1)
         )
+        graphviz_targets = [
+            apio_env.builder_target(
+                builder_id=GRAPHVIZ_RENDERER_BUILDER,
+                target=f"{apio_env.target}.{graph_type}",
+                sources=dot_target,
+                overrides={"GRAPH_TYPE": graph_type},
+            )
+            for graph_type in graph_types
+        ]
 
         # -- Create the top level "graph" target.
         apio_env.alias(
             "graph",
-            source=graphviz_target,
+            source=graphviz_targets,
+            action=graph_completion_action(),
             allways_build=True,
         )
 
@@ -255,24 +441,50 @@ class SconsHandler:
 
         lint_config_target = apio_env.builder_target(
             builder_id=LINT_CONFIG_BUILDER,
-            target=TARGET,
+            target=apio_env.target,
             sources=[],
         )
 
-        # -- Create the builder and target the lint operation.
-        apio_env.builder(LINT_BUILDER, plugin.lint_builder())
+        # -- The lint units. Each unit is linted only if its files changed
+        # -- since it was last linted.
+        lint_params = params.target.lint
+        units = get_lint_units(
+            lint_params.top_module or params.project.top_module,
+            bool(lint_params.top_module),
+            synth_srcs,
+            test_srcs,
+            VerilogIndex.load(synth_srcs + test_srcs),
+        )
 
-        lint_out_target = apio_env.builder_target(
-            builder_id=LINT_BUILDER,
-            target=TARGET,
-            sources=synth_srcs + test_srcs,
-            extra_dependecies=[lint_config_target],
+        # -- The units are independent, so we lint them in parallel. The
+        # -- lint action captures the output.
+        apio_env.scons_env.SetOption(
+            "num_jobs", min(len(units), os.cpu_count() or 1)
         )
 
-        # -- Create the top level "lint" target.
+        # -- Create the builder and the targets of the lint units.
+        apio_env.builder(LINT_BUILDER, plugin.lint_builder())
+
+        lint_out_targets = [
+            apio_env.builder_target(
+                builder_id=LINT_BUILDER,
+                target=unit.result_file,
+                sources=unit.srcs,
+                extra_dependecies=[lint_config_target],
+                overrides={
+                    "LINT_UNIT": unit.name,
+                    "LINT_TOP_MODULE": unit.top_module,
+                },
+            )
+            for unit in units
+        ]
+
+        # -- Create the top level "lint" target. It prints the diagnostics
+        # -- of all the units, including the cached ones.
         apio_env.alias(
             "lint",
-            source=lint_out_target,
+            source=lint_out_targets,
+            action=lint_summary_action(units),
             allways_build=True,
         )
 
@@ -293,7 +505,12 @@ class SconsHandler:
         testbench = sim_params.testbench  # Optional.
 
         # -- Collect information for sim.
-        sim_config = get_sim_config(testbench, synth_srcs, test_srcs)
+        sim_config = get_sim_config(
+            testbench,
+            synth_srcs,
+            test_srcs,
+            VerilogIndex.load(synth_srcs + test_srcs),
+        )
 
         # -- Compilation builder and target
 
@@ -343,13 +560,36 @@ class SconsHandler:
         # -- Collect the test related values.
         test_params = params.target.test
         tests_configs = get_tests_configs(
-            test_params.testbench, synth_srcs, test_srcs
+            test_params.testbench,
+            synth_srcs,
+            test_srcs,
+            VerilogIndex.load(synth_srcs + test_srcs),
         )
+        if test_params.shard_count:
+            tests_configs = self._select_test_shard(tests_configs)
+
+        # -- The reports are written also if a testbench fails to compile
+        # -- and scons stops before the summary.
+        previous_times = start_reports(
+            apio_env.scons_env, tests_configs, list(test_params.sweep_points)
+        )
+
+        # -- Run up to 'jobs' testbenches in parallel. In that case we
+        # -- buffer the output of the commands to avoid interleaving.
+        if test_params.jobs > 1:
+            apio_env.scons_env.SetOption("num_jobs", test_params.jobs)
+            apio_env.scons_env["SPAWN"] = buffered_spawn
 
         # -- Create compilation and simulation targets.
         apio_env.builder(
             TESTBENCH_COMPILE_BUILDER, plugin.testbench_compile_builder()
         )
+        watchdog_srcs = self._watchdog_srcs()
+        if test_params.sweep_points:
+            self._register_sweep_targets(
+                tests_configs, watchdog_srcs, previous_times
+            )
+            return
         apio_env.builder(TESTBENCH_RUN_BUILDER, plugin.testbench_run_builder())
 
         # -- Create targes for each testbench we are testing.
@@ -360,23 +600,159 @@ class SconsHandler:
             test_out_target = apio_env.builder_target(
                 builder_id=TESTBENCH_COMPILE_BUILDER,
                 target=test_config.build_testbench_name,
-                sources=test_config.srcs,
-                always_build=True,
+                sources=test_config.srcs + watchdog_srcs,
+                always_build=test_params.force_test,
             )
 
-            # -- Create the simulation target.
+            # -- Create the simulation target. It depends also on the data
+            # -- files that the simulation reads and on its own limits.
             test_vcd_target = apio_env.builder_target(
                 builder_id=TESTBENCH_RUN_BUILDER,
                 target=test_config.build_testbench_name,
                 sources=[test_out_target],
-                always_build=True,
+                extra_dependecies=self._data_deps(test_config),
+                always_build=test_params.force_test,
+                overrides=self._limits_overrides(test_config),
             )
 
             # -- Append to the list of targets we need to execute.
             tests_targets.append(test_vcd_target)
 
-        # -- The top level 'test' target.
-        apio_env.alias("test", source=tests_targets, allways_build=True)
+        # -- The top level 'test' target. It prints a summary of the
+        # -- testbenches results, including the cached results of the
+        # -- testbenches that scons found to be up to date.
+        apio_env.alias(
+            "test",
+            source=tests_targets,
+            action=results_summary_action(tests_configs, previous_times),
+            allways_build=True,
+        )
+
+    def _select_test_shard(
+        self, tests_configs: List[SimulationConfig]
+    ) -> List[SimulationConfig]:
+        """Returns the tests configs of the shard selected by the test
+        params. If the shard has no testbenches, writes empty reports and
+        exits."""
+
+        test_params = self.apio_env.params.target.test
+        index = test_params.shard_index
+        count = test_params.shard_count
+
+        durations = None
+        if test_params.shard_durations_file:
+            durations = load_durations(Path(test_params.shard_durations_file))
+            if not durations:
+                secho(
+                    "Warning: no durations in "
+                    f"'{test_params.shard_durations_file}', "
+                    "sharding by names.",
+                    fg="yellow",
+                )
+
+        names = [
+            os.path.basename(x.build_testbench_name) for x in tests_configs
+        ]
+        selected = set(select_shard(names, index, count, durations))
+        result = [
+            config
+            for config, name in zip(tests_configs, names)
+            if name in selected
+        ]
+
+        secho(
+            f"Shard {index + 1}/{count}: "
+            f"{len(result)} of {len(tests_configs)} testbenches.",
+            fg="cyan",
+        )
+        if not result:
+            # -- Empty reports rather than the reports of a previous run.
+            write_reports([])
+            sys.exit(0)
+        return result
+
+    def _data_deps(self, test_config: SimulationConfig) -> list:
+        """Returns the files that the simulation of a testbench reads, such
+        as $readmemh() data files."""
+        return testbench_data_deps(
+            self.apio_env,
+            self.arch_plugin.verilog_src_scanner,
+            test_config.srcs,
+        )
+
+    def _limits_overrides(self, test_config: SimulationConfig) -> dict:
+        """Returns the per target variables with the run time limits of a
+        testbench, see limits_overrides()."""
+        testbench = os.path.basename(test_config.build_testbench_name)
+        return limits_overrides(
+            get_testbench_limits(self.apio_env.params.target.test, testbench)
+        )
+
+    def _watchdog_srcs(self) -> list:
+        """Returns the additional sources of the testbenches compilation,
+        the watchdog module if any testbench has a simulated time limit,
+        or an empty list otherwise."""
+        apio_env = self.apio_env
+        test_params = apio_env.params.target.test
+        has_limit = test_params.limits.max_sim_time or any(
+            x.max_sim_time for x in test_params.testbench_limits.values()
+        )
+        if not has_limit or is_verilator_sim(apio_env):
+            return []
+        apio_env.builder(WATCHDOG_BUILDER, make_watchdog_builder())
+        return list(
+            apio_env.builder_target(
+                builder_id=WATCHDOG_BUILDER,
+                target=BUILD_DIR_SEP + "apio_watchdog",
+                sources=[apio_env.scons_env.Value(WATCHDOG_TEXT)],
+            )
+        )
+
+    def _register_sweep_targets(
+        self, tests_configs, watchdog_srcs, previous_times
+    ):
+        """Registers the targets of 'apio test --sweep'. Each testbench is
+        compiled once and then run once per sweep point. The runs are
+        independent targets such that scons runs them in parallel and
+        reruns only the points whose compiled testbench changed."""
+
+        apio_env = self.apio_env
+        test_params = apio_env.params.target.test
+        points = list(test_params.sweep_points)
+
+        apio_env.builder(
+            TESTBENCH_SWEEP_BUILDER, self.arch_plugin.testbench_sweep_builder()
+        )
+
+        sweep_targets = []
+        for test_config in tests_configs:
+            test_out_target = apio_env.builder_target(
+                builder_id=TESTBENCH_COMPILE_BUILDER,
+                target=test_config.build_testbench_name,
+                sources=test_config.srcs + watchdog_srcs,
+                always_build=test_params.force_test,
+            )
+            data_deps = self._data_deps(test_config)
+            overrides = self._limits_overrides(test_config)
+            for index, point in enumerate(points):
+                sweep_targets.append(
+                    apio_env.builder_target(
+                        builder_id=TESTBENCH_SWEEP_BUILDER,
+                        target=sweep_result_file_name(test_config, index),
+                        sources=[test_out_target],
+                        extra_dependecies=data_deps,
+                        always_build=test_params.force_test,
+                        overrides={"SWEEP_POINT": point, **overrides},
+                    )
+                )
+
+        # -- The top level 'test' target. It prints the results table.
+        apio_env.alias(
+            "test",
+            source=sweep_targets,
+            action=sweep_summary_action(tests_configs, points, previous_times),
+            allways_build=True,
+        )
 
     def execute(self):
         """The entry point of the scons handler. It registers the builders
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Measurement of the wall time, cpu time and peak memory of the build
+stages. The actions of the apio builders are wrapped with a TimedAction and
+the processes they run are waited with wait_process() which collects the
+resource usage of each process with os.wait4(). This is exact also when
+stages run in parallel, unlike the accumulated RUSAGE_CHILDREN counters of
+the scons process. On platforms without os.wait4(), e.g. Windows, only the
+wall time is measured.
+
+When scons completes, the stages of the run are appended to the timings
+file, see apio/utils/timings.py.
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from typing import List, Optional, Tuple, Union
+import SCons.Action
+from SCons.Action import ListAction
+from apio.scons import exit_hooks
+from apio.utils.timings import StageTiming, RunTiming, append_run
+
+# -- True if the resource usage of child processes can be measured.
+HAS_WAIT4 = hasattr(os, "wait4")
+
+# -- The units of ru_maxrss are KB on Linux and bytes on macOS.
+_MAXRSS_DIVIDER = 1024 if sys.platform == "darwin" else 1
+
+# -- The stage that is executed by the current thread. Scons runs parallel
+# -- jobs in separate threads.
+_thread_local = threading.local()
+
+# -- Protects the list of the stages of the current run.
+_lock = threading.Lock()
+
+# -- The stages of the current run, in the order they were started.
+_stages: List[StageTiming] = []
+
+
+def current_stage() -> Optional[StageTiming]:
+    """Returns the stage that is executed by the current thread, or None if
+    none."""
+    return getattr(_thread_local, "stage", None)
+
+
+def stage_wall_time(target: str) -> Optional[float]:
+    """Returns the wall time of the stage of the current run with the given
+    first target, e.g. '_build/main_tb.out', or None if it was not executed
+    in this run."""
+    target = os.path.normpath(target)
+    with _lock:
+        for stage in _stages:
+            if os.path.normpath(stage.target) == target:
+                return stage.wall_time
+    return None
+
+
+def add_rusage(stage: StageTiming, rusage) -> None:
+    """Adds the resource usage of a child process to the stage."""
+    with _lock:
+        stage.user_time += rusage.ru_utime
+        stage.sys_time += rusage.ru_stime
+        stage.max_rss_kb = max(
+            stage.max_rss_kb, rusage.ru_maxrss // _MAXRSS_DIVIDER
+        )
+
+
+def wait_process(
+    proc: subprocess.Popen, stage: Optional[StageTiming] = None
+) -> Optional[str]:
+    """Waits for the process to exit, sets its returncode and adds its
+    resource usage to the given stage, by default the stage of the current
+    thread. If the process has a stdout pipe, returns its output."""
+
+    output = proc.stdout.read() if proc.stdout else None
+
+    try:
+        if not HAS_WAIT4:
+            raise ChildProcessError()
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stage = stage or current_stage()
+        if stage:
+            add_rusage(stage, rusage)
+    except ChildProcessError:
+        # -- No wait4(), or the process was already reaped by a poll().
+        proc.wait()
+
+    if proc.stdout:
+        proc.stdout.close()
+    return output
+
+
+def kill_process_group(proc: subprocess.Popen) -> None:
+    """Kills a process that was started in a new session, along with the
+    processes it started. Does nothing if the process already exited."""
+    if proc.returncode is not None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        proc.kill()
+
+
+def run_process(
+    command: Union[str, List[str]],
+    *,
+    env: dict,
+    capture: bool = False,
+    timeout: Optional[float] = None,
+) -> Tuple[int, Optional[str]]:
+    """Runs a command and waits for its completion with wait_process().
+    A string command is run by the shell. If 'capture' is True, stdout and
+    stderr are captured and returned as a single text. Returns the exit
+    code and the captured output. If 'timeout' is given and the command
+    doesn't complete within that many seconds, the command is killed along
+    with its process group and subprocess.TimeoutExpired is raised with
+    the captured output."""
+    # pylint: disable=consider-using-with
+    proc = subprocess.Popen(
+        command,
+        shell=isinstance(command, str),
+        env=env,
+        stdout=subprocess.PIPE if capture else None,
+        stderr=subprocess.STDOUT if capture else None,
+        text=True,
+        # -- A process group of its own, such that a timeout kills also
+        # -- the processes it started, e.g. the shell's child.
+        start_new_session=timeout is not None,
+    )
+
+    timer = None
+    timed_out = threading.Event()
+    if timeout is not None:
+
+        def kill() -> None:
+            """Kills the command on timeout."""
+            if proc.returncode is None:
+                timed_out.set()
+                kill_process_group(proc)
+
+        timer = threading.Timer(timeout, kill)
+        timer.daemon = True
+        timer.start()
+        # -- The process group is not in the foreground, so it doesn't get
+        # -- the Ctrl-C of the user. We kill it if scons exits before it.
+        exit_hooks.register(kill_process_group, proc)
+
+    try:
+        output = wait_process(proc)
+    finally:
+        if timer:
+            timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, output=output)
+    return proc.returncode, output
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def timed_spawn(sh, escape, cmd, args, env) -> int:
+    """A replacement of the scons SPAWN function that measures the resource
+    usage of the command. Used only if HAS_WAIT4 is True."""
+    _ = (sh, escape, cmd)  # Unused
+
+    # -- The args are already escaped by scons so we pass them to the
+    # -- shell as is.
+    exit_code, _ = run_process(" ".join(args), env=env)
+    return exit_code
+
+
+class TimedAction(ListAction):
+    """A scons action that wraps a builder action and measures its
+    resources. It's a list action with a single element such that scons
+    handles it as the original action."""
+
+    def __init__(self, action, stage: str):
+        super().__init__([action])
+        self.stage = stage
+
+    # pylint: disable=too-many-arguments
+    def __call__(self, target, source, env, *args, **kwargs):
+        # -- Nothing to measure in a dry run.
+        if not SCons.Action.execute_actions:
+            return super().__call__(target, source, env, *args, **kwargs)
+
+        # -- Scons passes the targets via the executor, if any.
+        executor = kwargs.get("executor")
+        targets = executor.get_all_targets() if executor else target
+        stage = StageTiming(stage=self.stage, target=str(targets[0]))
+        with _lock:
+            _stages.append(stage)
+        _thread_local.stage = stage
+        start_time = time.time()
+        try:
+            return super().__call__(target, source, env, *args, **kwargs)
+        finally:
+            stage.wall_time = time.time() - start_time
+            _thread_local.stage = None
+
+
+def stage_name(builder_id: str) -> str:
+    """Returns the stage name of a builder id. E.g. 'SYNTH_BUILDER' ->
+    'synth'."""
+    name = builder_id.lower()
+    if name.endswith("_builder"):
+        name = name[: -len("_builder")]
+    return name
+
+
+def start_run(targets: List[str]) -> None:
+    """Starts the measurement of a scons run. The stages of the run are
+    written to the timings file when scons completes."""
+    with _lock:
+        _stages.clear()
+    exit_hooks.register(_on_scons_exit, list(targets), time.time())
+
+
+def _on_scons_exit(targets: List[str], start_time: float) -> None:
+    """Called when scons completes. Appends the run to the timings file if
+    any stage was executed."""
+    with _lock:
+        stages = list(_stages)
+        _stages.clear()
+    if not stages:
+        return
+    append_run(
+        RunTiming(
+            targets=targets,
+            timestamp=start_time,
+            total_time=time.time() - start_time,
+            stages=stages,
+        )
+    )
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""The machine readable reports of the 'apio test' command. After each run,
+the results of all the testbenches, including the cached ones, are written
+to a JUnit XML file and to a JSON file, for use by CI systems.
+"""
+
+import re
+import json
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List
+import xml.etree.ElementTree as ET
+
+# -- The report files, relative to the project dir.
+JUNIT_REPORT_FILE = Path("_build") / "test-results.xml"
+JSON_REPORT_FILE = Path("_build") / "test-results.json"
+
+# -- Change when the format of the json report changes.
+JSON_REPORT_VERSION = 1
+
+# -- Characters that are not allowed in XML 1.0 text.
+_INVALID_XML_CHARS_RE = re.compile(
+    "[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]"
+)
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class TestbenchReport:
+    """The report of a single testbench run."""
+
+    testbench: str  # The testbench name, e.g. 'main_tb'.
+    point: str  # The sweep point, e.g. 'SEED=7', or "" if not a sweep.
+    passed: bool  # True if the simulation exited with no error.
+    exit_code: int  # The exit code of the simulator.
+    compile_time: float  # The compile wall time, in seconds.
+    sim_time: float  # The simulation wall time, in seconds.
+    cached: bool  # True if the result is from a previous run.
+    output: str  # The captured stdout and stderr of the simulator.
+    timed_out: bool = False  # True if killed by a time limit.
+    skipped: bool = False  # True if not run because scons stopped early.
+
+    @property
+    def name(self) -> str:
+        """The name of the test case, e.g. 'main_tb' or 'main_tb[SEED=7]'."""
+        if self.point:
+            return f"{self.testbench}[{self.point}]"
+        return self.testbench
+
+
+def _load_entries(file_path: Path) -> List[dict]:
+    """Returns the testbench entries of a json report. Returns an empty list
+    if the report doesn't exist or is not valid."""
+    try:
+        with open(file_path, "r", encoding="utf8") as f:
+            data = json.load(f)
+        if data["version"] != JSON_REPORT_VERSION:
+            return []
+        return [
+            {
+                "testbench": str(x["testbench"]),
+                "compile_time": float(x["compile_time"]),
+                "sim_time": float(x["sim_time"]),
+            }
+            for x in data["testbenches"]
+            if not x.get("skipped", False)
+        ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+
+
+def load_compile_times(file_path: Path = JSON_REPORT_FILE) -> Dict[str, float]:
+    """Returns the compile times of the testbenches in a json report, by
+    testbench name. Used for the testbenches whose compilation is cached.
+    Returns an empty dict if the report doesn't exist or is not valid."""
+    result: Dict[str, float] = {}
+    for x in _load_entries(file_path):
+        name = x["testbench"]
+        result[name] = max(result.get(name, 0.0), x["compile_time"])
+    return result
+
+
+def load_durations(file_path: Path = JSON_REPORT_FILE) -> Dict[str, float]:
+    """Returns the total compile and simulation time of the testbenches in
+    a json report, by testbench name. The times of the sweep points of a
+    testbench are added up. Returns an empty dict if the report doesn't
+    exist or is not valid."""
+    result: Dict[str, float] = {}
+    for x in _load_entries(file_path):
+        name = x["testbench"]
+        result[name] = (
+            result.get(name, 0.0) + x["compile_time"] + x["sim_time"]
+        )
+    return result
+
+
+def _failures(reports: List[TestbenchReport]) -> int:
+    """Returns the number of failed runs, not including the skipped ones."""
+    return sum(not x.passed and not x.skipped for x in reports)
+
+
+def write_json_report(
+    reports: List[TestbenchReport], file_path: Path = JSON_REPORT_FILE
+) -> None:
+    """Writes the json report of the given testbench runs."""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, "w", encoding="utf8") as f:
+        json.dump(
+            {
+                "version": JSON_REPORT_VERSION,
+                "timestamp": time.time(),
+                "tests": len(reports),
+                "failures": _failures(reports),
+                "skipped": sum(x.skipped for x in reports),
+                "testbenches": [asdict(x) for x in reports],
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def _xml_text(text: str) -> str:
+    """Removes from the text the characters that XML doesn't allow."""
+    return _INVALID_XML_CHARS_RE.sub("", text)
+
+
+def write_junit_report(
+    reports: List[TestbenchReport], file_path: Path = JUNIT_REPORT_FILE
+) -> None:
+    """Writes the JUnit XML report of the given testbench runs. Each run is
+    a test case whose time is its compile and simulation time. The output
+    of a run is reported as its failure text or, if it passed, as its
+    system-out."""
+    failures = _failures(reports)
+    total_time = sum(x.compile_time + x.sim_time for x in reports)
+    attrs = {
+        "name": "apio test",
+        "tests": str(len(reports)),
+        "failures": str(failures),
+        "errors": "0",
+        "time": f"{total_time:.3f}",
+    }
+    root = ET.Element("testsuites", attrs)
+    suite = ET.SubElement(
+        root,
+        "testsuite",
+        {
+            **attrs,
+            "skipped": str(sum(x.skipped for x in reports)),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+    )
+    for report in reports:
+        case = ET.SubElement(
+            suite,
+            "testcase",
+            {
+                "name": report.name,
+                "classname": report.testbench,
+                "time": f"{report.compile_time + report.sim_time:.3f}",
+            },
+        )
+        if report.skipped:
+            ET.SubElement(case, "skipped").text = _xml_text(report.output)
+        elif not report.passed:
+            failure = ET.SubElement(
+                case,
+                "failure",
+                {
+                    "message": (
+                        "Time limit exceeded"
+                        if report.timed_out
+                        else f"Exit code {report.exit_code}"
+                    )
+                },
+            )
+            failure.text = _xml_text(report.output)
+        else:
+            ET.SubElement(case, "system-out").text = _xml_text(report.output)
+
+    ET.indent(root)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(root).write(
+        file_path, encoding="utf-8", xml_declaration=True
+    )
+
+
+def write_reports(reports: List[TestbenchReport]) -> None:
+    """Writes the JUnit XML and json reports of the given testbench runs."""
+    write_junit_report(reports)
+    write_json_report(reports)
+
+
+def delete_reports() -> None:
+    """Deletes the reports of a previous run, if any, such that they are not
+    mistaken for the reports of the current run."""
+    for file_path in [JUNIT_REPORT_FILE, JSON_REPORT_FILE]:
+        file_path.unlink(missing_ok=True)
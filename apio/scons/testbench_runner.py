@@ -0,0 +1,630 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Execution of the testbenches of the 'apio test' command. Each testbench
+is run with its output captured, such that testbenches that run in parallel
+don't interleave their output, and its result is written to a result file
+that is used for the final summary of the command.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+from click import secho, style
+import SCons.Action
+import SCons.Node
+from SCons.Action import FunctionAction, Action
+from SCons.Node import executed, up_to_date
+from SCons.Node.FS import File
+from SCons.Node.Alias import Alias
+from SCons.Script.SConscript import SConsEnvironment
+from apio.proto.apio_pb2 import ApioTestParams, ApioTestLimits
+from apio.scons.plugin_util import (
+    SIM_TIME_LIMIT_MARKER,
+    SIM_TIME_LIMIT_PLUSARG,
+    SimulationConfig,
+    basename,
+)
+from apio.scons import exit_hooks
+from apio.scons.stage_timer import run_process, stage_wall_time
+from apio.scons.testbench_reports import (
+    JSON_REPORT_FILE,
+    TestbenchReport,
+    delete_reports,
+    load_compile_times,
+    write_reports,
+)
+
+# -- The suffix of the testbench result files. E.g. _build/main_tb.result.
+RESULT_SUFFIX = ".result"
+
+# -- The scons variables with the run time limits of a testbench. They are
+# -- set per target, see limits_overrides(), and are part of the signature
+# -- of the run actions, such that a testbench is rerun only when its own
+# -- limits change.
+TIMEOUT_VAR = "TEST_TIMEOUT"
+MAX_SIM_TIME_VAR = "TEST_MAX_SIM_TIME"
+
+# -- Serializes the printing of the outputs of parallel jobs.
+_output_lock = threading.Lock()
+
+
+@dataclass
+class TestbenchResult:
+    """The result of a single testbench run."""
+
+    # -- Not a test class, for pytest.
+    __test__ = False
+
+    testbench: str  # The testbench name, e.g. 'main_tb'.
+    passed: bool  # True if the simulation exited with no error.
+    exit_code: int  # The exit code of the simulator.
+    sim_time: float  # The wall time of the simulation, in seconds.
+    output: str  # The captured stdout and stderr of the simulator.
+    point: str = ""  # The sweep point, e.g. 'SEED=7', if a sweep run.
+    timed_out: bool = False  # True if killed by a time limit.
+
+    def write(self, file_path: str) -> None:
+        """Writes the result to a json file."""
+        with open(file_path, "w", encoding="utf8") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @staticmethod
+    def read(file_path: str) -> "TestbenchResult":
+        """Reads a result that was written with write()."""
+        with open(file_path, "r", encoding="utf8") as f:
+            return TestbenchResult(**json.load(f))
+
+
+def result_file_name(sim_config: SimulationConfig) -> str:
+    """Returns the result file name of a testbench."""
+    return sim_config.build_testbench_name + RESULT_SUFFIX
+
+
+def sweep_result_file_name(sim_config: SimulationConfig, index: int) -> str:
+    """Returns the result file name of a sweep point of a testbench. E.g.
+    _build/main_tb.sweep/0007.result"""
+    sweep_dir = sim_config.build_testbench_name + ".sweep"
+    return f"{sweep_dir}/{index:04d}{RESULT_SUFFIX}"
+
+
+def compile_times(
+    tests_configs: List[SimulationConfig],
+    previous: Optional[Dict[str, float]] = None,
+) -> Dict[str, float]:
+    """Returns the compile wall time of each testbench, by testbench name.
+    The time of a testbench that was not compiled in this run is taken from
+    'previous', or if None, from the previous json report, if any."""
+    if previous is None:
+        previous = load_compile_times()
+    result = {}
+    for config in tests_configs:
+        name = os.path.basename(config.build_testbench_name)
+        wall_time = stage_wall_time(config.build_testbench_name + ".out")
+        result[name] = (
+            wall_time if wall_time is not None else previous.get(name, 0.0)
+        )
+    return result
+
+
+def make_report(
+    result: TestbenchResult, compile_time: float, cached: bool
+) -> TestbenchReport:
+    """Returns the report of a testbench result."""
+    return TestbenchReport(
+        testbench=result.testbench,
+        point=result.point,
+        passed=result.passed,
+        exit_code=result.exit_code,
+        compile_time=compile_time,
+        sim_time=result.sim_time,
+        cached=cached,
+        output=result.output,
+        timed_out=result.timed_out,
+    )
+
+
+def start_reports(
+    env: SConsEnvironment,
+    tests_configs: List[SimulationConfig],
+    points: List[str],
+) -> Dict[str, float]:
+    """Deletes the reports of the previous run, unless this is a dry run,
+    and returns the compile times that it reported, for the summary action.
+    Also registers an exit hook that writes the reports if scons stops
+    before the summary action wrote them, e.g. because a testbench failed
+    to compile."""
+    previous = load_compile_times()
+    if SCons.Action.execute_actions:
+        delete_reports()
+    exit_hooks.register(
+        _write_reports_on_exit, env, tests_configs, points, previous
+    )
+    return previous
+
+
+def _write_reports_on_exit(
+    env: SConsEnvironment,
+    tests_configs: List[SimulationConfig],
+    points: List[str],
+    previous: Dict[str, float],
+) -> None:
+    """Writes the reports of a run that was stopped before its summary.
+    Testbenches that failed to compile are reported as failed and those
+    that were not run are reported as skipped."""
+
+    # -- Nothing to do if the summary wrote the reports or in a dry run.
+    if JSON_REPORT_FILE.exists() or not SCons.Action.execute_actions:
+        return
+
+    times = compile_times(tests_configs, previous)
+    reports = []
+    for config in tests_configs:
+        testbench = os.path.basename(config.build_testbench_name)
+        compiled = env.File(config.build_testbench_name + ".out")
+        if points:
+            file_names = [
+                sweep_result_file_name(config, i) for i in range(len(points))
+            ]
+        else:
+            file_names = [result_file_name(config)]
+
+        for index, file_name in enumerate(file_names):
+            compile_time = times[testbench] if index == 0 else 0.0
+            state = env.File(file_name).get_state()
+            if state in (executed, up_to_date) and os.path.isfile(file_name):
+                result = TestbenchResult.read(file_name)
+                reports.append(
+                    make_report(result, compile_time, state != executed)
+                )
+                continue
+            # -- No result from this run.
+            reports.append(
+                _missing_result_report(
+                    testbench,
+                    points[index] if points else "",
+                    compile_time,
+                    compile_failed=compiled.get_state() == SCons.Node.failed,
+                )
+            )
+
+    write_reports(reports)
+
+
+def _missing_result_report(
+    testbench: str, point: str, compile_time: float, *, compile_failed: bool
+) -> TestbenchReport:
+    """Returns the report of a testbench run that has no result in this
+    run, a failure if the testbench failed to compile, or else skipped."""
+    return TestbenchReport(
+        testbench=testbench,
+        point=point,
+        passed=False,
+        exit_code=1 if compile_failed else 0,
+        compile_time=compile_time,
+        sim_time=0.0,
+        cached=False,
+        output=(
+            "Error: the testbench failed to compile.\n"
+            if compile_failed
+            else "Not run, the test was stopped early.\n"
+        ),
+        skipped=not compile_failed,
+    )
+
+
+def print_job_output(out_text: str, err_text: str) -> None:
+    """Prints the captured output of a job as a single uninterrupted block,
+    even if other jobs are running in parallel."""
+    with _output_lock:
+        if out_text:
+            sys.stdout.write(out_text)
+            sys.stdout.flush()
+        if err_text:
+            sys.stderr.write(err_text)
+            sys.stderr.flush()
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def buffered_spawn(sh, escape, cmd, args, env) -> int:
+    """A replacement of the scons SPAWN function that captures the output
+    of the command and prints it once the command completes. Used to avoid
+    interleaving of the outputs of commands that run in parallel. The
+    stderr of the command is merged into its stdout."""
+    _ = (sh, escape, cmd)  # Unused
+
+    # -- The args are already escaped by scons so we pass them to the
+    # -- shell as is.
+    exit_code, output = run_process(" ".join(args), env=env, capture=True)
+    print_job_output(output, "")
+    return exit_code
+
+
+def sim_command(
+    compiled_file: str,
+    *,
+    verilator: bool,
+    waves_file: Optional[str] = None,
+    plusargs: Optional[List[str]] = None,
+) -> List[str]:
+    """Returns the command that runs a compiled testbench. With iverilog,
+    the compiled file is run by vvp, which writes the waveforms to
+    'waves_file', in FST format if its suffix is '.fst', or, if None,
+    doesn't write them. With verilator, the compiled file is an executable
+    and the waveforms are not written. 'plusargs' are NAME=VALUE strings
+    that are passed as +NAME=VALUE."""
+    plusargs = [f"+{arg}" for arg in plusargs or []]
+    if verilator:
+        return [os.path.abspath(compiled_file)] + plusargs
+    if not waves_file:
+        return ["vvp", compiled_file, "-none"] + plusargs
+    dump_args = [f"-dumpfile={waves_file}"]
+    if waves_file.endswith(".fst"):
+        dump_args.insert(0, "-fst")
+    return ["vvp", compiled_file] + dump_args + plusargs
+
+
+def get_testbench_limits(
+    test_params: ApioTestParams, testbench: str
+) -> ApioTestLimits:
+    """Returns the run time limits of a testbench, e.g. 'main_tb', which are
+    the default limits with the overrides of the testbench, if any."""
+    limits = ApioTestLimits()
+    limits.CopyFrom(test_params.limits)
+    if testbench in test_params.testbench_limits:
+        limits.MergeFrom(test_params.testbench_limits[testbench])
+    return limits
+
+
+def limits_overrides(limits: ApioTestLimits) -> Dict[str, str]:
+    """Returns the per target scons variables with the given limits, for
+    the targets of the run actions."""
+    return {
+        TIMEOUT_VAR: f"{limits.timeout:g}",
+        MAX_SIM_TIME_VAR: str(limits.max_sim_time),
+    }
+
+
+def _env_limits(env: SConsEnvironment) -> ApioTestLimits:
+    """Returns the limits that were set with limits_overrides(), or no
+    limits if they were not set."""
+    return ApioTestLimits(
+        timeout=float(env.get(TIMEOUT_VAR, 0)),
+        max_sim_time=int(env.get(MAX_SIM_TIME_VAR, 0)),
+    )
+
+
+def run_simulation(
+    compiled_file: str,
+    *,
+    verilator: bool,
+    limits: ApioTestLimits,
+    env: dict,
+    waves_file: Optional[str] = None,
+    plusargs: Optional[List[str]] = None,
+) -> Tuple[int, str, bool]:
+    """Runs a compiled testbench, see sim_command(), within the given
+    limits and returns its exit code, its captured output and True if it
+    was stopped by one of the limits. The simulated time limit is enforced
+    by the watchdog module that is compiled with the testbench, and is not
+    supported with verilator."""
+    plusargs = list(plusargs or [])
+    if limits.max_sim_time and not verilator:
+        plusargs.append(f"{SIM_TIME_LIMIT_PLUSARG}={limits.max_sim_time}")
+    command = sim_command(
+        compiled_file,
+        verilator=verilator,
+        waves_file=waves_file,
+        plusargs=plusargs,
+    )
+    try:
+        exit_code, output = run_process(
+            command, env=env, capture=True, timeout=limits.timeout or None
+        )
+    except subprocess.TimeoutExpired as e:
+        output = (e.output or "") + (
+            f"Error: timeout, killed after {limits.timeout:g} seconds.\n"
+        )
+        return 1, output, True
+    return exit_code, output, SIM_TIME_LIMIT_MARKER in output
+
+
+def testbench_run_action(verilator: bool, waves: bool) -> FunctionAction:
+    """Returns a scons action that runs a compiled testbench. The action
+    expects the source to be the compiled testbench and the targets to be
+    the waveforms file, if 'waves' is True, and the result file. The time
+    limits are given by the per target variables of limits_overrides().
+    Failures, including exceeded time limits, are recorded in the result
+    file rather than failing the action, such that the rest of the
+    testbenches keep running."""
+
+    def run_testbench(
+        source: List[File],
+        target: List[File],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+
+        # -- Sanity check.
+        assert len(target) == (2 if waves else 1), target
+        waves_file = str(target[0]) if waves else None
+        result_file = target[-1]
+        testbench = basename(result_file.name)
+
+        # -- Run the simulation and capture its output.
+        start_time = time.time()
+        exit_code, output, timed_out = run_simulation(
+            str(source[0]),
+            verilator=verilator,
+            limits=_env_limits(env),
+            env=env["ENV"],
+            waves_file=waves_file,
+        )
+        sim_time = time.time() - start_time
+
+        # -- Print the output as a single block.
+        print_job_output(output, "")
+
+        # -- Save the result for the summary.
+        TestbenchResult(
+            testbench=testbench,
+            passed=exit_code == 0 and not timed_out,
+            exit_code=exit_code,
+            sim_time=sim_time,
+            output=output,
+            timed_out=timed_out,
+        ).write(str(result_file))
+
+        return 0
+
+    def describe(
+        target: List[File], source: List[File], env: SConsEnvironment
+    ) -> str:
+        """Returns the string that scons prints for the action."""
+        _ = env  # Unused
+        if verilator:
+            return f"Running {source[0]}"
+        return " ".join(
+            sim_command(
+                str(source[0]),
+                verilator=False,
+                waves_file=str(target[0]) if waves else None,
+            )
+        )
+
+    return Action(
+        run_testbench,
+        strfunction=describe,
+        varlist=[TIMEOUT_VAR, MAX_SIM_TIME_VAR],
+    )
+
+
+def results_summary_action(
+    tests_configs: List[SimulationConfig],
+    previous_times: Optional[Dict[str, float]] = None,
+) -> FunctionAction:
+    """Returns a scons action that prints a summary of the results of the
+    given testbenches and writes the reports. Results of testbenches that
+    were not run by scons because they were up to date are reported as
+    cached. 'previous_times' are the compile times of the previous reports,
+    see compile_times(). The action fails if any of the testbenches
+    failed."""
+
+    def print_summary(
+        source: List[Alias],
+        target: List[Alias],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+        _ = (source, target)  # Unused
+
+        # -- Read the results and determine which of them are cached.
+        results = []
+        cached = []
+        for config in tests_configs:
+            file_name = result_file_name(config)
+            results.append(TestbenchResult.read(file_name))
+            cached.append(env.File(file_name).get_state() != executed)
+
+        # -- Write the JUnit and json reports.
+        times = compile_times(tests_configs, previous_times)
+        write_reports(
+            [
+                make_report(x, times[x.testbench], c)
+                for x, c in zip(results, cached)
+            ]
+        )
+
+        # -- Print the summary table.
+        name_len = max(len(x.testbench) for x in results) + 4
+        secho("")
+        secho(
+            f"{'TESTBENCH':<{name_len}}{'STATUS':<10}{'TIME':>8}",
+            fg="cyan",
+            bold=True,
+            color=True,
+        )
+        for result, is_cached in zip(results, cached):
+            if result.passed:
+                status = style(f"{'PASSED':<10}", fg="green")
+            elif result.timed_out:
+                status = style(f"{'TIMEOUT':<10}", fg="red")
+            else:
+                status = style(f"{'FAILED':<10}", fg="red")
+            note = style("  (cached)", fg="yellow") if is_cached else ""
+            secho(
+                f"{result.testbench:<{name_len}}{status}"
+                f"{result.sim_time:>7.2f}s{note}",
+                color=True,
+            )
+
+        # -- Print the totals and fail if any testbench failed.
+        failed = [x for x in results if not x.passed]
+        cached_note = f" ({sum(cached)} cached)" if any(cached) else ""
+        secho("")
+        if failed:
+            secho(
+                f"Error: {len(failed)} of {len(results)} testbenches failed"
+                f"{cached_note}.",
+                fg="red",
+                color=True,
+            )
+            return 1
+
+        secho(
+            f"All {len(results)} testbenches passed{cached_note}.",
+            fg="green",
+            color=True,
+        )
+        return 0
+
+    return Action(print_summary, "Summarizing test results.")
+
+
+def sweep_point_action(verilator: bool) -> FunctionAction:
+    """Returns a scons action that runs a compiled testbench at a single
+    sweep point, given by the SWEEP_POINT variable which is set per target,
+    as are the variables of limits_overrides(). The target is the result
+    file. No waveform file is written, and the output of the simulation is
+    printed only if it failed."""
+
+    def run_sweep_point(
+        source: List[File],
+        target: List[File],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+        point = env["SWEEP_POINT"]
+        testbench = basename(source[0].name)
+        start_time = time.time()
+        exit_code, output, timed_out = run_simulation(
+            str(source[0]),
+            verilator=verilator,
+            limits=_env_limits(env),
+            env=env["ENV"],
+            plusargs=point.split(),
+        )
+        sim_time = time.time() - start_time
+
+        if exit_code != 0:
+            print_job_output(f"[{point}]\n{output}", "")
+
+        TestbenchResult(
+            testbench=testbench,
+            passed=exit_code == 0 and not timed_out,
+            exit_code=exit_code,
+            sim_time=sim_time,
+            output=output,
+            point=point,
+            timed_out=timed_out,
+        ).write(str(target[0]))
+        return 0
+
+    return Action(
+        run_sweep_point,
+        "Simulating $SOURCE at $SWEEP_POINT",
+        varlist=["SWEEP_POINT", TIMEOUT_VAR, MAX_SIM_TIME_VAR],
+    )
+
+
+def sweep_summary_action(
+    tests_configs: List[SimulationConfig],
+    points: List[str],
+    previous_times: Optional[Dict[str, float]] = None,
+) -> FunctionAction:
+    """Returns a scons action that prints a table with the pass/fail status
+    of each testbench at each sweep point, including cached results, and
+    writes the reports. 'previous_times' are as in results_summary_action().
+    The action fails if any of the runs failed."""
+
+    def print_summary(
+        source: List[Alias],
+        target: List[Alias],
+        env: SConsEnvironment,
+    ) -> int:
+        """The action function."""
+        _ = (source, target)  # Unused
+
+        # -- The reports of the runs, by point and then by testbench. The
+        # -- compile time of a testbench is reported with its first point.
+        times = compile_times(tests_configs, previous_times)
+        table: List[List[TestbenchReport]] = []
+        for index in range(len(points)):
+            row = []
+            for config in tests_configs:
+                file_name = sweep_result_file_name(config, index)
+                result = TestbenchResult.read(file_name)
+                row.append(
+                    make_report(
+                        result,
+                        times[result.testbench] if index == 0 else 0.0,
+                        env.File(file_name).get_state() != executed,
+                    )
+                )
+            table.append(row)
+
+        # -- Write the JUnit and json reports.
+        reports = [x for row in table for x in row]
+        write_reports(reports)
+
+        _print_sweep_table(points, table)
+        cached = sum(x.cached for x in reports)
+
+        # -- Print the totals and fail if any run failed.
+        failed = [x for x in reports if not x.passed]
+        cached_note = f" ({cached} cached)" if cached else ""
+        secho("")
+        if failed:
+            secho(
+                f"Error: {len(failed)} of {len(reports)} sweep runs failed"
+                f"{cached_note}.",
+                fg="red",
+                color=True,
+            )
+            return 1
+
+        secho(
+            f"All {len(reports)} sweep runs passed{cached_note}.",
+            fg="green",
+            color=True,
+        )
+        return 0
+
+    return Action(print_summary, "Summarizing sweep results.")
+
+
+def _print_sweep_table(
+    points: List[str], table: List[List[TestbenchReport]]
+) -> None:
+    """Prints the results of a sweep, a row per point and a column per
+    testbench."""
+    point_len = max(len("POINT"), *(len(x) for x in points)) + 4
+    col_lens = [max(len(x.testbench), 6) + 4 for x in table[0]]
+    secho("")
+    secho(
+        f"{'POINT':<{point_len}}"
+        + "".join(f"{x.testbench:<{n}}" for x, n in zip(table[0], col_lens)),
+        fg="cyan",
+        bold=True,
+        color=True,
+    )
+    for point, row in zip(points, table):
+        cells = [
+            (
+                style(f"{'PASS':<{n}}", fg="green")
+                if x.passed
+                else style(
+                    f"{'TIMEOUT' if x.timed_out else 'FAIL':<{n}}", fg="red"
+                )
+            )
+            for x, n in zip(row, col_lens)
+        ]
+        secho(f"{point:<{point_len}}" + "".join(cells), color=True)
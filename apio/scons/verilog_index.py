@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""A lightweight index of the modules that are declared and instantiated
+in the verilog files of the project. It's used to compute the minimal set of
+source files that a testbench or a top module needs, rather than passing
+all the source files of the project to the tools.
+
+The index doesn't parse verilog. It collects the declared module names and
+the identifiers that appear in an instantiation position (an identifier that
+is followed by '#' or by an instance name and '(' or '['), which are then
+matched against the declared modules. This may include a few unneeded files
+but should not miss needed ones. The index entries are cached per file in
+the build directory and are recomputed only when a file changes.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Set, Optional
+from apio.scons.apio_env import BUILD_DIR_SEP
+from apio.scons.file_cache import FileInfoCache
+
+# -- The file with the cached index entries.
+INDEX_CACHE_FILE = BUILD_DIR_SEP + "verilog_index.json"
+
+# -- Change when the format or the semantic of the entries change, to
+# -- invalidate old cache files.
+INDEX_CACHE_VERSION = 2
+
+# -- Verilog comments. Strings are not handled here, for simplicity.
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+
+# -- Verilog strings.
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\\n])*"')
+
+# -- A verilog include. Captures the included file name.
+_INCLUDE_RE = re.compile(r'`\s*include\s+"([^"]+)"')
+
+# -- A module declaration. Captures the module name.
+_MODULE_RE = re.compile(r"\b(?:module|macromodule)\s+([A-Za-z_][\w$]*)")
+
+# -- An identifier in an instantiation position, e.g. 'my_module' in
+# -- 'my_module #(.N(8)) inst (...)' or 'my_module inst[3:0] (...)'. The
+# -- lookahead doesn't consume the text such that consecutive matches are
+# -- not missed.
+_INSTANCE_RE = re.compile(
+    r"\b([A-Za-z_][\w$]*)(?![\w$])(?=\s*(?:#|[A-Za-z_][\w$]*\s*[(\[]))"
+)
+
+
+@dataclass
+class IndexEntry:
+    """The index information of a single file."""
+
+    modules: List[str]  # The modules declared in the file.
+    references: List[str]  # Possible module references in the file.
+    includes: List[str]  # The files included by the file.
+
+
+def parse_verilog_text(text: str) -> Dict[str, List[str]]:
+    """Extracts the index information from a verilog text. Returns a
+    dict with the 'modules', 'references' and 'includes' lists."""
+
+    # -- Comments are ignored. Includes are extracted before the strings are
+    # -- dropped since the file names are strings.
+    text = _COMMENT_RE.sub(" ", text)
+    includes = _INCLUDE_RE.findall(text)
+    text = _STRING_RE.sub('""', text)
+
+    modules = _MODULE_RE.findall(text)
+    references = set(_INSTANCE_RE.findall(text)) - set(modules)
+
+    return {
+        "modules": sorted(set(modules)),
+        "references": sorted(references),
+        "includes": sorted(set(includes)),
+    }
+
+
+def _resolve_include(
+    include: str, including_file: str, include_dirs: List[str]
+) -> str:
+    """Returns the path of an included file, relative to the project dir.
+    The file is looked up in the directory of the including file and then
+    in the include dirs. If not found, the first candidate is returned."""
+    candidates = [
+        os.path.normpath(os.path.join(x, include))
+        for x in [os.path.dirname(including_file)] + include_dirs
+    ]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return candidates[0]
+
+
+class VerilogIndex:
+    """An index of the modules declared and referenced by verilog files."""
+
+    def __init__(self, entries: Dict[str, IndexEntry]):
+        """Do not call directly, use VerilogIndex.load()."""
+        self.entries = entries
+
+        # -- Map module names to the files that declare them.
+        self._module_files: Dict[str, List[str]] = {}
+        for file_name, entry in entries.items():
+            for module in entry.modules:
+                self._module_files.setdefault(module, []).append(file_name)
+
+    @staticmethod
+    def load(
+        files: List[str],
+        cache_file: str = INDEX_CACHE_FILE,
+        include_dirs: Optional[List[str]] = None,
+    ) -> "VerilogIndex":
+        """Returns an index of the given files and the files they include.
+        Included file names are resolved relative to the directory of the
+        including file and then to the 'include_dirs', which default to the
+        project dir. Entries of files that didn't change are taken from the
+        cache file, which is updated if needed."""
+
+        cache = FileInfoCache(cache_file, INDEX_CACHE_VERSION)
+
+        # -- Index the files, and the files they include, transitively.
+        entries: Dict[str, IndexEntry] = {}
+        pending = list(files)
+        while pending:
+            file_name = pending.pop()
+            if file_name in entries:
+                continue
+            info = cache.get(file_name, parse_verilog_text)
+            if info is None:
+                # -- A missing include file. Scons reports it if needed.
+                continue
+            entry = IndexEntry(**info)
+            entry.includes = [
+                _resolve_include(x, file_name, include_dirs or [""])
+                for x in entry.includes
+            ]
+            entries[file_name] = entry
+            pending.extend(entry.includes)
+
+        # -- Update the cache file, if needed.
+        cache.save()
+
+        return VerilogIndex(entries)
+
+    def module_files(self, module: str) -> List[str]:
+        """Returns the files that declare the given module, if any."""
+        return self._module_files.get(module, [])
+
+    def dependencies(
+        self, top_files: List[str], candidates: List[str]
+    ) -> List[str]:
+        """Returns the files from candidates that are needed by the
+        top files, transitively, in the order of candidates. Candidates
+        that don't declare any module, e.g. files with just macro
+        definitions, are always included. The top files themselves are not
+        included in the result."""
+
+        # -- Collect the files that are reachable from the top files.
+        reachable: Set[str] = set()
+        pending = list(top_files)
+        while pending:
+            file_name = pending.pop()
+            if file_name in reachable:
+                continue
+            reachable.add(file_name)
+            for module in self._references(file_name, set()):
+                pending.extend(self.module_files(module))
+
+        # -- Filter the candidates, preserving their order.
+        result = []
+        for file_name in candidates:
+            if file_name in top_files:
+                continue
+            entry = self.entries.get(file_name)
+            if file_name in reachable or entry is None or not entry.modules:
+                result.append(file_name)
+        return result
+
+    def _references(self, file_name: str, visited: Set[str]) -> Set[str]:
+        """Returns the possible module references of a file, including the
+        references in the files it includes."""
+        entry: Optional[IndexEntry] = self.entries.get(file_name)
+        if entry is None or file_name in visited:
+            return set()
+        visited.add(file_name)
+        result = set(entry.references)
+        for include in entry.includes:
+            result |= self._references(include, visited)
+        return result
@@ -35,11 +35,19 @@ APIO_PLATFORM = "APIO_PLATFORM"
 # -- for the scons process use scons_util.is_debug().
 APIO_DEBUG = "APIO_DEBUG"
 
+# -- Env variable to run the scons handler within the apio process rather
+# -- than in a scons subprocess. This saves the startup time of the scons
+# -- process, which is significant for short commands such as lint and test,
+# -- but the output of the tools is passed as is rather than via the apio
+# -- output filter. Used as a binary flag, similar to APIO_DEBUG.
+APIO_SCONS_IN_PROCESS = "APIO_SCONS_IN_PROCESS"
+
 # -- List of all supported env options.
 _SUPPORTED_APIO_VARS = [
     APIO_HOME_DIR,
     APIO_PLATFORM,
     APIO_DEBUG,
+    APIO_SCONS_IN_PROCESS,
 ]
 
 
@@ -133,6 +133,14 @@ def set_env_for_packages(
     if verbose:
         _dump_env_mutations(apio_ctx, mutations)
 
+    # -- A process that runs multiple apio commands, e.g. a worker of
+    # -- 'apio batch', may already have the mutations from a previous
+    # -- apio context.
+    if mutations.paths and os.environ["PATH"].startswith(
+        os.pathsep.join(mutations.paths) + os.pathsep
+    ):
+        apio_ctx.env_was_already_set = True
+
     # -- If this is the first call in this apio invocation, apply the
     # -- mutations. These mutations are temporary for the lifetime of this
     # -- process and does not affect the user's shell environment.
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Sharding of the testbenches of the 'apio test --shard K/N' command,
+such that a test suite can be split across N machines. The split depends
+only on the testbench names and, optionally, on their durations in a
+previous run, so each machine selects its shard independently and every
+testbench is in exactly one shard.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# -- A shard spec, e.g. '2/4'.
+_SHARD_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """Parses a shard spec 'K/N', with 1 <= K <= N, and returns the zero
+    based shard index and the number of shards. Raises ValueError if the
+    spec is invalid."""
+    match = _SHARD_RE.match(spec)
+    if not match:
+        raise ValueError(f"invalid shard '{spec}', expecting K/N, e.g. 2/4.")
+    k, n = int(match.group(1)), int(match.group(2))
+    if not 1 <= k <= n:
+        raise ValueError(
+            f"invalid shard '{spec}', expecting 1 <= K <= N, e.g. 2/4."
+        )
+    return k - 1, n
+
+
+def select_shard(
+    names: List[str],
+    index: int,
+    count: int,
+    durations: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """Returns the names, in their original order, that belong to the shard
+    with the given zero based index out of 'count' shards.
+
+    Without durations, the sorted names are dealt round robin, such that the
+    shards have the same number of testbenches, +/- one. With durations,
+    the names are assigned longest first to the shard with the smallest
+    total duration, such that the shards have a near equal wall time.
+    Names without a duration are assumed to take the average duration."""
+
+    assert 0 <= index < count, (index, count)
+
+    ordered = sorted(set(names))
+    if not durations:
+        selected = set(ordered[index::count])
+        return [x for x in names if x in selected]
+
+    known = [durations[x] for x in ordered if x in durations]
+    default = sum(known) / len(known) if known else 1.0
+
+    # -- Longest first, ties broken by name for determinism.
+    weighted = sorted(
+        ((durations.get(x, default), x) for x in ordered),
+        key=lambda item: (-item[0], item[1]),
+    )
+    totals = [0.0] * count
+    selected = set()
+    for duration, name in weighted:
+        # -- The least loaded shard, ties broken by the lowest index.
+        shard = min(range(count), key=lambda i: (totals[i], i))
+        totals[shard] += duration
+        if shard == index:
+            selected.add(name)
+    return [x for x in names if x in selected]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""Parameter sweeps of the 'apio test --sweep' command. A sweep is a list
+of points and each point is a list of NAME=VALUE plusargs that are passed
+to the simulator, e.g. 'SEED=7 MODE=fast'. The points are given either by
+sweep specs, whose cartesian product is taken, or by a sweep file with one
+point per line.
+"""
+
+import re
+import itertools
+from pathlib import Path
+from typing import List, Tuple
+
+# -- A plusarg name, as accepted by $test$plusargs() and $value$plusargs().
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# -- An inclusive integer range, e.g. '1..100'.
+_RANGE_RE = re.compile(r"^(-?\d+)\.\.(-?\d+)$")
+
+
+def parse_sweep_spec(spec: str) -> Tuple[str, List[str]]:
+    """Parses a sweep spec and returns the plusarg name and its values.
+    The values are given as an inclusive integer range, e.g. 'SEED=1..100',
+    a comma separated list, e.g. 'MODE=fast,slow', or a single value.
+    Raises ValueError if the spec is invalid."""
+    name, sep, values_str = spec.partition("=")
+    name = name.strip()
+    values_str = values_str.strip()
+    if not sep or not _NAME_RE.match(name) or not values_str:
+        raise ValueError(
+            f"invalid sweep '{spec}', expecting NAME=FIRST..LAST "
+            "or NAME=VALUE1,VALUE2,..."
+        )
+
+    match = _RANGE_RE.match(values_str)
+    if match:
+        first, last = int(match.group(1)), int(match.group(2))
+        if first > last:
+            raise ValueError(f"invalid sweep '{spec}', empty range.")
+        return name, [str(x) for x in range(first, last + 1)]
+
+    values = [x.strip() for x in values_str.split(",")]
+    if not all(values) or any(" " in x for x in values):
+        raise ValueError(f"invalid sweep '{spec}', bad value list.")
+    return name, values
+
+
+def points_from_specs(specs: List[str]) -> List[str]:
+    """Returns the points of the cartesian product of the given sweep
+    specs, with the values of the last spec changing first."""
+    axes = [parse_sweep_spec(spec) for spec in specs]
+    names = [name for name, _ in axes]
+    if len(set(names)) != len(names):
+        raise ValueError("a plusarg is swept more than once.")
+    return [
+        " ".join(f"{name}={value}" for name, value in zip(names, values))
+        for values in itertools.product(*[values for _, values in axes])
+    ]
+
+
+def points_from_file(file_path: Path) -> List[str]:
+    """Returns the points of a sweep file. Each non empty line is a point
+    with space separated NAME=VALUE plusargs. Text after '#' is ignored."""
+    points = []
+    text = file_path.read_text(encoding="utf8")
+    for line_num, line in enumerate(text.splitlines(), start=1):
+        args = line.split("#", 1)[0].split()
+        if not args:
+            continue
+        for arg in args:
+            name, sep, _ = arg.partition("=")
+            if not sep or not _NAME_RE.match(name):
+                raise ValueError(
+                    f"{file_path}:{line_num}: invalid plusarg '{arg}', "
+                    "expecting NAME=VALUE."
+                )
+        points.append(" ".join(args))
+    if not points:
+        raise ValueError(f"{file_path}: no sweep points.")
+    return points
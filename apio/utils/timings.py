@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""The timings file of the build stages. Each scons run that executed at
+least one stage, e.g. synth or pnr, appends to _build/timings.json a record
+with the wall time, cpu time and peak memory of each stage. The last runs
+are kept such that 'apio report --timings' can show the trends.
+"""
+
+import json
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import List
+
+# -- The timings file, relative to the project dir.
+TIMINGS_FILE = Path("_build") / "timings.json"
+
+# -- The number of runs that are kept in the timings file.
+MAX_RUNS = 20
+
+
+@dataclass
+class StageTiming:
+    """The resources used by a single stage of a run."""
+
+    stage: str  # The stage name, e.g. 'synth'.
+    target: str  # The first target of the stage, e.g. '_build/hardware.json'.
+    wall_time: float = 0.0  # In seconds.
+    user_time: float = 0.0  # CPU user time of the child processes, in secs.
+    sys_time: float = 0.0  # CPU system time of the child processes, in secs.
+    max_rss_kb: int = 0  # Peak resident memory of a child process, in KB.
+
+
+@dataclass
+class RunTiming:
+    """The timings of a single scons run."""
+
+    targets: List[str]  # The scons command line targets, e.g. ['build'].
+    timestamp: float  # The start time of the run, in seconds since epoch.
+    total_time: float  # The wall time of the entire run, in seconds.
+    stages: List[StageTiming] = field(default_factory=list)
+
+    @staticmethod
+    def from_dict(data: dict) -> "RunTiming":
+        """Constructs a run timing from its dict representation."""
+        data = dict(data)
+        data["stages"] = [StageTiming(**x) for x in data.get("stages", [])]
+        return RunTiming(**data)
+
+
+def load_runs(file_path: Path = TIMINGS_FILE) -> List[RunTiming]:
+    """Returns the runs in the timings file, oldest first. Returns an empty
+    list if the file doesn't exist or is not valid."""
+    try:
+        with open(file_path, "r", encoding="utf8") as f:
+            data = json.load(f)
+        return [RunTiming.from_dict(x) for x in data["runs"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+
+
+def append_run(run: RunTiming, file_path: Path = TIMINGS_FILE) -> None:
+    """Appends a run to the timings file, dropping the oldest runs if
+    needed."""
+    runs = load_runs(file_path) + [run]
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, "w", encoding="utf8") as f:
+        json.dump({"runs": [asdict(x) for x in runs[-MAX_RUNS:]]}, f, indent=2)
+        f.write("\n")
@@ -10,6 +10,7 @@
 """Misc utility functions and classes."""
 
 import sys
+import re
 import os
 import json
 import traceback
@@ -721,6 +722,60 @@ def split(
     return s
 
 
+def parse_size(s: str) -> int:
+    """Parse a human friendly size string such as '500', '64K', '2M', '1.5GB'
+    into a number of bytes. Units are powers of 1024 and are case
+    insensitive. Raises ValueError if the string is invalid."""
+
+    # -- The supported unit suffixes.
+    units = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+    # -- Split to a number and an optional unit, with an optional 'B'.
+    match = re.fullmatch(
+        r"\s*([0-9]+(?:\.[0-9]+)?)\s*([KMGT]?)B?\s*", s.upper()
+    )
+    if not match:
+        raise ValueError(f"Invalid size value: [{s}]")
+
+    # -- Compute the number of bytes.
+    number, unit = match.groups()
+    return int(float(number) * units[unit])
+
+
+def parse_duration(s: str) -> float:
+    """Parse a human friendly duration string such as '90', '90s', '10m',
+    '1.5h' or '7d' into a number of seconds. A number without a unit is in
+    seconds. Raises ValueError if the string is invalid."""
+
+    # -- The supported unit suffixes.
+    units = {"": 1, "S": 1, "M": 60, "H": 3600, "D": 86400}
+
+    match = re.fullmatch(r"\s*([0-9]+(?:\.[0-9]+)?)\s*([SMHD]?)\s*", s.upper())
+    if not match:
+        raise ValueError(f"Invalid duration value: [{s}]")
+
+    number, unit = match.groups()
+    return float(number) * units[unit]
+
+
+def parse_sim_time(s: str) -> int:
+    """Parse a simulated time string such as '500', '500ns', '20us' or '3ms'
+    into a number of nanoseconds. A number without a unit is in nanoseconds.
+    Raises ValueError if the string is invalid."""
+
+    # -- The supported unit suffixes.
+    units = {"": 1, "NS": 1, "US": 10**3, "MS": 10**6, "S": 10**9}
+
+    match = re.fullmatch(
+        r"\s*([0-9]+(?:\.[0-9]+)?)\s*(NS|US|MS|S)?\s*", s.upper()
+    )
+    if not match:
+        raise ValueError(f"Invalid simulated time value: [{s}]")
+
+    number, unit = match.groups()
+    return int(float(number) * units[unit or ""])
+
+
 def fpga_arch_sort_key(fpga_arch: str) -> Any:
     """Given an fpga arch name such as 'ice40', return a sort key
     got force our prefered order of sorthing by architecutre. Used in
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2024 FPGAwars
+# -- Authors Juan Gonzáles, Jesús Arroyo
+# -- Licence GPLv2
+"""A streaming reader of simulation waveform files, used by the 'apio
+inspect' command and usable as a python API. The file is read token by
+token and the value changes are generated one at a time, so the memory use
+doesn't depend on the size of the file. FST files are converted on the fly
+to VCD text by the fst2vcd tool of the oss-cad-suite package.
+
+Example:
+
+    with open_waves("_build/main_tb.vcd") as reader:
+        counts = toggle_counts(reader.changes(["main_tb.uut.*"]))
+"""
+
+import re
+import subprocess
+from fnmatch import fnmatchcase
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+# -- The VCD keywords of value changes that are not signal values.
+_SIM_KEYWORDS = {"$dumpvars", "$dumpall", "$dumpon", "$dumpoff", "$end"}
+
+# -- An assertion, e.g. 'main_tb.led == 1' or 'main_tb.led == 1 @ 500'.
+_ASSERTION_RE = re.compile(
+    r"^\s*(?P<signal>[^\s=!@]+)\s*(?P<op>==|!=)\s*(?P<value>[^\s@]+)"
+    r"\s*(@\s*(?P<time>\d+))?\s*$"
+)
+
+
+class WavesError(Exception):
+    """Raised on an invalid waveform file or assertion."""
+
+
+@dataclass(frozen=True)
+class Signal:
+    """A signal of the waveform file."""
+
+    name: str  # The hierarchical name, e.g. 'main_tb.uut.led'.
+    width: int  # The width in bits.
+    id_code: str  # The VCD identifier code of the signal.
+
+
+@dataclass(frozen=True)
+class Change:
+    """A value change of a signal."""
+
+    time: int  # In timescale units.
+    signal: Signal
+    value: str  # E.g. '1', '0101', 'x', or a real number for reals.
+
+
+class VcdReader:
+    """Reads a VCD text stream. The header is read on construction and the
+    value changes are then generated by changes(), in a single pass."""
+
+    def __init__(self, stream: TextIO):
+        self._tokens = _tokenize(stream)
+        self.timescale = ""
+        self.signals: List[Signal] = []
+        self._read_header()
+
+    def _read_header(self) -> None:
+        """Reads the declarations up to $enddefinitions."""
+        scopes = []
+        for token in self._tokens:
+            if token == "$enddefinitions":
+                self._skip_to_end()
+                return
+            if token == "$scope":
+                # -- E.g. '$scope module main_tb $end'.
+                args = self._read_to_end()
+                if not args:
+                    raise WavesError("Invalid $scope.")
+                scopes.append(args[-1])
+            elif token == "$upscope":
+                self._skip_to_end()
+                scopes.pop()
+            elif token == "$timescale":
+                self.timescale = "".join(self._read_to_end())
+            elif token == "$var":
+                args = self._read_to_end()
+                if len(args) < 4:
+                    raise WavesError(f"Invalid $var: {' '.join(args)}")
+                # -- A bit select suffix, e.g. '[7:0]', is a separate token.
+                name = ".".join(scopes + ["".join(args[3:])])
+                self.signals.append(Signal(name, int(args[1]), args[2]))
+            elif token.startswith("$"):
+                self._skip_to_end()
+        raise WavesError("Missing $enddefinitions.")
+
+    def _read_to_end(self) -> List[str]:
+        """Returns the tokens up to the next $end."""
+        result = []
+        for token in self._tokens:
+            if token == "$end":
+                return result
+            result.append(token)
+        raise WavesError("Missing $end.")
+
+    def _skip_to_end(self) -> None:
+        """Skips the tokens up to the next $end."""
+        self._read_to_end()
+
+    def select(self, patterns: Optional[List[str]] = None) -> List[Signal]:
+        """Returns the signals whose names match any of the given glob
+        patterns, e.g. 'main_tb.uut.*', or all the signals if None. A
+        pattern also matches a signal with the same name, such that names
+        with bit selects, e.g. 'main_tb.count[3:0]', need no escaping."""
+        if not patterns:
+            return list(self.signals)
+        return [
+            s
+            for s in self.signals
+            if any(s.name == p or fnmatchcase(s.name, p) for p in patterns)
+        ]
+
+    def changes(
+        self,
+        patterns: Optional[List[str]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Iterator[Change]:
+        """Generates the value changes of the signals that match the
+        patterns, see select(), with times in [start, end]. The values of
+        the signals at 'start' are generated first, with time 'start'.
+        Can be called only once per reader."""
+
+        selected: Dict[str, List[Signal]] = {}
+        for signal in self.select(patterns):
+            selected.setdefault(signal.id_code, []).append(signal)
+
+        # -- The values before the window, by id code.
+        pending: Dict[str, str] = {}
+        for time, id_code, value in self._value_changes():
+            if end is not None and time > end:
+                break
+            if start is not None and time < start:
+                if id_code in selected:
+                    pending[id_code] = value
+                continue
+            if pending:
+                yield from _initial_changes(pending, selected, start)
+                pending = {}
+            for signal in selected.get(id_code, []):
+                yield Change(time, signal, value)
+
+        if pending:
+            yield from _initial_changes(pending, selected, start)
+
+    def _value_changes(self) -> Iterator[Tuple[int, str, str]]:
+        """Generates the (time, id_code, value) of all the value changes,
+        with lower case values."""
+        time = 0
+        tokens = self._tokens
+        for token in tokens:
+            kind = token[0]
+            if kind == "#":
+                time = int(token[1:])
+            elif kind in "bBrR":
+                id_code = next(tokens, None)
+                if id_code is None:
+                    raise WavesError(f"Missing id code at #{time}.")
+                yield time, id_code, token[1:].lower()
+            elif kind in "01xXzZ":
+                yield time, token[1:], kind.lower()
+            elif token == "$comment":
+                self._skip_to_end()
+            elif token not in _SIM_KEYWORDS:
+                raise WavesError(f"Unexpected token '{token}' at #{time}.")
+
+
+def _initial_changes(
+    pending: Dict[str, str],
+    selected: Dict[str, List[Signal]],
+    start: int,
+) -> Iterator[Change]:
+    """Generates the values of the signals at the start of the window."""
+    for id_code, value in pending.items():
+        for signal in selected[id_code]:
+            yield Change(start, signal, value)
+
+
+def _tokenize(stream: TextIO) -> Iterator[str]:
+    """Generates the white space separated tokens of a text stream."""
+    for line in stream:
+        yield from line.split()
+
+
+@contextmanager
+def open_waves(file_path: Union[str, Path]) -> Iterator[VcdReader]:
+    """Opens a .vcd or .fst file and returns a reader. A .fst file is
+    converted to VCD by fst2vcd, which should be in the PATH."""
+    file_path = Path(file_path)
+    if file_path.suffix != ".fst":
+        with open(file_path, "r", encoding="utf8", errors="replace") as f:
+            yield VcdReader(f)
+        return
+
+    try:
+        # pylint: disable-next=consider-using-with
+        proc = subprocess.Popen(
+            ["fst2vcd", str(file_path)],
+            stdout=subprocess.PIPE,
+            text=True,
+            errors="replace",
+        )
+    except FileNotFoundError as e:
+        raise WavesError("fst2vcd not found, can't read .fst files.") from e
+    try:
+        yield VcdReader(proc.stdout)
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+# pylint: disable=too-few-public-methods
+class ToggleCounter:
+    """Counts the value changes of each signal. The first value of a signal
+    is not counted as a toggle."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self._last: Dict[str, str] = {}
+
+    def update(self, change: Change) -> None:
+        """Processes the next change."""
+        name = change.signal.name
+        prev = self._last.get(name)
+        if prev is None:
+            self.counts[name] = 0
+        elif prev != change.value:
+            self.counts[name] += 1
+        self._last[name] = change.value
+
+
+def toggle_counts(changes: Iterable[Change]) -> Dict[str, int]:
+    """Returns the toggle counts of the signals of the changes, by name."""
+    counter = ToggleCounter()
+    for change in changes:
+        counter.update(change)
+    return counter.counts
+
+
+@dataclass
+class Assertion:
+    """A simple assertion on the value of a signal, e.g. 'main_tb.err == 0'
+    which should hold at any time the signal has a value, or
+    'main_tb.led == 1 @ 500' which should hold at time 500."""
+
+    text: str  # The assertion as given by the user.
+    signal: str  # The hierarchical signal name.
+    equal: bool  # True for '==', False for '!='.
+    value: str  # The expected value, normalized, see _normalize().
+    time: Optional[int] = None  # If None, the assertion should always hold.
+
+    @staticmethod
+    def parse(text: str) -> "Assertion":
+        """Parses an assertion. The value is a decimal, 0x hex or 0b binary
+        number, or x or z."""
+        match = _ASSERTION_RE.match(text)
+        if not match:
+            raise WavesError(
+                f"Invalid assertion '{text}', expecting "
+                "'SIGNAL == VALUE' or 'SIGNAL != VALUE [@ TIME]'."
+            )
+        value = match.group("value").lower()
+        try:
+            if value in ("x", "z"):
+                normalized = value
+            else:
+                normalized = str(int(value, 0))
+        except ValueError as e:
+            raise WavesError(f"Invalid value in assertion '{text}'.") from e
+        time = match.group("time")
+        return Assertion(
+            text=text,
+            signal=match.group("signal"),
+            equal=match.group("op") == "==",
+            value=normalized,
+            time=int(time) if time is not None else None,
+        )
+
+    def holds(self, value: Optional[str]) -> bool:
+        """Returns True if the assertion holds for the given VCD value."""
+        return (_normalize(value) == self.value) == self.equal
+
+
+@dataclass
+class AssertionFailure:
+    """The first failure of an assertion."""
+
+    assertion: Assertion
+    time: int  # The time of the failure.
+    value: Optional[str]  # The value of the signal, None if no value.
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    """Converts a VCD value to the form of Assertion.value. Values with x
+    or z bits are 'x' or 'z'."""
+    if value is None:
+        return None
+    if "x" in value:
+        return "x"
+    if "z" in value:
+        return "z"
+    try:
+        return str(int(value, 2))
+    except ValueError:
+        # -- A real value.
+        return value
+
+
+class AssertionChecker:
+    """Evaluates assertions over a sequence of changes, keeping only the
+    current values of the signals of the assertions."""
+
+    def __init__(self, assertions: List[Assertion]):
+        self.assertions = assertions
+        # -- The first failure of each failed assertion, by index.
+        self._failures: Dict[int, AssertionFailure] = {}
+        self._values: Dict[str, str] = {}
+        # -- The timed assertions that were not evaluated yet, by time.
+        self._timed = sorted(
+            (a.time, i) for i, a in enumerate(assertions) if a.time is not None
+        )
+
+    def _check_timed(self, before_time: Optional[int]) -> None:
+        """Evaluates the timed assertions with time < before_time, or all of
+        them if None."""
+        while self._timed and (
+            before_time is None or self._timed[0][0] < before_time
+        ):
+            time, i = self._timed.pop(0)
+            value = self._values.get(self.assertions[i].signal)
+            if not self.assertions[i].holds(value):
+                self._failures[i] = AssertionFailure(
+                    self.assertions[i], time, value
+                )
+
+    def update(self, change: Change) -> None:
+        """Processes the next change."""
+        self._check_timed(change.time)
+        name = change.signal.name
+        self._values[name] = change.value
+        for i, assertion in enumerate(self.assertions):
+            if (
+                assertion.time is None
+                and assertion.signal == name
+                and i not in self._failures
+                and not assertion.holds(change.value)
+            ):
+                self._failures[i] = AssertionFailure(
+                    assertion, change.time, change.value
+                )
+
+    def finish(self) -> List[AssertionFailure]:
+        """Evaluates the remaining timed assertions and returns the first
+        failure of each of the failed assertions, in the order of the
+        assertions."""
+        self._check_timed(None)
+        return [self._failures[i] for i in sorted(self._failures)]
+
+
+def check_assertions(
+    changes: Iterable[Change], assertions: List[Assertion]
+) -> List[AssertionFailure]:
+    """Evaluates the assertions over the changes, which should include the
+    signals of the assertions, and returns the failures."""
+    checker = AssertionChecker(assertions)
+    for change in changes:
+        checker.update(change)
+    return checker.finish()
@@ -0,0 +1,78 @@
+"""A python script that compares the run time of an apio command when scons
+runs as a subprocess and when it runs within the apio process. Run it in an
+apio project directory, e.g.
+
+    python scripts/benchmark_scons_in_process.py --runs 10 lint
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from typing import List
+from click import secho
+
+# -- The env var that selects the in process mode.
+IN_PROCESS_VAR = "APIO_SCONS_IN_PROCESS"
+
+
+def time_command(apio_args: List[str], in_process: bool, runs: int) -> List:
+    """Runs the apio command the given number of times and returns the
+    list of run times in seconds."""
+
+    env = dict(os.environ)
+    if in_process:
+        env[IN_PROCESS_VAR] = "1"
+    else:
+        env.pop(IN_PROCESS_VAR, None)
+
+    command = [sys.executable, "-m", "apio.main"] + apio_args
+
+    times = []
+    for _ in range(runs):
+        start_time = time.time()
+        result = subprocess.run(
+            command, env=env, capture_output=True, check=False
+        )
+        times.append(time.time() - start_time)
+        if result.returncode != 0:
+            secho(f"Error: 'apio {' '.join(apio_args)}' failed.", fg="red")
+            secho(result.stdout.decode() + result.stderr.decode())
+            sys.exit(1)
+    return times
+
+
+def main():
+    """Main function of the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Number of runs of each mode."
+    )
+    parser.add_argument(
+        "apio_args", nargs="+", help="The apio command to run, e.g. 'lint'."
+    )
+    args = parser.parse_args()
+
+    # -- A warmup run, e.g. to install missing packages.
+    time_command(args.apio_args, in_process=False, runs=1)
+
+    # -- Run the two modes.
+    secho(f"{'MODE':<14}{'MEAN':>8}{'MIN':>8}{'MAX':>8}", bold=True)
+    means = {}
+    for mode, in_process in [("subprocess", False), ("in-process", True)]:
+        times = time_command(args.apio_args, in_process, args.runs)
+        means[mode] = statistics.mean(times)
+        secho(
+            f"{mode:<14}{means[mode]:>7.3f}s"
+            f"{min(times):>7.3f}s{max(times):>7.3f}s"
+        )
+
+    saved = means["subprocess"] - means["in-process"]
+    secho(f"\nIn-process saves {saved:.3f}s per run.")
+
+
+if __name__ == "__main__":
+    main()
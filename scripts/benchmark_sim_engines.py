@@ -0,0 +1,110 @@
+"""A python script that compares the run time of 'apio test' with the
+iverilog and the verilator simulation engines, on the projects with
+testbenches under a given directory. Each project is copied to a temporary
+directory, such that the projects are not modified. Run it from the repo
+root, e.g.
+
+    python scripts/benchmark_sim_engines.py --runs 3 test-examples
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+from click import secho
+
+# -- The simulation engines to compare, as in the apio.ini 'sim-engine'.
+ENGINES = ["iverilog", "verilator"]
+
+
+def find_projects(root: Path) -> List[Path]:
+    """Returns the project dirs under root that have testbenches."""
+    return sorted(
+        ini.parent
+        for ini in root.rglob("apio.ini")
+        if "_build" not in ini.parts and any(ini.parent.glob("*_tb.v"))
+    )
+
+
+def time_test(project: Path, engine: str, runs: int) -> Optional[List]:
+    """Runs 'apio test --force' in a copy of the project with the given
+    engine and returns the list of run times in seconds, or None if the
+    tests failed."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(tmp_dir) / project.name
+        shutil.copytree(
+            project, work_dir, ignore=shutil.ignore_patterns("_build")
+        )
+        with open(work_dir / "apio.ini", "a", encoding="utf8") as f:
+            f.write(f"\nsim-engine = {engine}\n")
+
+        command = [sys.executable, "-m", "apio.main", "test", "--force"]
+        times = []
+        for _ in range(runs):
+            start_time = time.time()
+            result = subprocess.run(
+                command,
+                cwd=work_dir,
+                env=dict(os.environ),
+                capture_output=True,
+                check=False,
+            )
+            times.append(time.time() - start_time)
+            if result.returncode != 0:
+                return None
+        return times
+
+
+def main():
+    """Main function of the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--runs", type=int, default=3, help="Number of runs of each engine."
+    )
+    parser.add_argument(
+        "root", type=Path, help="The directory to search for projects."
+    )
+    args = parser.parse_args()
+
+    projects = find_projects(args.root)
+    if not projects:
+        secho(f"Error: no projects with testbenches in {args.root}", fg="red")
+        sys.exit(1)
+
+    name_len = max(len(str(x.relative_to(args.root))) for x in projects) + 4
+    secho(
+        f"{'PROJECT':<{name_len}}"
+        + "".join(f"{x.upper():>12}" for x in ENGINES)
+        + f"{'SPEEDUP':>10}",
+        bold=True,
+    )
+    for project in projects:
+        means = {}
+        for engine in ENGINES:
+            times = time_test(project, engine, args.runs)
+            means[engine] = statistics.mean(times) if times else None
+        cells = "".join(
+            f"{means[x]:>11.2f}s" if means[x] else f"{'FAILED':>12}"
+            for x in ENGINES
+        )
+        speedup = (
+            f"{means['iverilog'] / means['verilator']:>9.1f}x"
+            if all(means.values())
+            else ""
+        )
+        secho(
+            f"{str(project.relative_to(args.root)):<{name_len}}"
+            f"{cells}{speedup}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+  Test for the "apio batch" command
+"""
+
+from test.conftest import ApioRunner
+from apio.commands.apio import cli as apio
+
+
+def test_batch_no_projects(apio_runner: ApioRunner):
+    """Test "apio batch" with no projects."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Run "apio batch build" in a directory with no projects.
+        result = sb.invoke_apio_cmd(apio, ["batch", "build"])
+        assert result.exit_code == 1, result.output
+        assert "Error: no apio projects found" in result.output
+
+        # -- An unsupported command.
+        result = sb.invoke_apio_cmd(apio, ["batch", "upload"])
+        assert result.exit_code != 0, result.output
+        assert "Invalid value for 'cmd'" in result.output
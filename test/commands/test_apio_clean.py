@@ -46,3 +46,33 @@ def test_clean_with_apio_ini(apio_runner: ApioRunner):
         assert not Path(".sconsign.dblite").exists()
         assert not Path("_build/hardware.out").exists()
         assert not Path("_build").exists()
+
+
+def test_clean_partial(apio_runner: ApioRunner):
+    """Tests the apio clean command with --waves-only and --older-than."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_default_apio_ini()
+        sb.write_file(".sconsign.dblite", "dummy text")
+        sb.write_file("_build/main_tb.vcd", "dummy text")
+        sb.write_file("_build/main_tb.out", "dummy text")
+
+        # -- Delete the waveforms only.
+        result = sb.invoke_apio_cmd(apio, ["clean", "--waves-only"])
+        assert result.exit_code == 0, result.output
+        assert "Deleted 1 file" in result.output
+        assert not Path("_build/main_tb.vcd").exists()
+        assert Path("_build/main_tb.out").exists()
+        assert Path(".sconsign.dblite").exists()
+
+        # -- Nothing is older than a day.
+        result = sb.invoke_apio_cmd(apio, ["clean", "--older-than", "1d"])
+        assert result.exit_code == 0, result.output
+        assert "Deleted 0 files" in result.output
+        assert Path("_build/main_tb.out").exists()
+
+        # -- An invalid age.
+        result = sb.invoke_apio_cmd(apio, ["clean", "--older-than", "xyz"])
+        assert result.exit_code == 1, result.output
+        assert "Error: invalid --older-than value [xyz]" in result.output
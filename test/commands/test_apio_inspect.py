@@ -0,0 +1,59 @@
+"""
+  Test for the "apio inspect" command
+"""
+
+from test.conftest import ApioRunner
+from test.utils.test_waves import VCD_TEXT
+from apio.commands.apio import cli as apio
+
+
+def test_inspect(apio_runner: ApioRunner):
+    """Tests the apio inspect command with a small VCD file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_default_apio_ini()
+
+        # -- No waveform file yet.
+        result = sb.invoke_apio_cmd(apio, ["inspect"])
+        assert result.exit_code == 1, result.output
+        assert "Error: specify the waveform file, found 0" in result.output
+
+        sb.write_file("_build/main_tb.vcd", VCD_TEXT)
+
+        # -- List the signals.
+        result = sb.invoke_apio_cmd(apio, ["inspect", "--list"])
+        sb.assert_ok(result)
+        assert "main_tb.uut.count[3:0]" in result.output
+
+        # -- Print the changes in a time window.
+        result = sb.invoke_apio_cmd(
+            apio, ["inspect", "main_tb", "-s", "*clk", "--start", "20"]
+        )
+        sb.assert_ok(result)
+        assert "timescale 1ns" in result.output
+        assert "          20  main_tb.clk  0" in result.output
+        assert "          10  main_tb.clk" not in result.output
+
+        # -- Print the toggle counts.
+        result = sb.invoke_apio_cmd(apio, ["inspect", "--toggles"])
+        sb.assert_ok(result)
+        assert "main_tb.clk" in result.output
+        assert "5\n" in result.output
+
+        # -- Check assertions.
+        result = sb.invoke_apio_cmd(
+            apio, ["inspect", "-a", "main_tb.uut.count[3:0] == 2 @ 30"]
+        )
+        sb.assert_ok(result)
+        assert "All 1 assertions passed." in result.output
+
+        result = sb.invoke_apio_cmd(
+            apio, ["inspect", "_build/main_tb.vcd", "-a", "main_tb.err == 0"]
+        )
+        assert result.exit_code == 1, result.output
+        assert "FAILED 'main_tb.err == 0' at 50, value is 1." in result.output
+
+        result = sb.invoke_apio_cmd(apio, ["inspect", "-a", "main_tb.x == 0"])
+        assert result.exit_code == 1, result.output
+        assert "Error: no signal 'main_tb.x'" in result.output
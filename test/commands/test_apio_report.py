@@ -4,6 +4,7 @@
 
 from test.conftest import ApioRunner
 from apio.commands.apio import cli as apio
+from apio.utils.timings import RunTiming, StageTiming, append_run
 
 
 # R0801: Similar lines in 2 files
@@ -17,3 +18,42 @@ def test_report_no_apio(apio_runner: ApioRunner):
         result = sb.invoke_apio_cmd(apio, ["report"])
         assert result.exit_code != 0, result.output
         assert "Error: missing project file apio.ini" in result.output
+
+
+def test_report_timings(apio_runner: ApioRunner):
+    """Tests the apio report --timings command."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_default_apio_ini()
+
+        # -- No timings yet.
+        result = sb.invoke_apio_cmd(apio, ["report", "--timings"])
+        assert result.exit_code == 1, result.output
+        assert "Error: no timings found" in result.output
+
+        # -- Two runs, the synth of the last one is twice as slow.
+        for synth_time in [2.0, 4.0]:
+            append_run(
+                RunTiming(
+                    targets=["build"],
+                    timestamp=1700000000,
+                    total_time=synth_time + 1.5,
+                    stages=[
+                        StageTiming(
+                            "synth", "_build/hardware.json", synth_time
+                        ),
+                        StageTiming(
+                            "pnr", "_build/hardware.asc", 1.0, 0.9, 0.1, 2048
+                        ),
+                    ],
+                )
+            )
+
+        result = sb.invoke_apio_cmd(apio, ["report", "--timings"])
+        sb.assert_ok(result)
+        assert "synth           _build/hardware.json" in result.output
+        assert "+100%" in result.output
+        assert "2.0 MB" in result.output
+        assert "other (scons)" in result.output
+        assert "Previous runs:" in result.output
@@ -18,3 +18,22 @@ def test_test(apio_runner: ApioRunner):
         result = sb.invoke_apio_cmd(apio, ["test"])
         assert result.exit_code != 0, result.output
         assert "Error: missing project file apio.ini" in result.output
+
+
+def test_test_invalid_timeout(apio_runner: ApioRunner):
+    """Tests apio test with an invalid 'test-timeout' in apio.ini."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_apio_ini(
+            {
+                "board": "alhambra-ii",
+                "top-module": "main",
+                "test-timeout": "slow_tb=1x",
+            }
+        )
+        result = sb.invoke_apio_cmd(apio, ["test"])
+        assert result.exit_code == 1, result.output
+        assert (
+            "Error: invalid 'test-timeout' value [slow_tb=1x]" in result.output
+        )
@@ -0,0 +1,46 @@
+"""
+Tests of the batch.py module.
+"""
+
+import json
+from pathlib import Path
+from test.conftest import ApioRunner
+from apio.managers.batch import (
+    find_projects,
+    run_projects,
+    write_results_file,
+)
+
+
+def test_batch_run(apio_runner: ApioRunner):
+    """Tests finding projects and running a command in them."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Projects that fail before using the apio packages, such that
+        # -- the test can run offline.
+        sb.write_file("p1/apio.ini", "[env]\ntop-module = main\n")
+        sb.write_file("sub/p2/apio.ini", "[env]\nboard = no-such-board\n")
+        sb.write_file("sub/.hidden/apio.ini", "")
+        sb.write_file("sub/_build/apio.ini", "")
+        sb.write_file("sub/README.md", "")
+
+        root = Path.cwd()
+        projects = find_projects(root)
+        assert projects == [root / "p1", root / "sub/p2"]
+
+        completed = []
+        results = run_projects(
+            "build", projects, root, 2, on_result=completed.append
+        )
+        assert len(completed) == 2
+        assert [r.project for r in results] == ["p1", "sub/p2"]
+        assert not any(r.passed for r in results)
+        assert "missing option 'board'" in results[0].output
+        assert "no such board 'no-such-board'" in results[1].output
+
+        write_results_file(Path("results.json"), "build", results, 1.5)
+        data = json.loads(sb.read_file("results.json"))
+        assert data["failed"] == 2
+        assert data["projects"][1]["project"] == "sub/p2"
+        assert data["projects"][1]["passed"] is False
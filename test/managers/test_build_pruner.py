@@ -0,0 +1,99 @@
+"""
+Tests of the build_pruner.py module.
+"""
+
+import os
+import time
+from pathlib import Path
+from apio.managers.build_pruner import (
+    MIN_EVICT_SIZE,
+    prune_build_dir,
+    clean_build_dir,
+)
+
+
+def _write(path: Path, size: int, age: float) -> None:
+    """Writes a file with the given size in bytes, that was last used
+    'age' seconds ago."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    t = time.time() - age
+    os.utime(path, (t, t))
+
+
+def test_prune_build_dir(tmp_path: Path):
+    """Tests the eviction order of the size quota."""
+
+    size = MIN_EVICT_SIZE
+    _write(tmp_path / "main_tb.vcd", size, age=10)
+    _write(tmp_path / "hardware.json", size, age=300)
+    _write(tmp_path / "hardware.asc", size, age=200)
+    _write(tmp_path / "sub/hardware.pnr", size, age=100)
+    _write(tmp_path / "small.log", 100, age=1000)
+    _write(tmp_path / "scons.params", size, age=1000)
+    _write(tmp_path / "verilog_index.json", size, age=1000)
+    _write(tmp_path / "scanner_cache.json", size, age=1000)
+    _write(tmp_path / "format_cache.json", size, age=1000)
+
+    # -- Within the quota, nothing is deleted.
+    result = prune_build_dir(tmp_path, 20 * size)
+    assert (result.files, result.size) == (0, 0)
+
+    # -- The waveform goes first, even though it's the most recent, and then
+    # -- the least recently used artifacts.
+    result = prune_build_dir(tmp_path, 6 * size)
+    assert (result.files, result.size) == (3, 3 * size)
+    assert sorted(
+        str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*.*")
+    ) == [
+        "format_cache.json",
+        "scanner_cache.json",
+        "scons.params",
+        "small.log",
+        str(Path("sub/hardware.pnr")),
+        "verilog_index.json",
+    ]
+
+    # -- Small, bookkeeping and cache files are never evicted.
+    result = prune_build_dir(tmp_path, 0)
+    assert result.files == 1
+    assert sorted(p.name for p in tmp_path.glob("*.*")) == [
+        "format_cache.json",
+        "scanner_cache.json",
+        "scons.params",
+        "small.log",
+        "verilog_index.json",
+    ]
+
+
+def test_clean_build_dir(tmp_path: Path):
+    """Tests the partial cleaning of the build directory."""
+
+    _write(tmp_path / "old_tb.vcd", 10, age=3600)
+    _write(tmp_path / "new_tb.fst", 10, age=0)
+    _write(tmp_path / "old.out", 10, age=3600)
+    _write(tmp_path / "sub/new.out", 10, age=0)
+    _write(tmp_path / "old/old.out", 10, age=3600)
+    _write(tmp_path / "scanner_cache.json", 10, age=3600)
+    _write(tmp_path / "timings.json", 10, age=3600)
+
+    # -- Old waveforms only.
+    result = clean_build_dir(tmp_path, waves_only=True, older_than=60)
+    assert (result.files, result.size) == (1, 10)
+    assert not (tmp_path / "old_tb.vcd").exists()
+
+    # -- All the old files, except for the bookkeeping and cache files. The
+    # -- emptied subdirectory is removed.
+    result = clean_build_dir(tmp_path, waves_only=False, older_than=60)
+    assert result.files == 2
+    assert not (tmp_path / "old").exists()
+
+    # -- All the waveforms.
+    result = clean_build_dir(tmp_path, waves_only=True, older_than=None)
+    assert result.files == 1
+    assert sorted(p.name for p in tmp_path.rglob("*")) == [
+        "new.out",
+        "scanner_cache.json",
+        "sub",
+        "timings.json",
+    ]
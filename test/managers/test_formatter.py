@@ -0,0 +1,91 @@
+"""
+Tests of the formatter.py module.
+"""
+
+import sys
+from pathlib import Path
+from test.conftest import ApioRunner
+from apio.managers.formatter import (
+    FormatCache,
+    FormatStatus,
+    format_files,
+)
+
+# -- A fake formatter that writes the upper case text of the file to
+# -- stdout, and fails for files named 'bad.v'.
+FAKE_FORMATTER = """
+import sys
+from pathlib import Path
+if sys.argv[-1] == "bad.v":
+    sys.stderr.write("syntax error\\n")
+    sys.exit(1)
+sys.stdout.write(Path(sys.argv[-1]).read_text(encoding="utf8").upper())
+"""
+
+
+def test_format_files(apio_runner: ApioRunner):
+    """Tests formatting, checking and skipping of cached files."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("fake.py", FAKE_FORMATTER)
+        sb.write_file("a.v", "module a;\n")
+        sb.write_file("b.v", "MODULE B;\n")
+        command = [sys.executable, "fake.py"]
+        cache_file = Path("_build/format_cache.json")
+        files = ["a.v", "b.v"]
+
+        def run(check: bool, key: str = "key"):
+            results = format_files(
+                files,
+                command,
+                jobs=2,
+                check=check,
+                cache=FormatCache(cache_file, key),
+                on_result=lambda r: None,
+            )
+            return [r.status for r in results]
+
+        # -- Check mode doesn't modify the files.
+        assert run(check=True) == [
+            FormatStatus.NEEDS_FORMAT,
+            FormatStatus.UNCHANGED,
+        ]
+        assert Path("a.v").read_text(encoding="utf8") == "module a;\n"
+
+        # -- Format the files.
+        assert run(check=False) == [
+            FormatStatus.FORMATTED,
+            FormatStatus.CACHED,
+        ]
+        assert Path("a.v").read_text(encoding="utf8") == "MODULE A;\n"
+
+        # -- Now both are cached.
+        assert run(check=True) == [FormatStatus.CACHED, FormatStatus.CACHED]
+
+        # -- A modified file is formatted again.
+        sb.write_file("b.v", "module b;\n", exists_ok=True)
+        assert run(check=False) == [
+            FormatStatus.CACHED,
+            FormatStatus.FORMATTED,
+        ]
+
+        # -- A different command invalidates the cache.
+        assert run(check=False, key="other") == [
+            FormatStatus.UNCHANGED,
+            FormatStatus.UNCHANGED,
+        ]
+
+        # -- Formatting errors.
+        sb.write_file("bad.v", "module bad;\n")
+        files = ["bad.v"]
+        results = format_files(
+            files,
+            command,
+            jobs=1,
+            check=False,
+            cache=None,
+            on_result=lambda r: None,
+        )
+        assert results[0].status == FormatStatus.FAILED
+        assert "syntax error" in results[0].output
@@ -158,3 +158,27 @@ def test_explicit_params(apio_runner: ApioRunner):
 
         # -- Compare actual to expected values.
         assert str(scons_params) == str(expected)
+
+
+def test_artifact_cache_params(apio_runner: ApioRunner):
+    """Tests the construct_scons_params() with the artifact cache option."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Without the option, the cache is disabled.
+        sb.write_apio_ini(TEST_APIO_INI_DICT)
+        scons = SCons(ApioContext(scope=ApioContextScope.PROJECT_REQUIRED))
+        scons_params = scons.construct_scons_params()
+        assert not scons_params.HasField("artifact_cache")
+
+        # -- With the option, the cache is enabled.
+        sb.write_apio_ini(
+            {**TEST_APIO_INI_DICT, "artifact-cache-max-size": "2M"}
+        )
+        scons = SCons(ApioContext(scope=ApioContextScope.PROJECT_REQUIRED))
+        scons_params = scons.construct_scons_params()
+        assert scons_params.artifact_cache.max_size == 2 * 1024 * 1024
+        assert scons_params.artifact_cache.cache_dir == str(
+            sb.home_dir / "cache" / "artifacts"
+        )
+        assert scons_params.artifact_cache.toolchain_version == "0.0.0"
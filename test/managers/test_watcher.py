@@ -0,0 +1,92 @@
+"""
+Tests of the watcher.py module.
+"""
+
+import os
+from pathlib import Path
+from typing import List
+from test.conftest import ApioRunner
+from apio.managers.watcher import FileWatcher, watch, watch_scons
+from apio.managers.scons import SCons
+from apio.apio_context import ApioContext, ApioContextScope
+from apio.utils import env_options
+
+
+def test_file_watcher(apio_runner: ApioRunner):
+    """Tests the detection of changed files."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_default_apio_ini()
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("main.pcf", "")
+        sb.write_file("notes.txt", "")
+
+        watcher = FileWatcher(Path.cwd(), interval=0.01, debounce=0.05)
+        assert set(watcher.snapshot()) == {"apio.ini", "main.v", "main.pcf"}
+
+        # -- A modified file, a new file and a deleted file.
+        sb.write_file(
+            "main.v", "module main(input a); endmodule", exists_ok=True
+        )
+        sb.write_file("leds.v", "module leds(); endmodule")
+        os.remove("main.pcf")
+        assert watcher.wait_for_changes() == ["leds.v", "main.pcf", "main.v"]
+
+        # -- Files that are not watched are ignored.
+        sb.write_file("notes.txt", "some notes", exists_ok=True)
+        sb.write_file(
+            "apio.ini", "[env]\nboard = icebreaker\n", exists_ok=True
+        )
+        assert watcher.wait_for_changes() == ["apio.ini"]
+
+
+def test_watch(apio_runner: ApioRunner):
+    """Tests the watch loop."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        calls: List[List[str]] = []
+
+        def run(changed: List[str]) -> None:
+            calls.append(changed)
+            if len(calls) == 1:
+                # -- A failing run doesn't stop the watch. The change is
+                # -- saved while running and triggers another run.
+                sb.write_file("main.v", "module main(); endmodule")
+                raise SystemExit(1)
+            raise KeyboardInterrupt()
+
+        watch(Path.cwd(), run)
+        assert calls == [[], ["main.v"]]
+        assert env_options.is_defined(env_options.APIO_SCONS_IN_PROCESS)
+
+
+def test_watch_scons(apio_runner: ApioRunner):
+    """Tests that the scons manager is kept between runs unless apio.ini
+    was changed."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_default_apio_ini()
+        apio_ctx = ApioContext(scope=ApioContextScope.PROJECT_REQUIRED)
+        managers: List[SCons] = []
+
+        def run(scons: SCons) -> None:
+            managers.append(scons)
+            if len(managers) == 1:
+                sb.write_file("main.v", "module main(); endmodule")
+            elif len(managers) == 2:
+                sb.write_file(
+                    "apio.ini",
+                    "[env]\nboard = icebreaker\ntop-module = main\n",
+                    exists_ok=True,
+                )
+            else:
+                raise KeyboardInterrupt()
+
+        watch_scons(apio_ctx, run)
+        assert len(managers) == 3
+        assert managers[0] is managers[1]
+        assert managers[0].apio_ctx.project["board"] == "alhambra-ii"
+        assert managers[2].apio_ctx.project["board"] == "icebreaker"
@@ -0,0 +1,87 @@
+"""
+Tests of the scons artifact_cache.py functions.
+"""
+
+import os
+from pathlib import Path
+from test.scons.testing import make_test_apio_env
+from test.conftest import ApioRunner
+from apio.scons.artifact_cache import (
+    enable_artifact_cache,
+    prune_cache,
+    read_stats,
+    update_stats,
+)
+
+
+def test_prune_cache(apio_runner: ApioRunner):
+    """Tests the prune_cache() function."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Create a cache dir with three artifacts of 100 bytes each,
+        # -- from the oldest to the newest, and the non artifact files.
+        cache_path = Path("cache")
+        for i, name in enumerate(["AA/aaa", "BB/bbb", "CC/ccc"]):
+            sb.write_file(cache_path / name, "x" * 100)
+            os.utime(cache_path / name, (1000 + i, 1000 + i))
+        sb.write_file(cache_path / "config", "x" * 1000)
+        update_stats(cache_path, 1, 2)
+
+        # -- Within the limit, nothing is deleted.
+        assert prune_cache(cache_path, 300) == 0
+        assert (cache_path / "AA/aaa").exists()
+
+        # -- Above the limit, the least recently used are deleted first.
+        assert prune_cache(cache_path, 150) == 2
+        assert not (cache_path / "AA/aaa").exists()
+        assert not (cache_path / "BB/bbb").exists()
+        assert (cache_path / "CC/ccc").exists()
+
+        # -- The non artifact files are never deleted.
+        assert prune_cache(cache_path, 0) == 1
+        assert (cache_path / "config").exists()
+        assert read_stats(cache_path) == (1, 2)
+
+
+def test_stats(apio_runner: ApioRunner):
+    """Tests the accumulation of the cache hits and misses."""
+
+    with apio_runner.in_sandbox():
+
+        cache_path = Path("cache")
+
+        # -- No stats file yet.
+        assert read_stats(cache_path) == (0, 0)
+
+        # -- Counters are accumulated.
+        update_stats(cache_path, 3, 1)
+        update_stats(cache_path, 2, 0)
+        assert read_stats(cache_path) == (5, 1)
+
+
+def test_enable_artifact_cache(apio_runner: ApioRunner):
+    """Tests that enable_artifact_cache() configures the scons cache dir."""
+
+    with apio_runner.in_sandbox():
+
+        # -- Create an env with the artifact cache params.
+        apio_env = make_test_apio_env()
+        cache_params = apio_env.params.artifact_cache
+        cache_params.cache_dir = str(Path("cache").absolute())
+        cache_params.max_size = 1000
+        cache_params.toolchain_version = "2024.12.1"
+
+        # -- Create a target and enable the cache.
+        target = apio_env.scons_env.Command(
+            "aaa.out", "aaa.v", "cp $SOURCE $TARGET"
+        )
+        enable_artifact_cache(apio_env, [target])
+
+        # -- Verify the scons cache dir.
+        cache_dir = apio_env.scons_env.get_CacheDir()
+        assert cache_dir.path == cache_params.cache_dir
+
+        # -- The toolchain version should be a dependency of the target.
+        depends = [str(x) for x in target[0].depends]
+        assert depends == ["oss-cad-suite=2024.12.1"]
@@ -0,0 +1,50 @@
+"""
+Tests of the scons file_cache.py functions.
+"""
+
+import os
+from test.conftest import ApioRunner
+from apio.scons.file_cache import FileInfoCache
+
+
+def _extract(text: str):
+    """A test extraction function."""
+    return {"length": len(text)}
+
+
+def test_file_info_cache(apio_runner: ApioRunner):
+    """Tests the FileInfoCache class."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("_build/.keep", "")
+        sb.write_file("aaa.v", "12345")
+        sb.write_file("bbb.v", "123")
+
+        # -- First run, nothing is cached.
+        cache = FileInfoCache("_build/cache.json", 1)
+        assert cache.get("aaa.v", _extract) == {"length": 5}
+        assert cache.get("bbb.v", _extract) == {"length": 3}
+        assert cache.get("no-such-file.v", _extract) is None
+        assert (cache.hits, cache.misses) == (0, 2)
+        cache.save()
+
+        # -- Second run. A touched file with the same content is also a hit.
+        os.utime("bbb.v", ns=(1000, 1000))
+        os.remove("aaa.v")
+        cache = FileInfoCache("_build/cache.json", 1)
+        assert cache.get("bbb.v", _extract) == {"length": 3}
+        assert (cache.hits, cache.misses) == (1, 0)
+        assert cache.hit_rate_str() == "1 hits, 0 misses (100%)"
+        cache.save()
+
+        # -- A modified file is a miss.
+        sb.write_file("bbb.v", "1234567", exists_ok=True)
+        cache = FileInfoCache("_build/cache.json", 1)
+        assert cache.get("bbb.v", _extract) == {"length": 7}
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        # -- A different version ignores the cache file.
+        cache = FileInfoCache("_build/cache.json", 2)
+        assert cache.get("bbb.v", _extract) == {"length": 7}
+        assert (cache.hits, cache.misses) == (0, 1)
@@ -0,0 +1,48 @@
+"""
+Tests of the scons in_process.py functions.
+"""
+
+import os
+import sys
+from pathlib import Path
+from test.scons.testing import make_test_scons_params
+from test.conftest import ApioRunner
+import SCons.Script
+from apio.utils import util
+from apio.scons.in_process import run_scons_in_process
+from apio.scons import exit_hooks
+
+
+def test_run_scons_in_process(apio_runner: ApioRunner):
+    """Tests that scons can run within this process more than once."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        scons_params = make_test_scons_params()
+        sconstruct = util.get_path_in_apio_package("scons") / "SConstruct"
+        args = [
+            "-Q",
+            "-c",
+            "-f",
+            str(sconstruct),
+            f"timestamp={scons_params.timestamp}",
+        ]
+
+        # -- Run a cleanup twice, to verify that the scons state is reset
+        # -- between runs, that the exit hooks of each run are called when
+        # -- it ends, and that the output streams are restored.
+        for _ in range(2):
+            sb.write_file("_build/hardware.bin", "some data")
+            calls = []
+            exit_hooks.register(calls.append, "done")
+            saved_streams = (sys.stdout, sys.stderr)
+            assert run_scons_in_process(args, scons_params) == 0
+            assert calls == ["done"]
+            assert (sys.stdout, sys.stderr) == saved_streams
+            assert not Path("_build/hardware.bin").exists()
+            assert SCons.Script.ARGUMENTS == {
+                "timestamp": scons_params.timestamp
+            }
+
+        # -- The current directory is not changed.
+        assert Path(os.getcwd()) == sb.proj_dir
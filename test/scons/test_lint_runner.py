@@ -0,0 +1,101 @@
+"""
+Tests of the scons lint_runner.py functions.
+"""
+
+import os
+import sys
+from test.conftest import ApioRunner
+from test.scons.testing import make_test_apio_env
+from click import unstyle
+from apio.scons.verilog_index import VerilogIndex
+from apio.scons.lint_runner import (
+    LintUnit,
+    LintResult,
+    get_lint_units,
+    lint_unit_action,
+    lint_summary_action,
+)
+
+# -- A fake verilator that reports a warning in the top module and a
+# -- shared warning.
+FAKE_LINT = (
+    "import sys; "
+    "print('%Warning-X: ' + sys.argv[1] + chr(10) + ' context'); "
+    "print('%Warning-Y: shared'); "
+    "sys.exit(1 if sys.argv[1] == 'main' else 0)"
+)
+
+
+def test_get_lint_units(apio_runner: ApioRunner):
+    """Tests the get_lint_units() function."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); leds l(); endmodule")
+        sb.write_file("leds.v", "module leds(); endmodule")
+        sb.write_file("other.v", "module other(); endmodule")
+        sb.write_file("leds_tb.v", "module leds_tb(); leds l(); endmodule")
+        sb.write_file("x_tb.v", "module test(); endmodule")
+        synth_srcs = ["leds.v", "main.v", "other.v"]
+        test_srcs = ["x_tb.v", "leds_tb.v"]
+        index = VerilogIndex.load(synth_srcs + test_srcs)
+
+        # -- The top module and the testbenches.
+        units = get_lint_units("main", False, synth_srcs, test_srcs, index)
+        assert units == [
+            LintUnit("main", "main", ["main.v", "leds.v"]),
+            LintUnit("leds_tb", "leds_tb", ["leds.v", "leds_tb.v"]),
+            LintUnit("x_tb", "test", ["x_tb.v"]),
+        ]
+        assert units[1].result_file.endswith("leds_tb.lint")
+
+        # -- An explicit top module.
+        units = get_lint_units("leds", True, synth_srcs, test_srcs, index)
+        assert units == [LintUnit("leds", "leds", ["leds.v"])]
+
+        # -- A top module that was not found, lint everything.
+        units = get_lint_units("nope", False, synth_srcs, test_srcs, index)
+        assert units == [LintUnit("nope", "nope", synth_srcs + test_srcs)]
+
+
+def test_lint_actions(apio_runner: ApioRunner, capsys):
+    """Tests the capture and the replay of the lint results."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "")
+        os.makedirs("_build")
+        apio_env = make_test_apio_env(targets=["lint"])
+        scons_env = apio_env.scons_env
+        units = [
+            LintUnit("main", "main", ["main.v"]),
+            LintUnit("main_tb", "main_tb", ["main.v"]),
+        ]
+
+        # -- Lint the units.
+        action = lint_unit_action(
+            f'"{sys.executable}" -c "{FAKE_LINT}" $LINT_TOP_MODULE'
+        )
+        for unit in units:
+            env = scons_env.Override(
+                {"LINT_UNIT": unit.name, "LINT_TOP_MODULE": unit.top_module}
+            )
+            target = [scons_env.File(unit.result_file)]
+            source = [scons_env.File("main.v")]
+            assert (
+                action.execfunction(target=target, source=source, env=env) == 0
+            )
+
+        result = LintResult.read(units[0].result_file)
+        assert result.unit == "main"
+        assert result.exit_code == 1
+        assert "%Warning-X: main\n context\n" in result.output
+
+        # -- Replay the results. The shared warning is printed once.
+        capsys.readouterr()
+        action = lint_summary_action(units)
+        assert action.execfunction(target=[], source=[], env=scons_env) == 1
+        output = unstyle(capsys.readouterr().out)
+        assert output.count("%Warning-Y: shared") == 1
+        assert "%Warning-X: main_tb\n" in output
+        assert "Error: lint failed for main (2 cached)." in output
@@ -57,6 +57,12 @@ def test_get_constraint_file(
         assert e.value.code == 1
         assert "Error: Found multiple '*.pcf'" in captured.out
 
+        # -- A file with the board name has precedence.
+        board_file = apio_env.params.project.board_id + ".pcf"
+        sb.write_file(board_file, "content")
+        result = get_constraint_file(apio_env, ".pcf", "my_main")
+        assert result == board_file
+
 
 def test_verilog_src_scanner(apio_runner: ApioRunner):
     """Test the verilog scanner which scans a verilog file and extract
@@ -0,0 +1,147 @@
+"""
+Tests of the pnr_report.py module.
+"""
+
+import io
+import json
+from test.scons.testing import make_test_apio_env
+from test.conftest import ApioRunner
+import pytest
+from SCons.Node.FS import FS
+from apio.scons.pnr_report import (
+    PnrReportError,
+    read_pnr_report,
+    normalize_pnr_report,
+    report_action,
+)
+
+# -- A nextpnr report with a large section before and after the sections
+# -- we need, and strings with escape sequences and brackets.
+REPORT = {
+    "critical_paths": [
+        {"from": 'a"b[{', "to": "c\\\\", "path": [{"delay": 1.5}] * 50}
+    ],
+    "utilization": {
+        "ICESTORM_LC": {"available": 7680, "used": 96},
+        "ICESTORM_RAM": {"available": 32, "used": 0},
+    },
+    "fmax": {
+        "CLK$SB_IO_IN_$glb_clk": {"achieved": 123.45, "constraint": 12.0}
+    },
+    "detailed_net_timings": [{"net": "}]", "delay": 2}] * 50,
+}
+
+
+def test_read_pnr_report():
+    """Tests the incremental reading of a pnr report."""
+
+    text = json.dumps(REPORT, indent=2)
+
+    # -- Different chunk sizes, including tiny ones that split tokens and
+    # -- escape sequences.
+    for chunk_size in [1, 2, 3, 7, 64, 100000]:
+        sections = read_pnr_report(io.StringIO(text), chunk_size=chunk_size)
+        assert sections == {
+            "utilization": REPORT["utilization"],
+            "fmax": REPORT["fmax"],
+        }, chunk_size
+
+        sections = read_pnr_report(
+            io.StringIO(text), ["critical_paths"], chunk_size=chunk_size
+        )
+        assert sections == {"critical_paths": REPORT["critical_paths"]}
+
+    # -- Scalar and missing sections.
+    text = '{"a": 12, "b": true, "c": null, "d": "x,y}"}'
+    assert read_pnr_report(io.StringIO(text), ["a", "d", "e"], 2) == {
+        "a": 12,
+        "d": "x,y}",
+    }
+    assert not read_pnr_report(io.StringIO(" {} "))
+
+
+def test_read_pnr_report_stops_early():
+    """Tests that the reading stops once the sections were found."""
+
+    text = '{"fmax": {}, "utilization": {}, "garbage": ' + "[" * 1000
+    stream = io.StringIO(text)
+    assert read_pnr_report(stream, chunk_size=8) == {
+        "fmax": {},
+        "utilization": {},
+    }
+    assert stream.tell() < 100
+
+
+def test_read_pnr_report_errors():
+    """Tests the reading of invalid pnr reports."""
+
+    for text in ["", "[]", '{"fmax": {', '{"fmax": 1 2}', "{fmax: 1}"]:
+        with pytest.raises(PnrReportError):
+            read_pnr_report(io.StringIO(text), chunk_size=4)
+
+
+def test_normalize_pnr_report():
+    """Tests the normalized format of the reports."""
+
+    report = normalize_pnr_report(
+        {"utilization": REPORT["utilization"], "fmax": REPORT["fmax"]},
+        clk_name_index=0,
+        arch="ice40",
+        board="alhambra-ii",
+    )
+    assert report == {
+        "version": 1,
+        "arch": "ice40",
+        "board": "alhambra-ii",
+        "utilization": {
+            "ICESTORM_LC": {"used": 96, "available": 7680, "percent": 1.25},
+            "ICESTORM_RAM": {"used": 0, "available": 32, "percent": 0},
+        },
+        "clocks": {
+            "CLK": {
+                "net": "CLK$SB_IO_IN_$glb_clk",
+                "fmax_mhz": 123.45,
+                "constraint_mhz": 12.0,
+            }
+        },
+    }
+
+    # -- The ecp5 clock names are the third component of the net names.
+    report = normalize_pnr_report(
+        {"fmax": {"$glbnet$CLK$TRELLIS_IO_IN": {"achieved": 50}}},
+        clk_name_index=2,
+        arch="ecp5",
+        board="ulx3s-85f",
+    )
+    assert list(report["clocks"]) == ["CLK"]
+    assert not report["utilization"]
+
+
+def test_report_action(apio_runner: ApioRunner, capsys):
+    """Tests the report action, with the tables and with a json file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        apio_env = make_test_apio_env(targets=["report"])
+        sb.write_file("hardware.pnr", json.dumps(REPORT))
+        source = [FS().File("hardware.pnr")]
+
+        # -- The tables.
+        action = report_action(0, False)
+        capsys.readouterr()
+        assert action.execute([], source, apio_env.scons_env) == 0
+        out = capsys.readouterr().out
+        assert "ICESTORM_LC:    96  7680     1%" in out
+        assert "CLK: " in out and "123.45" in out
+
+        # -- The json file. Only a single line is printed.
+        action = report_action(
+            0, False, json_file="report.json", arch="ice40", board="b1"
+        )
+        assert action.execute([], source, apio_env.scons_env) == 0
+        assert capsys.readouterr().out == (
+            "Wrote the json report to report.json.\n"
+        )
+        report = json.loads(sb.read_file("report.json"))
+        assert report["board"] == "b1"
+        assert report["clocks"]["CLK"]["fmax_mhz"] == 123.45
@@ -0,0 +1,134 @@
+"""
+Tests of the scons pnr_seeds.py functions.
+"""
+
+import sys
+import time
+from pathlib import Path
+from test.conftest import ApioRunner
+from test.scons.testing import make_test_apio_env
+import pytest
+from click import unstyle
+from apio.scons.pnr_seeds import lowest_fmax, pnr_seeds_action
+
+# -- A fake nextpnr that writes a report whose fmax depends on the seed.
+# -- Seed 2 is slower than the others.
+FAKE_PNR = """
+import sys, json, time
+output, report, seed = sys.argv[1], sys.argv[2], int(sys.argv[4])
+time.sleep(0.5 if seed == 2 else 0)
+fmax = {1: 50.0, 2: 80.0, 3: 60.0}[seed]
+with open(output, "w") as f:
+    f.write(f"seed {seed}")
+with open(report, "w") as f:
+    json.dump({"fmax": {"clk": {"achieved": fmax, "constraint": 12}}}, f)
+"""
+
+# -- A fake nextpnr whose seed 1 meets any fmax target quickly, and whose
+# -- seed 2 waits for a child process that holds its output pipe.
+FAKE_PNR_CHILD = """
+import sys, json, time, subprocess
+output, report, seed = sys.argv[1], sys.argv[2], int(sys.argv[4])
+if seed == 2:
+    subprocess.run([sys.executable, "-c", "import time; time.sleep(30)"])
+time.sleep(0.5)
+with open(output, "w") as f:
+    f.write(f"seed {seed}")
+with open(report, "w") as f:
+    json.dump({"fmax": {"clk": {"achieved": 100.0, "constraint": 12}}}, f)
+"""
+
+
+def _read(file_name: str) -> str:
+    """Returns the text of the given file."""
+    return Path(file_name).read_text(encoding="utf8")
+
+
+def test_lowest_fmax():
+    """Tests the lowest_fmax() function."""
+
+    assert lowest_fmax('{"fmax": {}}') is None
+    assert lowest_fmax('{"utilization": {}}') is None
+    assert (
+        lowest_fmax(
+            '{"fmax": {"a": {"achieved": 30.5, "constraint": 12}, '
+            '"b": {"achieved": 20.25, "constraint": 12}}}'
+        )
+        == 20.25
+    )
+
+
+def test_pnr_seeds_action(apio_runner: ApioRunner, capsys):
+    """Tests the selection of the best seed."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("fake_pnr.py", FAKE_PNR)
+        sb.write_file("_build/hardware.json", "")
+        apio_env = make_test_apio_env(targets=["build"])
+        scons_env = apio_env.scons_env
+        pnr_cmd = f'"{sys.executable}" fake_pnr.py $TARGET ${{TARGETS[1]}}'
+        source = [scons_env.File("_build/hardware.json")]
+        target = [
+            scons_env.File("_build/hardware.asc"),
+            scons_env.File("_build/hardware.pnr"),
+        ]
+        args = {"target": target, "source": source, "env": scons_env}
+
+        # -- The best of all the seeds.
+        action = pnr_seeds_action(pnr_cmd, seeds=3, jobs=2, fmax_target=0)
+        assert action.execfunction(**args) == 0
+        assert _read("_build/hardware.asc") == "seed 2"
+        assert _read("_build/seed-3/hardware.asc") == "seed 3"
+        output = unstyle(capsys.readouterr().out)
+        assert "2          80.00 Mhz" in output
+        assert "(best)" in output
+
+        # -- The first seed that met the target.
+        action = pnr_seeds_action(pnr_cmd, seeds=3, jobs=1, fmax_target=55)
+        assert action.execfunction(**args) == 0
+        assert _read("_build/hardware.asc") == "seed 2"
+        output = unstyle(capsys.readouterr().out)
+        assert "Warning" not in output
+
+        # -- The lowest seed that met the target, even though a higher seed
+        # -- met it first.
+        action = pnr_seeds_action(pnr_cmd, seeds=3, jobs=3, fmax_target=55)
+        assert action.execfunction(**args) == 0
+        assert _read("_build/hardware.asc") == "seed 2"
+        output = unstyle(capsys.readouterr().out)
+        assert "Warning" not in output
+
+        # -- No seed met the target.
+        action = pnr_seeds_action(pnr_cmd, seeds=3, jobs=3, fmax_target=100)
+        assert action.execfunction(**args) == 0
+        assert _read("_build/hardware.asc") == "seed 2"
+        output = unstyle(capsys.readouterr().out)
+        assert "no seed achieved the target fmax of 100.00 Mhz" in output
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="No process groups.")
+def test_pnr_seeds_stop(apio_runner: ApioRunner):
+    """Tests that the runs of the higher seeds are stopped, along with the
+    processes they started, once the fmax target is met."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("fake_pnr.py", FAKE_PNR_CHILD)
+        sb.write_file("_build/hardware.json", "")
+        scons_env = make_test_apio_env(targets=["build"]).scons_env
+        pnr_cmd = f'"{sys.executable}" fake_pnr.py $TARGET ${{TARGETS[1]}}'
+        args = {
+            "target": [
+                scons_env.File("_build/hardware.asc"),
+                scons_env.File("_build/hardware.pnr"),
+            ],
+            "source": [scons_env.File("_build/hardware.json")],
+            "env": scons_env,
+        }
+
+        start_time = time.time()
+        action = pnr_seeds_action(pnr_cmd, seeds=2, jobs=2, fmax_target=50)
+        assert action.execfunction(**args) == 0
+        assert time.time() - start_time < 20
+        assert _read("_build/hardware.asc") == "seed 1"
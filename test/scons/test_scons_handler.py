@@ -0,0 +1,466 @@
+"""
+Tests of the scons scons_handler.py functions.
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+from typing import List
+from test.scons.testing import make_test_scons_params
+from test.conftest import ApioRunner
+from apio.utils import util
+from apio.scons.in_process import run_scons_in_process
+from apio.proto.apio_pb2 import (
+    BoardTarget,
+    FpgaInfo,
+    Ecp5FpgaInfo,
+    ECP5,
+    ICE40,
+    SVG,
+    VERILATOR,
+    WAVES_FST,
+    PNG,
+)
+
+
+def _dry_run(scons_params, target: str, capsys) -> List[str]:
+    """Runs scons with the given target in dry run mode and returns the
+    lines of its output."""
+    sconstruct = util.get_path_in_apio_package("scons") / "SConstruct"
+    args = [
+        "-Q",
+        "-n",
+        target,
+        "-f",
+        str(sconstruct),
+        f"timestamp={scons_params.timestamp}",
+    ]
+    capsys.readouterr()
+    assert run_scons_in_process(args, scons_params) == 0
+    return capsys.readouterr().out.splitlines()
+
+
+def _run(scons_params, target: str) -> int:
+    """Runs scons with the given target and returns its exit code."""
+    sconstruct = util.get_path_in_apio_package("scons") / "SConstruct"
+    args = [
+        "-Q",
+        target,
+        "-f",
+        str(sconstruct),
+        f"timestamp={scons_params.timestamp}",
+    ]
+    return run_scons_in_process(args, scons_params)
+
+
+def _write_fake_tool(bin_dir: Path, name: str, script: str) -> None:
+    """Writes an executable python script that fakes a tool."""
+    bin_dir.mkdir(exist_ok=True)
+    path = bin_dir / name
+    path.write_text(f"#!{sys.executable}\nimport sys\n{script}\n")
+    path.chmod(0o755)
+
+
+def test_multi_board_build(apio_runner: ApioRunner, capsys):
+    """Tests the commands of a multi-board build, using a scons dry run."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("alhambra-ii.pcf", "")
+        sb.write_file("icebreaker.pcf", "")
+        sb.write_file("ulx3s-85f.lpf", "")
+
+        # -- Two ice40 boards and an ecp5 board.
+        scons_params = make_test_scons_params()
+        ice40_info = scons_params.fpga_info
+        ecp5_info = FpgaInfo(
+            fpga_id="lfe5u-85f-csabga381",
+            part_num="LFE5U-85F-6BG381C",
+            size="85k",
+            ecp5=Ecp5FpgaInfo(type="85k", pack="CABGA381", speed="6"),
+        )
+        scons_params.target.build.boards.extend(
+            [
+                BoardTarget(
+                    board_id="alhambra-ii", arch=ICE40, fpga_info=ice40_info
+                ),
+                BoardTarget(
+                    board_id="icebreaker", arch=ICE40, fpga_info=ice40_info
+                ),
+                BoardTarget(
+                    board_id="ulx3s-85f", arch=ECP5, fpga_info=ecp5_info
+                ),
+            ]
+        )
+
+        lines = _dry_run(scons_params, "build", capsys)
+
+        # -- A single elaboration of the sources.
+        elaborate_lines = [x for x in lines if "hierarchy -top main" in x]
+        assert len(elaborate_lines) == 1
+        assert "write_rtlil _build/hardware.il" in elaborate_lines[0]
+
+        # -- A single synth per architecture, from the elaborated design.
+        synth_lines = [x for x in lines if "synth_" in x]
+        assert len(synth_lines) == 2
+        assert all(x.endswith(" _build/hardware.il") for x in synth_lines)
+        assert "synth_ice40" in synth_lines[0] + synth_lines[1]
+        assert "synth_ecp5" in synth_lines[0] + synth_lines[1]
+
+        # -- A pnr per board, in the board's build directory and with the
+        # -- board's constraints file.
+        pnr_lines = [x for x in lines if x.startswith("nextpnr")]
+        assert len(pnr_lines) == 3
+        for board, ext in [
+            ("alhambra-ii", "pcf"),
+            ("icebreaker", "pcf"),
+            ("ulx3s-85f", "lpf"),
+        ]:
+            assert any(
+                f"_build/{board}/hardware.pnr" in x and f"{board}.{ext}" in x
+                for x in pnr_lines
+            ), pnr_lines
+
+
+def test_graph_from_checkpoint(apio_runner: ApioRunner, capsys):
+    """Tests that the graph is generated from the elaborated checkpoint of
+    its top module."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("sub.v", "module sub(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.graph.output_types.append(SVG)
+        scons_params.target.graph.top_module = "sub"
+        lines = _dry_run(scons_params, "graph", capsys)
+        lines = [x for x in lines if x.startswith("yosys")]
+        assert len(lines) == 2, lines
+
+        # -- The elaboration reads only the file of the graph top module.
+        assert lines[0] == (
+            'yosys -p "hierarchy -top sub; write_rtlil _build/hardware.il" '
+            "-q sub.v"
+        )
+        assert lines[1].startswith('yosys -p "show -format dot')
+        assert lines[1].endswith(" _build/hardware.il")
+
+
+def test_graph_multiple_types(apio_runner: ApioRunner, capsys):
+    """Tests that multiple graph types are rendered from the same .dot
+    file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.graph.output_types.extend([SVG, PNG, SVG])
+        lines = _dry_run(scons_params, "graph", capsys)
+        lines = [x for x in lines if x.startswith("dot ")]
+        assert sorted(lines) == [
+            "dot -Tpng _build/hardware.dot -o _build/hardware.png",
+            "dot -Tsvg _build/hardware.dot -o _build/hardware.svg",
+        ]
+
+
+def test_test_sweep(apio_runner: ApioRunner, capsys):
+    """Tests that a sweep compiles each testbench once and runs it once
+    per sweep point."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("main_tb.v", "module main_tb(); main m(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.sweep_points.extend(["SEED=1", "SEED=2"])
+        lines = _dry_run(scons_params, "test", capsys)
+
+        assert len([x for x in lines if x.startswith("iverilog")]) == 1
+        assert "Simulating _build/main_tb.out at SEED=1" in lines
+        assert "Simulating _build/main_tb.out at SEED=2" in lines
+        assert "Summarizing sweep results." in lines
+
+
+def test_test_shard(apio_runner: ApioRunner, capsys):
+    """Tests that a shard runs only its testbenches."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        for name in ["aa_tb", "bb_tb", "cc_tb"]:
+            sb.write_file(f"{name}.v", f"module {name}(); main m(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.shard_index = 1
+        scons_params.target.test.shard_count = 2
+        lines = _dry_run(scons_params, "test", capsys)
+
+        assert "Shard 2/2: 1 of 3 testbenches." in lines
+        assert "vvp _build/bb_tb.out -none" in lines
+        assert "vvp _build/aa_tb.out -none" not in lines
+        assert "vvp _build/cc_tb.out -none" not in lines
+
+        # -- An empty shard writes empty reports, replacing the reports of
+        # -- a previous run.
+        sb.write_file("_build/test-results.json", "stale")
+        scons_params.target.test.shard_index = 3
+        scons_params.target.test.shard_count = 4
+        lines = _dry_run(scons_params, "test", capsys)
+        assert "Shard 4/4: 0 of 3 testbenches." in lines
+        report = json.loads(sb.read_file("_build/test-results.json"))
+        assert (report["tests"], report["testbenches"]) == (0, [])
+        assert 'tests="0"' in sb.read_file("_build/test-results.xml")
+
+
+def test_test_sim_time_limit(apio_runner: ApioRunner, capsys):
+    """Tests that the watchdog module is compiled with the testbenches when
+    a simulated time limit is set."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("main_tb.v", "module main_tb(); main m(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.testbench_limits["main_tb"].max_sim_time = 5
+        lines = _dry_run(scons_params, "test", capsys)
+
+        assert "Creating simulation watchdog file." in lines
+        iverilog_lines = [x for x in lines if x.startswith("iverilog")]
+        assert iverilog_lines[0].endswith(
+            " main.v main_tb.v _build/apio_watchdog.v"
+        ), iverilog_lines
+
+
+def test_waves_formats(apio_runner: ApioRunner, capsys):
+    """Tests the waveform formats of the sim and test targets."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("main_tb.v", "module main_tb(); main m(); endmodule")
+
+        # -- By default, apio test doesn't write waveforms.
+        scons_params = make_test_scons_params()
+        scons_params.target.test.SetInParent()
+        lines = _dry_run(scons_params, "test", capsys)
+        assert "vvp _build/main_tb.out -none" in lines
+
+        # -- Apio test with fst waveforms.
+        scons_params.target.test.waves_format = WAVES_FST
+        lines = _dry_run(scons_params, "test", capsys)
+        assert (
+            "vvp _build/main_tb.out -fst -dumpfile=_build/main_tb.fst" in lines
+        )
+
+        # -- Apio sim with fst waveforms, opened by gtkwave.
+        scons_params = make_test_scons_params()
+        scons_params.target.sim.force_sim = False
+        scons_params.target.sim.waves_format = WAVES_FST
+        lines = _dry_run(scons_params, "sim", capsys)
+        assert (
+            "vvp _build/main_tb.out -fst -dumpfile=_build/main_tb.fst" in lines
+        )
+        assert [x for x in lines if x.startswith("gtkwave")][0].endswith(
+            "_build/main_tb.fst main_tb.gtkw"
+        )
+
+
+def test_test_verilator(apio_runner: ApioRunner, capsys):
+    """Tests that with the verilator engine, the testbenches are compiled
+    into executables and run without waveforms."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("main_tb.v", "module main_tb(); main m(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.sim_engine = VERILATOR
+        lines = _dry_run(scons_params, "test", capsys)
+
+        compile_lines = [x for x in lines if x.startswith("verilator_bin")]
+        assert len(compile_lines) == 1, lines
+        assert "--binary --timing" in compile_lines[0]
+        assert "--top-module main_tb" in compile_lines[0]
+        assert '--Mdir "_build/main_tb.vdir"' in compile_lines[0]
+        assert "Running _build/main_tb.out" in lines
+        assert not [x for x in lines if x.startswith(("iverilog", "vvp"))]
+
+
+def test_lint_units(apio_runner: ApioRunner, capsys):
+    """Tests that the project is linted per unit, the top module and each
+    of the testbenches, with its dependencies."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); blink b(); endmodule")
+        sb.write_file("blink.v", "module blink(); endmodule")
+        sb.write_file("blink_tb.v", "module blink_tb(); blink b(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.lint.SetInParent()
+        lines = _dry_run(scons_params, "lint", capsys)
+
+        assert "Linting main" in lines
+        assert "Linting blink_tb" in lines
+        assert "Summarizing lint results." in lines
+
+
+def test_test_data_file_change(apio_runner: ApioRunner, monkeypatch):
+    """Tests that a testbench reruns when a data file that it reads with
+    $readmemh() changes, even though its compiled file doesn't change."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- A fake iverilog whose output doesn't depend on the data file,
+        # -- and a fake vvp that logs its runs.
+        bin_dir = sb.proj_dir / "_bin"
+        _write_fake_tool(
+            bin_dir,
+            "iverilog",
+            "open(sys.argv[sys.argv.index('-o') + 1], 'w').write('compiled')",
+        )
+        _write_fake_tool(
+            bin_dir, "vvp", "open('vvp.log', 'a').write('run\\n')"
+        )
+        monkeypatch.setenv(
+            "PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+        )
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file(
+            "main_tb.v",
+            'module main_tb(); initial $readmemh("data.hex", m); endmodule',
+        )
+        sb.write_file("data.hex", "00")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.SetInParent()
+
+        # -- The first run and an up to date run.
+        assert _run(scons_params, "test") == 0
+        assert _run(scons_params, "test") == 0
+        assert sb.read_file("vvp.log") == "run\n"
+
+        # -- The data file changed, the testbench reruns.
+        sb.write_file("data.hex", "01", exists_ok=True)
+        assert _run(scons_params, "test") == 0
+        assert sb.read_file("vvp.log") == "run\nrun\n"
+
+        # -- Same with the sweep runs, once per point.
+        scons_params.target.test.sweep_points.extend(["A=1", "A=2"])
+        assert _run(scons_params, "test") == 0
+        assert _run(scons_params, "test") == 0
+        assert sb.read_file("vvp.log") == "run\n" * 4
+        sb.write_file("data.hex", "02", exists_ok=True)
+        assert _run(scons_params, "test") == 0
+        assert sb.read_file("vvp.log") == "run\n" * 6
+
+
+def test_test_limits_change(apio_runner: ApioRunner, monkeypatch):
+    """Tests that a testbench reruns when its own time limits change, but
+    not when other test params change."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- A fake iverilog and a fake vvp that logs the compiled files
+        # -- that it runs.
+        bin_dir = sb.proj_dir / "_bin"
+        _write_fake_tool(
+            bin_dir,
+            "iverilog",
+            "open(sys.argv[sys.argv.index('-o') + 1], 'w').write('compiled')",
+        )
+        _write_fake_tool(
+            bin_dir, "vvp", "open('vvp.log', 'a').write(sys.argv[1] + '\\n')"
+        )
+        monkeypatch.setenv(
+            "PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+        )
+
+        sb.write_file("main.v", "module main(); endmodule")
+        sb.write_file("aa_tb.v", "module aa_tb(); main m(); endmodule")
+        sb.write_file("bb_tb.v", "module bb_tb(); main m(); endmodule")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.SetInParent()
+        assert _run(scons_params, "test") == 0
+        assert sorted(sb.read_file("vvp.log").split()) == [
+            "_build/aa_tb.out",
+            "_build/bb_tb.out",
+        ]
+
+        # -- Other params changed, the results are up to date.
+        scons_params.target.test.jobs = 2
+        scons_params.target.test.limits.timeout = 0
+        assert _run(scons_params, "test") == 0
+        assert len(sb.read_file("vvp.log").split()) == 2
+
+        # -- The limits of a testbench changed, only that testbench reruns.
+        scons_params.target.test.testbench_limits["bb_tb"].timeout = 60
+        assert _run(scons_params, "test") == 0
+        assert sb.read_file("vvp.log").split()[2:] == ["_build/bb_tb.out"]
+
+        # -- Same with the sweep runs.
+        scons_params.target.test.sweep_points.extend(["A=1", "A=2"])
+        assert _run(scons_params, "test") == 0
+        scons_params.target.test.jobs = 1
+        assert _run(scons_params, "test") == 0
+        assert len(sb.read_file("vvp.log").split()) == 7
+        scons_params.target.test.testbench_limits["aa_tb"].timeout = 60
+        assert _run(scons_params, "test") == 0
+        assert sb.read_file("vvp.log").split()[7:] == ["_build/aa_tb.out"] * 2
+
+
+def test_test_compile_failure_reports(apio_runner: ApioRunner, monkeypatch):
+    """Tests that the reports are written also when a testbench fails to
+    compile and scons stops before the summary, and that the stale reports
+    of a previous run are deleted."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- A fake iverilog that fails to compile 'bb_tb' and a fake vvp.
+        bin_dir = sb.proj_dir / "_bin"
+        _write_fake_tool(
+            bin_dir,
+            "iverilog",
+            "if 'bb_tb.v' in sys.argv: sys.exit(1)\n"
+            "open(sys.argv[sys.argv.index('-o') + 1], 'w').write('compiled')",
+        )
+        _write_fake_tool(bin_dir, "vvp", "")
+        monkeypatch.setenv(
+            "PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+        )
+
+        sb.write_file("main.v", "module main(); endmodule")
+        for name in ["aa_tb", "bb_tb", "cc_tb"]:
+            sb.write_file(f"{name}.v", f"module {name}(); main m(); endmodule")
+        sb.write_file("_build/test-results.xml", "stale")
+        sb.write_file("_build/test-results.json", "stale")
+
+        scons_params = make_test_scons_params()
+        scons_params.target.test.SetInParent()
+        assert _run(scons_params, "test") != 0
+
+        # -- 'aa_tb' passed, 'bb_tb' failed to compile and scons stopped
+        # -- before running 'cc_tb'.
+        report = json.loads(sb.read_file("_build/test-results.json"))
+        assert [
+            (x["testbench"], x["passed"], x["skipped"])
+            for x in report["testbenches"]
+        ] == [
+            ("aa_tb", True, False),
+            ("bb_tb", False, False),
+            ("cc_tb", False, True),
+        ]
+        assert report["failures"] == 1
+        assert "failed to compile" in report["testbenches"][1]["output"]
+        junit = sb.read_file("_build/test-results.xml")
+        assert 'failures="1"' in junit
+        assert 'skipped="1"' in junit
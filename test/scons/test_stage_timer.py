@@ -0,0 +1,113 @@
+"""
+Tests of the scons stage_timer.py functions.
+"""
+
+import sys
+import time
+import subprocess
+from test.conftest import ApioRunner
+from test.scons.testing import make_test_apio_env
+import pytest
+from SCons.Action import Action
+from SCons.Builder import Builder
+from apio.scons import exit_hooks
+from apio.scons.stage_timer import (
+    HAS_WAIT4,
+    TimedAction,
+    run_process,
+    stage_name,
+    start_run,
+)
+from apio.utils.timings import load_runs
+
+# -- A command that burns some cpu time and allocates about 50MB.
+BUSY_CMD = "x = bytearray(50_000_000); sum(range(2_000_000))"
+
+
+def test_stage_name():
+    """Tests the stage_name() function."""
+    assert stage_name("SYNTH_BUILDER") == "synth"
+    assert stage_name("TESTBENCH_RUN_BUILDER") == "testbench_run"
+    assert stage_name("SOMETHING") == "something"
+
+
+def test_run_process(apio_runner: ApioRunner):
+    """Tests the run_process() function."""
+
+    with apio_runner.in_sandbox():
+        command = [sys.executable, "-c", "print('hello'); exit(3)"]
+        exit_code, output = run_process(command, env=None, capture=True)
+        assert exit_code == 3
+        assert output == "hello\n"
+
+
+def test_run_process_timeout(apio_runner: ApioRunner):
+    """Tests that run_process() kills a command that exceeds its timeout
+    and returns its partial output."""
+
+    with apio_runner.in_sandbox():
+        command = [
+            sys.executable,
+            "-c",
+            "import time; print('started', flush=True); time.sleep(60)",
+        ]
+        start_time = time.time()
+        with pytest.raises(subprocess.TimeoutExpired) as e:
+            run_process(command, env=None, capture=True, timeout=0.5)
+        assert time.time() - start_time < 30
+        assert e.value.output == "started\n"
+
+        # -- A command that completes within its timeout.
+        exit_code, output = run_process(
+            command[:2] + ["print('done')"], env=None, capture=True, timeout=30
+        )
+        assert exit_code == 0
+        assert output == "done\n"
+
+
+def test_timed_action(apio_runner: ApioRunner):
+    """Tests the measurement of an action and the timings file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("_build/hardware.json", "")
+        apio_env = make_test_apio_env(targets=["build"])
+        scons_env = apio_env.scons_env
+
+        start_run(["build"])
+        action = TimedAction(
+            Action(f'"{sys.executable}" -c "{BUSY_CMD}"'), "pnr"
+        )
+        target = [scons_env.File("_build/hardware.asc")]
+        source = [scons_env.File("_build/hardware.json")]
+        assert action(target, source, scons_env) == 0
+        exit_hooks.run_hooks()
+
+        # -- A single run with the pnr stage.
+        runs = load_runs()
+        assert len(runs) == 1
+        assert runs[0].targets == ["build"]
+        assert runs[0].total_time > 0
+        [stage] = runs[0].stages
+        assert stage.stage == "pnr"
+        assert stage.target == "_build/hardware.asc"
+        assert stage.wall_time > 0
+        if HAS_WAIT4:
+            assert stage.user_time > 0
+            assert stage.max_rss_kb > 40_000
+
+        # -- A run with no executed stages is not recorded.
+        start_run(["build"])
+        exit_hooks.run_hooks()
+        assert len(load_runs()) == 1
+
+        # -- When scons builds a node, the targets are passed via the
+        # -- executor rather than as args.
+        start_run(["build"])
+        builder = Builder(
+            action=TimedAction(Action(f'"{sys.executable}" -c ""'), "pnr")
+        )
+        [node] = builder(scons_env, "_build/other.asc", "_build/hardware.json")
+        scons_env.File(node).build()
+        exit_hooks.run_hooks()
+        assert load_runs()[-1].stages[0].target == "_build/other.asc"
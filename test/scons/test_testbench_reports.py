@@ -0,0 +1,94 @@
+"""
+Tests of the scons testbench_reports.py functions.
+"""
+
+import json
+import xml.etree.ElementTree as ET
+from test.conftest import ApioRunner
+from apio.scons import testbench_reports
+from apio.scons.testbench_reports import (
+    JSON_REPORT_FILE,
+    JUNIT_REPORT_FILE,
+    delete_reports,
+    load_compile_times,
+    load_durations,
+    write_reports,
+)
+
+
+def test_write_reports(apio_runner: ApioRunner):
+    """Tests the JUnit and json reports."""
+
+    with apio_runner.in_sandbox():
+
+        assert not load_compile_times()
+
+        # -- The class is referenced via its module such that pytest doesn't
+        # -- try to collect it as a test class.
+        reports = [
+            testbench_reports.TestbenchReport(
+                testbench="aa_tb",
+                point="",
+                passed=True,
+                exit_code=0,
+                compile_time=1.5,
+                sim_time=0.25,
+                cached=False,
+                output="aa ok\n",
+            ),
+            testbench_reports.TestbenchReport(
+                testbench="bb_tb",
+                point="SEED=3",
+                passed=False,
+                exit_code=1,
+                compile_time=0.5,
+                sim_time=2.0,
+                cached=True,
+                output="bb \x1b[31mfailed\x00\n",
+            ),
+            testbench_reports.TestbenchReport(
+                testbench="cc_tb",
+                point="",
+                passed=False,
+                exit_code=0,
+                compile_time=0.0,
+                sim_time=0.0,
+                cached=False,
+                output="Not run.\n",
+                skipped=True,
+            ),
+        ]
+        write_reports(reports)
+
+        # -- The json report.
+        data = json.loads(JSON_REPORT_FILE.read_text(encoding="utf8"))
+        assert data["tests"] == 3
+        assert data["failures"] == 1
+        assert data["skipped"] == 1
+        assert data["testbenches"][1]["cached"] is True
+        assert data["testbenches"][1]["output"] == "bb \x1b[31mfailed\x00\n"
+        assert load_compile_times() == {"aa_tb": 1.5, "bb_tb": 0.5}
+        # -- The skipped run has no durations.
+        assert load_durations() == {"aa_tb": 1.75, "bb_tb": 2.5}
+
+        # -- The JUnit report, invalid XML chars are removed.
+        root = ET.parse(JUNIT_REPORT_FILE).getroot()
+        assert root.tag == "testsuites"
+        assert root.get("failures") == "1"
+        assert root.find("testsuite").get("skipped") == "1"
+        assert root.get("time") == "4.250"
+        cases = root.findall("testsuite/testcase")
+        assert [x.get("name") for x in cases] == [
+            "aa_tb",
+            "bb_tb[SEED=3]",
+            "cc_tb",
+        ]
+        assert [x.get("time") for x in cases] == ["1.750", "2.500", "0.000"]
+        assert cases[0].find("system-out").text == "aa ok\n"
+        assert cases[1].find("failure").get("message") == "Exit code 1"
+        assert cases[1].find("failure").text == "bb [31mfailed\n"
+        assert cases[2].find("skipped").text == "Not run.\n"
+
+        delete_reports()
+        assert not JSON_REPORT_FILE.exists()
+        assert not JUNIT_REPORT_FILE.exists()
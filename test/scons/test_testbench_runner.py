@@ -0,0 +1,205 @@
+"""
+Tests of the scons testbench_runner.py functions.
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+from test.conftest import ApioRunner
+from test.scons.testing import make_test_apio_env
+import pytest
+from click import unstyle
+from SCons.Node import executed
+from apio.proto.apio_pb2 import ApioTestParams, ApioTestLimits
+from apio.scons.plugin_util import SimulationConfig, SIM_TIME_LIMIT_MARKER
+from apio.scons.testbench_runner import (
+    TestbenchResult,
+    result_file_name,
+    results_summary_action,
+    run_simulation,
+    sim_command,
+    get_testbench_limits,
+    sweep_result_file_name,
+    sweep_summary_action,
+)
+
+
+def _write_result(testbench: str, passed: bool) -> SimulationConfig:
+    """Writes the result file of a testbench and returns its config."""
+    config = SimulationConfig(
+        testbench_name=testbench,
+        build_testbench_name=f"_build/{testbench}",
+        srcs=[f"{testbench}.v"],
+    )
+    TestbenchResult(
+        testbench=testbench,
+        passed=passed,
+        exit_code=0 if passed else 1,
+        sim_time=0.5,
+        output="",
+    ).write(result_file_name(config))
+    return config
+
+
+def test_sim_command():
+    """Tests the commands that run a compiled testbench."""
+
+    assert sim_command(
+        "_build/main_tb.out", verilator=False, waves_file="_build/main_tb.vcd"
+    ) == ["vvp", "_build/main_tb.out", "-dumpfile=_build/main_tb.vcd"]
+    assert sim_command(
+        "_build/main_tb.out", verilator=False, waves_file="_build/main_tb.fst"
+    ) == ["vvp", "_build/main_tb.out", "-fst", "-dumpfile=_build/main_tb.fst"]
+    assert sim_command(
+        "_build/main_tb.out", verilator=False, plusargs=["SEED=3"]
+    ) == ["vvp", "_build/main_tb.out", "-none", "+SEED=3"]
+    assert sim_command(
+        "_build/main_tb.out", verilator=True, plusargs=["SEED=3"]
+    ) == [os.path.abspath("_build/main_tb.out"), "+SEED=3"]
+
+
+def test_testbench_limits():
+    """Tests the merging of the default and per testbench limits."""
+
+    test_params = ApioTestParams()
+    test_params.limits.timeout = 60
+    test_params.limits.max_sim_time = 1000
+    test_params.testbench_limits["slow_tb"].timeout = 600
+
+    limits = get_testbench_limits(test_params, "main_tb")
+    assert (limits.timeout, limits.max_sim_time) == (60, 1000)
+    limits = get_testbench_limits(test_params, "slow_tb")
+    assert (limits.timeout, limits.max_sim_time) == (600, 1000)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Needs a shebang.")
+def test_run_simulation_limits(apio_runner: ApioRunner):
+    """Tests the timeout and the simulated time limit of a simulation,
+    using a fake verilator executable."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file(
+            "_build/main_tb.out",
+            f"#!{sys.executable}\n"
+            "import sys, time\n"
+            "print(' '.join(sys.argv[1:]), flush=True)\n"
+            "time.sleep(60)\n",
+        )
+        os.chmod("_build/main_tb.out", 0o755)
+
+        limits = ApioTestLimits(timeout=0.5, max_sim_time=1000)
+        exit_code, output, timed_out = run_simulation(
+            "_build/main_tb.out",
+            verilator=True,
+            limits=limits,
+            env=dict(os.environ),
+            plusargs=["SEED=3"],
+        )
+        assert exit_code != 0
+        assert timed_out
+        # -- The simulated time limit is not passed to verilator.
+        assert output.startswith("+SEED=3\n")
+        assert "Error: timeout, killed after 0.5 seconds." in output
+
+        # -- The marker of the iverilog watchdog is detected.
+        sb.write_file(
+            "_build/main_tb.out",
+            f"#!{sys.executable}\n"
+            f"print('{SIM_TIME_LIMIT_MARKER} (1000 ns).')\n",
+            exists_ok=True,
+        )
+        _, output, timed_out = run_simulation(
+            "_build/main_tb.out",
+            verilator=True,
+            limits=ApioTestLimits(),
+            env=dict(os.environ),
+        )
+        assert timed_out
+
+
+def test_result_write_read(apio_runner: ApioRunner):
+    """Tests the writing and reading of a testbench result."""
+
+    with apio_runner.in_sandbox():
+
+        result = TestbenchResult(
+            testbench="main_tb",
+            passed=False,
+            exit_code=3,
+            sim_time=1.25,
+            output="some output\n",
+        )
+        result.write("main_tb.result")
+        assert TestbenchResult.read("main_tb.result") == result
+
+
+def test_summary_action(apio_runner: ApioRunner, capsys):
+    """Tests the action that summarizes the testbenches results."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("_build/.keep", "")
+        apio_env = make_test_apio_env(targets=["test"])
+        scons_env = apio_env.scons_env
+
+        # -- All passed. The 'aa_tb' result was created in this scons run
+        # -- and the 'bb_tb' result is cached from a previous run.
+        configs = [_write_result("aa_tb", True), _write_result("bb_tb", True)]
+        scons_env.File(result_file_name(configs[0])).set_state(executed)
+        action = results_summary_action(configs)
+        assert action.execfunction([], [], scons_env) == 0
+        output = capsys.readouterr().out
+        assert "All 2 testbenches passed (1 cached)." in output
+        assert "bb_tb    PASSED       0.50s  (cached)" in unstyle(output)
+
+        # -- One failed.
+        configs.append(_write_result("cc_tb", False))
+        action = results_summary_action(configs)
+        assert action.execfunction([], [], scons_env) == 1
+        output = capsys.readouterr().out
+        assert "1 of 3 testbenches failed (2 cached)." in output
+
+
+def test_sweep_summary_action(apio_runner: ApioRunner, capsys):
+    """Tests the action that prints the results table of a sweep."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("_build/aa_tb.sweep/.keep", "")
+        apio_env = make_test_apio_env(targets=["test"])
+        scons_env = apio_env.scons_env
+
+        config = SimulationConfig(
+            testbench_name="aa_tb",
+            build_testbench_name="_build/aa_tb",
+            srcs=["aa_tb.v"],
+        )
+        points = ["SEED=1", "SEED=2"]
+        for index, point in enumerate(points):
+            TestbenchResult(
+                testbench="aa_tb",
+                passed=index == 0,
+                exit_code=index,
+                sim_time=0.1,
+                output="",
+                point=point,
+            ).write(sweep_result_file_name(config, index))
+        assert sweep_result_file_name(config, 1) == (
+            "_build/aa_tb.sweep/0001.result"
+        )
+
+        action = sweep_summary_action([config], points)
+        assert action.execfunction([], [], scons_env) == 1
+        output = unstyle(capsys.readouterr().out)
+        assert "POINT     aa_tb" in output
+        assert "SEED=1    PASS" in output
+        assert "SEED=2    FAIL" in output
+        assert "1 of 2 sweep runs failed (2 cached)." in output
+
+        # -- The reports were written.
+        report = json.loads(Path("_build/test-results.json").read_text("utf8"))
+        assert [x["point"] for x in report["testbenches"]] == points
+        assert report["failures"] == 1
+        assert Path("_build/test-results.xml").is_file()
@@ -0,0 +1,126 @@
+"""
+Tests of the scons verilog_index.py functions.
+"""
+
+import os
+import json
+from test.conftest import ApioRunner
+from apio.scons.verilog_index import (
+    VerilogIndex,
+    parse_verilog_text,
+    INDEX_CACHE_FILE,
+)
+
+VERILOG_TEXT = """
+module top #(parameter N = 1) (input clk);  // sub_c c1();
+  sub_a #(.W(8)) a1 (.x(1));
+  sub_b b[3:0] (.y());
+  /* sub_d d(); */
+  `include "defs.vh"
+  initial $display("sub_e e();");
+endmodule
+
+macromodule other(); endmodule
+"""
+
+
+def test_parse_verilog_text():
+    """Tests the parse_verilog_text() function."""
+
+    info = parse_verilog_text(VERILOG_TEXT)
+    assert info["modules"] == ["other", "top"]
+    assert info["includes"] == ["defs.vh"]
+
+    # -- References in comments and strings are ignored. Other identifiers
+    # -- in an instantiation position, e.g. keywords, are harmless.
+    assert "sub_a" in info["references"]
+    assert "sub_b" in info["references"]
+    assert "sub_c" not in info["references"]
+    assert "sub_d" not in info["references"]
+    assert "sub_e" not in info["references"]
+
+
+def test_dependencies(apio_runner: ApioRunner):
+    """Tests the selection of the files needed by a testbench."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main(); sub s(); endmodule")
+        sb.write_file("sub.v", '`include "inc.vh"\nmodule sub(); endmodule')
+        sb.write_file("inc.vh", "leaf l();")
+        sb.write_file("leaf.v", "module leaf(); endmodule")
+        sb.write_file("unused.v", "module unused(); endmodule")
+        sb.write_file("defs.v", "`define WIDTH 8")
+        sb.write_file("main_tb.v", "module main_tb(); main dut(); endmodule")
+
+        synth_srcs = ["defs.v", "leaf.v", "main.v", "sub.v", "unused.v"]
+        index = VerilogIndex.load(synth_srcs + ["main_tb.v"])
+
+        # -- Files with no modules, e.g. defs.v, are always included.
+        assert index.dependencies(["main_tb.v"], synth_srcs) == [
+            "defs.v",
+            "leaf.v",
+            "main.v",
+            "sub.v",
+        ]
+        assert index.dependencies(["leaf.v"], synth_srcs) == ["defs.v"]
+        assert index.module_files("sub") == ["sub.v"]
+        assert index.module_files("no_such_module") == []
+
+
+def test_include_paths(apio_runner: ApioRunner):
+    """Tests that includes are resolved relative to the including file and
+    then to the include dirs."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main_tb.v", "module main_tb(); sub s(); endmodule")
+        sb.write_file(
+            "rtl/sub.v", '`include "inc.vh"\nmodule sub(); endmodule'
+        )
+        sb.write_file("rtl/inc.vh", '`include "common.vh"\nleaf l();')
+        sb.write_file("common.vh", "other o();")
+        sb.write_file("rtl/leaf.v", "module leaf(); endmodule")
+        sb.write_file("rtl/other.v", "module other(); endmodule")
+        sb.write_file("rtl/unused.v", "module unused(); endmodule")
+
+        synth_srcs = ["rtl/leaf.v", "rtl/other.v", "rtl/sub.v", "rtl/unused.v"]
+        index = VerilogIndex.load(synth_srcs + ["main_tb.v"])
+
+        assert index.entries["rtl/sub.v"].includes == [
+            os.path.join("rtl", "inc.vh")
+        ]
+        assert index.entries[os.path.join("rtl", "inc.vh")].includes == [
+            "common.vh"
+        ]
+        assert index.dependencies(["main_tb.v"], synth_srcs) == [
+            "rtl/leaf.v",
+            "rtl/other.v",
+            "rtl/sub.v",
+        ]
+
+
+def test_index_cache(apio_runner: ApioRunner):
+    """Tests that unchanged files are taken from the cache file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("_build/.keep", "")
+        sb.write_file("main.v", "module main(); endmodule")
+        VerilogIndex.load(["main.v"])
+        assert os.path.isfile(INDEX_CACHE_FILE)
+
+        # -- An unchanged file is not parsed again, so a modified cache
+        # -- entry is returned as is.
+        with open(INDEX_CACHE_FILE, "r", encoding="utf8") as f:
+            data = json.load(f)
+        data["entries"]["main.v"]["info"]["modules"] = ["cached"]
+        with open(INDEX_CACHE_FILE, "w", encoding="utf8") as f:
+            json.dump(data, f)
+        assert VerilogIndex.load(["main.v"]).module_files("cached")
+
+        # -- A changed file is parsed again.
+        sb.write_file("main.v", "module main2(); endmodule", exists_ok=True)
+        index = VerilogIndex.load(["main.v"])
+        assert index.module_files("main2") == ["main.v"]
+        assert not index.module_files("cached")
@@ -2,13 +2,10 @@
 Helpers for apio's scons testing."""
 
 from typing import Dict, Optional, List
-import SCons.Script.SConsOptions
-import SCons.Node.FS
 import SCons.Environment
-import SCons.Defaults
-import SCons.Script.Main
 from google.protobuf import text_format
 from apio.scons.apio_env import ApioEnv
+from apio.scons.in_process import reset_scons_state
 from apio.proto.apio_pb2 import SconsParams, TargetParams
 
 # R0801: Similar lines in 2 files
@@ -56,24 +53,9 @@ class SconsHacks:
         normal operation where an scons process contains a single scons
         session but with pytest testing, where multiple independent tests
         are running in the same process, we need to reset though variables
-        before each test."""
-
-        # -- The Cons.Script.Main.OptionsParser variables contains the command
-        # -- line options of scons. We reset them here and tests can access
-        # -- them using SetOption() and GetOption().
-
-        parser = SCons.Script.SConsOptions.Parser("my_fake_version")
-        values = SCons.Script.SConsOptions.SConsValues(
-            parser.get_default_values()
-        )
-        parser.parse_args(args=[], values=values)
-        SCons.Script.Main.OptionsParser = parser
-
-        # -- Reset the scons target list variable.
-        SCons.Node.FS.default_fs = None
-
-        # -- Clear the SCons targets
-        SCons.Environment.CleanTargets = {}
+        before each test. Tests can access the scons options using
+        SetOption() and GetOption()."""
+        reset_scons_state()
 
     @staticmethod
     def get_targets() -> Dict:
@@ -0,0 +1,40 @@
+"""
+Tests of the shards.py module.
+"""
+
+import pytest
+from apio.utils.shards import parse_shard_spec, select_shard
+
+
+def test_parse_shard_spec():
+    """Tests the parsing of shard specs."""
+
+    assert parse_shard_spec("1/1") == (0, 1)
+    assert parse_shard_spec(" 3 / 4 ") == (2, 4)
+    for spec in ["", "1", "0/4", "5/4", "a/b", "1/0", "-1/2"]:
+        with pytest.raises(ValueError):
+            parse_shard_spec(spec)
+
+
+def test_select_shard_by_names():
+    """Tests that the shards are disjoint, complete and balanced by count,
+    regardless of the order of the names."""
+
+    names = [f"t{i:02d}_tb" for i in range(10)]
+    shards = [select_shard(names, i, 3) for i in range(3)]
+    assert sorted(x for shard in shards for x in shard) == names
+    assert [len(x) for x in shards] == [4, 3, 3]
+    assert select_shard(list(reversed(names)), 0, 3) == list(
+        reversed(shards[0])
+    )
+
+
+def test_select_shard_by_durations():
+    """Tests that the shards are balanced by durations."""
+
+    names = ["aa_tb", "bb_tb", "cc_tb", "dd_tb", "ee_tb"]
+    durations = {"aa_tb": 10.0, "bb_tb": 6.0, "cc_tb": 4.0, "dd_tb": 1.0}
+
+    # -- ee_tb takes the average duration, 5.25. The totals are 14 and 12.25.
+    assert select_shard(names, 0, 2, durations) == ["aa_tb", "cc_tb"]
+    assert select_shard(names, 1, 2, durations) == ["bb_tb", "dd_tb", "ee_tb"]
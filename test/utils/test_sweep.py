@@ -0,0 +1,59 @@
+"""
+Tests of the sweep.py module.
+"""
+
+from pathlib import Path
+from test.conftest import ApioRunner
+import pytest
+from apio.utils.sweep import (
+    parse_sweep_spec,
+    points_from_specs,
+    points_from_file,
+)
+
+
+def test_parse_sweep_spec():
+    """Tests the parsing of sweep specs."""
+
+    assert parse_sweep_spec("SEED=1..3") == ("SEED", ["1", "2", "3"])
+    assert parse_sweep_spec("X=-1..0") == ("X", ["-1", "0"])
+    assert parse_sweep_spec("MODE=fast,slow") == ("MODE", ["fast", "slow"])
+    assert parse_sweep_spec("N=5") == ("N", ["5"])
+
+    for spec in ["SEED", "=1..3", "1X=1", "SEED=", "SEED=3..1", "M=a,,b"]:
+        with pytest.raises(ValueError):
+            parse_sweep_spec(spec)
+
+
+def test_points_from_specs():
+    """Tests the cartesian product of sweep specs."""
+
+    assert points_from_specs(["SEED=1..2", "MODE=a,b"]) == [
+        "SEED=1 MODE=a",
+        "SEED=1 MODE=b",
+        "SEED=2 MODE=a",
+        "SEED=2 MODE=b",
+    ]
+
+    with pytest.raises(ValueError):
+        points_from_specs(["SEED=1..2", "SEED=3"])
+
+
+def test_points_from_file(apio_runner: ApioRunner):
+    """Tests reading sweep points from a file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("points.txt", "# Points\nSEED=1 MODE=a\n\nSEED=2  # x\n")
+        assert points_from_file(Path("points.txt")) == [
+            "SEED=1 MODE=a",
+            "SEED=2",
+        ]
+
+        sb.write_file("bad.txt", "SEED=1\nMODE\n")
+        with pytest.raises(ValueError, match="bad.txt:2"):
+            points_from_file(Path("bad.txt"))
+
+        sb.write_file("empty.txt", "# Nothing\n")
+        with pytest.raises(ValueError, match="no sweep points"):
+            points_from_file(Path("empty.txt"))
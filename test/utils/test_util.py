@@ -4,7 +4,15 @@ Tests of scons_util.py
 
 import os
 import pytest
-from apio.utils.util import plurality, list_plurality, is_debug, nameof
+from apio.utils.util import (
+    plurality,
+    list_plurality,
+    is_debug,
+    nameof,
+    parse_size,
+    parse_duration,
+    parse_sim_time,
+)
 
 # pylint: disable=fixme
 # TODO: Add more tests.
@@ -36,6 +44,51 @@ def test_list_pluraliry():
         list_plurality([], "or")
 
 
+def test_parse_size():
+    """Tests the parse_size() function."""
+
+    # -- Plain numbers and units.
+    assert parse_size("0") == 0
+    assert parse_size("500") == 500
+    assert parse_size("64k") == 64 * 1024
+    assert parse_size("2M") == 2 * 1024 * 1024
+    assert parse_size("2MB") == 2 * 1024 * 1024
+    assert parse_size(" 1.5 GB ") == int(1.5 * 1024 * 1024 * 1024)
+
+    # -- Invalid values.
+    for s in ["", "abc", "-1", "10X", "1.2.3"]:
+        with pytest.raises(ValueError):
+            parse_size(s)
+
+
+def test_parse_duration():
+    """Tests the parse_duration() function."""
+
+    assert parse_duration("90") == 90
+    assert parse_duration("90s") == 90
+    assert parse_duration("10m") == 600
+    assert parse_duration(" 1.5H ") == 5400
+    assert parse_duration("7d") == 7 * 86400
+
+    for s in ["", "abc", "-1", "10w", "1.2.3"]:
+        with pytest.raises(ValueError):
+            parse_duration(s)
+
+
+def test_parse_sim_time():
+    """Tests the parse_sim_time() function."""
+
+    assert parse_sim_time("500") == 500
+    assert parse_sim_time("500ns") == 500
+    assert parse_sim_time("20us") == 20_000
+    assert parse_sim_time(" 1.5 ms ") == 1_500_000
+    assert parse_sim_time("2s") == 2_000_000_000
+
+    for s in ["", "abc", "-1", "10ps", "1.2.3"]:
+        with pytest.raises(ValueError):
+            parse_sim_time(s)
+
+
 def test_is_debug():
     """Tests the is_debug() function."""
 
@@ -0,0 +1,132 @@
+"""
+Tests of the waves.py module.
+"""
+
+import io
+import pytest
+from apio.utils.waves import (
+    Assertion,
+    VcdReader,
+    WavesError,
+    check_assertions,
+    toggle_counts,
+)
+
+# -- A small VCD file with a clock, a 4 bits counter and an error flag.
+VCD_TEXT = """
+$date today $end
+$timescale 1ns $end
+$scope module main_tb $end
+$var wire 1 ! clk $end
+$var reg 1 # err $end
+$scope module uut $end
+$var reg 4 " count [3:0] $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+$dumpvars
+0!
+b0 "
+0#
+$end
+#10
+1!
+b1 "
+#20
+0!
+#30
+1!
+b10 "
+$comment a comment $end
+#40
+0!
+#50
+1!
+bx "
+1#
+"""
+
+
+def _reader() -> VcdReader:
+    """Returns a reader of VCD_TEXT."""
+    return VcdReader(io.StringIO(VCD_TEXT))
+
+
+def test_header():
+    """Tests the parsing of the VCD header."""
+
+    reader = _reader()
+    assert reader.timescale == "1ns"
+    assert [(s.name, s.width) for s in reader.signals] == [
+        ("main_tb.clk", 1),
+        ("main_tb.err", 1),
+        ("main_tb.uut.count[3:0]", 4),
+    ]
+    assert [s.name for s in reader.select(["*.uut.*"])] == [
+        "main_tb.uut.count[3:0]"
+    ]
+
+
+def test_changes():
+    """Tests the generation of the changes in a time window."""
+
+    changes = _reader().changes(["*.count*"])
+    assert [(c.time, c.value) for c in changes] == [
+        (0, "0"),
+        (10, "1"),
+        (30, "10"),
+        (50, "x"),
+    ]
+
+    # -- The values at the start of the window are reported at its start.
+    changes = _reader().changes(["*clk", "*count*"], start=15, end=30)
+    assert [(c.time, c.signal.name, c.value) for c in changes] == [
+        (15, "main_tb.clk", "1"),
+        (15, "main_tb.uut.count[3:0]", "1"),
+        (20, "main_tb.clk", "0"),
+        (30, "main_tb.clk", "1"),
+        (30, "main_tb.uut.count[3:0]", "10"),
+    ]
+
+
+def test_toggle_counts():
+    """Tests the counting of toggles."""
+
+    assert toggle_counts(_reader().changes()) == {
+        "main_tb.clk": 5,
+        "main_tb.err": 1,
+        "main_tb.uut.count[3:0]": 3,
+    }
+
+
+def test_assertions():
+    """Tests the parsing and checking of assertions."""
+
+    assertions = [
+        Assertion.parse("main_tb.err == 0"),
+        Assertion.parse("main_tb.uut.count[3:0] == 0b10 @ 30"),
+        Assertion.parse("main_tb.uut.count[3:0] != 1 @ 15"),
+        Assertion.parse("main_tb.uut.count[3:0]==x@100"),
+    ]
+    failures = check_assertions(_reader().changes(), assertions)
+    assert [(f.assertion.text, f.time, f.value) for f in failures] == [
+        ("main_tb.err == 0", 50, "1"),
+        ("main_tb.uut.count[3:0] != 1 @ 15", 15, "1"),
+    ]
+
+    with pytest.raises(WavesError):
+        Assertion.parse("main_tb.err = 0")
+    with pytest.raises(WavesError):
+        Assertion.parse("main_tb.err == abc")
+
+
+def test_invalid_vcd():
+    """Tests the errors of invalid VCD files."""
+
+    with pytest.raises(WavesError, match="enddefinitions"):
+        VcdReader(io.StringIO("$scope module a $end\n"))
+
+    reader = VcdReader(io.StringIO("$enddefinitions $end\n#0\n?foo\n"))
+    with pytest.raises(WavesError, match="Unexpected token"):
+        list(reader.changes())